@@ -0,0 +1,187 @@
+"""
+In-memory storage for synthesized MP3 audio.
+AudioBuffer keeps the segments of one generation together with an index of
+their byte ranges and durations, so playback can jump to any segment or
+time offset without decoding or re-synthesizing anything.
+"""
+
+import io
+import os
+import shutil
+import tempfile
+import threading
+from array import array
+from bisect import bisect_right
+from typing import BinaryIO, Tuple
+
+import metrics
+from utils import get_session_temp_dir
+
+# AudioBuffer keeps audio in memory up to this size, then moves it to a
+# temp file (about 20 minutes of edge-tts audio).
+AUDIO_SPILL_BYTES = 8 * 1024 * 1024
+
+# MP3 frame header tables, indexed by the header's bit fields
+_BITRATES_KBPS = {
+    # (MPEG-1?, layer): bitrates for index 0-14
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),  # MPEG-1
+    2: (22050, 24000, 16000),  # MPEG-2
+    0: (11025, 12000, 8000),   # MPEG-2.5
+}
+
+# Used when a segment cannot be parsed: edge-tts streams 48 kbit/s MP3
+_FALLBACK_BYTES_PER_SECOND = 48000 / 8
+
+
+def mp3_duration(data: bytes) -> float:
+    """
+    Returns the playing time of MP3 data in seconds by walking its frame
+    headers (no decoding). Works for constant and variable bitrates.
+    """
+    pos = 0
+    # Skip an ID3v2 tag
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        pos = 10 + size + (10 if data[5] & 0x10 else 0)
+
+    seconds = 0.0
+    frames = 0
+    end = len(data) - 4
+    while pos <= end:
+        b1, b2 = data[pos + 1], data[pos + 2]
+        if data[pos] != 0xFF or (b1 & 0xE0) != 0xE0:
+            pos += 1  # not a frame header: resynchronize
+            continue
+
+        version = (b1 >> 3) & 3
+        layer = 4 - ((b1 >> 1) & 3)
+        bitrate_index = b2 >> 4
+        rate_index = (b2 >> 2) & 3
+        if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+            pos += 1
+            continue
+
+        mpeg1 = version == 3
+        bitrate = _BITRATES_KBPS[(mpeg1, layer)][bitrate_index] * 1000
+        sample_rate = _SAMPLE_RATES[version][rate_index]
+        padding = (b2 >> 1) & 1
+
+        if layer == 1:
+            samples = 384
+            length = (12 * bitrate // sample_rate + padding) * 4
+        else:
+            samples = 1152 if layer == 2 or mpeg1 else 576
+            length = samples // 8 * bitrate // sample_rate + padding
+
+        seconds += samples / sample_rate
+        frames += 1
+        pos += length
+
+    if frames == 0:
+        return len(data) / _FALLBACK_BYTES_PER_SECOND
+    return seconds
+
+
+class AudioBuffer:
+    """
+    Holds synthesized MP3 audio for the current session.
+    The audio stays in memory until it grows past spill_bytes, then moves
+    to an anonymous temp file in the session temp directory, so book-length
+    audio does not fill up RAM. Nothing is written to a visible file until
+    save() is called; the temp file disappears when the buffer is closed.
+
+    Each append() is one segment. The buffer indexes the byte range and
+    start time of every segment, so segment_at(seconds) and
+    read_segment(index) are cheap.
+    """
+
+    def __init__(self, spill_bytes: int = AUDIO_SPILL_BYTES) -> None:
+        self._file = tempfile.SpooledTemporaryFile(
+            max_size=spill_bytes, dir=get_session_temp_dir()
+        )
+        self._lock = threading.Lock()
+        self.size = 0
+        # Per segment: byte offset, byte length, start time in seconds
+        self._offsets = array("Q")
+        self._lengths = array("Q")
+        self._starts = array("d")
+        self.duration = 0.0
+
+    def append(self, data: bytes) -> None:
+        """ Adds an MP3 segment to the end of the buffer."""
+        seconds = mp3_duration(data)
+        with self._lock:
+            self._file.seek(0, os.SEEK_END)
+            self._file.write(data)
+            self._offsets.append(self.size)
+            self._lengths.append(len(data))
+            self._starts.append(self.duration)
+            self.size += len(data)
+            self.duration += seconds
+
+    @property
+    def segment_count(self) -> int:
+        return len(self._offsets)
+
+    def segment_start(self, index: int) -> float:
+        """ Time in seconds at which segment `index` starts."""
+        return self._starts[index]
+
+    def segment_at(self, seconds: float) -> Tuple[int, float]:
+        """
+        Returns (segment index, offset into that segment) for a time in
+        seconds, clamped to the audio received so far.
+        """
+        with self._lock:
+            if not self._starts:
+                raise IndexError("The buffer is empty.")
+            index = max(0, bisect_right(self._starts, seconds) - 1)
+            return index, max(0.0, seconds - self._starts[index])
+
+    def read_segment(self, index: int) -> bytes:
+        """ Returns the MP3 data of one segment."""
+        with self._lock:
+            self._file.seek(self._offsets[index])
+            return self._file.read(self._lengths[index])
+
+    @property
+    def spilled(self) -> bool:
+        """ True once the audio has moved from memory to a temp file."""
+        return bool(getattr(self._file, "_rolled", False))
+
+    def _copy_to(self, dest: BinaryIO) -> None:
+        with self._lock:
+            self._file.seek(0)
+            shutil.copyfileobj(self._file, dest)
+
+    def getvalue(self) -> bytes:
+        """ Returns all audio as bytes (for short audio)."""
+        out = io.BytesIO()
+        self._copy_to(out)
+        return out.getvalue()
+
+    def save(self, path: str) -> None:
+        """ Writes the audio to path (atomically, via a temp name)."""
+        part_path = path + ".part"
+        try:
+            with metrics.stage("disk_write"):
+                with open(part_path, "wb") as f:
+                    self._copy_to(f)
+                os.replace(part_path, path)
+        except BaseException:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+
+    def close(self) -> None:
+        """ Releases the memory or temp file holding the audio."""
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,235 @@
+"""
+Headless batch conversion of PDF/TXT documents to MP3 files.
+Runs without a display or sound card: nothing here imports tkinter or pygame.
+
+Usage:
+    python main.py convert report.pdf notes/ "scans/*.pdf" -o audio/
+    python -m batch convert docs/ --jobs 4 --voice en-US-JennyNeural
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional
+
+import metrics
+from boilerplate import BoilerplateReport, boilerplate_stripping_enabled, set_boilerplate_stripping
+from pdf_processor import TextFile, extract_text_from_pdf, extract_text_from_txt
+from tts_engine import DEFAULT_VOICE, DEFAULT_WORKERS, text_to_speech
+from utils import format_file_size
+from word_timing import timing_path_for
+
+SUPPORTED_EXTENSIONS = (".pdf", ".txt")
+
+# Number of documents converted at the same time
+DEFAULT_JOBS = 2
+
+# TXT files larger than this are streamed into synthesis page by page
+# instead of being loaded whole; they get no word timing index
+STREAM_TXT_BYTES = 32 * 1024 * 1024
+
+
+class ConversionResult(NamedTuple):
+    """ Outcome of converting one document."""
+    source: str
+    output: str
+    status: str  # "converted", "up to date" or "failed"
+    seconds: float
+    bytes_written: int
+    error: Optional[str] = None
+    # Headers, footers and notices left out of a PDF (see boilerplate.py)
+    boilerplate: Optional[BoilerplateReport] = None
+
+
+def find_documents(inputs: Iterable[str]) -> List[str]:
+    """
+    Expands files, directories (searched recursively) and glob patterns
+    into a sorted list of PDF/TXT files, without duplicates.
+    """
+    found = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            for dir_path, _, file_names in os.walk(item):
+                for name in file_names:
+                    if Path(name).suffix.lower() in SUPPORTED_EXTENSIONS:
+                        found.add(os.path.join(dir_path, name))
+        else:
+            # A plain file name is a glob pattern that matches itself
+            for path in glob.glob(item, recursive=True) or [item]:
+                if Path(path).suffix.lower() in SUPPORTED_EXTENSIONS:
+                    found.add(path)
+    return sorted(found)
+
+
+def output_path_for(source: str, out_dir: Optional[str] = None) -> str:
+    """ MP3 path for a document: same name, in out_dir or next to the source."""
+    name = Path(source).with_suffix(".mp3").name
+    return os.path.join(out_dir or os.path.dirname(source), name)
+
+
+def is_up_to_date(source: str, output: str) -> bool:
+    """ True if output exists, is not empty and is newer than source."""
+    try:
+        out_stat = os.stat(output)
+    except FileNotFoundError:
+        return False
+    return out_stat.st_size > 0 and out_stat.st_mtime >= os.stat(source).st_mtime
+
+
+def load_document_text(path: str, report: Optional[BoilerplateReport] = None) -> Optional[str]:
+    """
+    Returns the text of a PDF or TXT file. PDF boilerplate is left out
+    unless stripping was turned off, and what was removed is added to report.
+    """
+    with metrics.stage("file_load"):
+        if Path(path).suffix.lower() == ".pdf":
+            return extract_text_from_pdf(
+                path, skip_boilerplate=boilerplate_stripping_enabled(), report=report
+            )
+        return extract_text_from_txt(path)
+
+
+def convert_document(
+    source: str,
+    output: str,
+    voice: str = DEFAULT_VOICE,
+    workers: Optional[int] = DEFAULT_WORKERS,
+    force: bool = False,
+) -> ConversionResult:
+    """ Converts one document to an MP3 file. Never raises."""
+    start = time.perf_counter()
+    if not force and is_up_to_date(source, output):
+        return ConversionResult(source, output, "up to date", 0.0, 0)
+
+    try:
+        if Path(source).suffix.lower() == ".txt" and os.path.getsize(source) > STREAM_TXT_BYTES:
+            # Read from the file again while synthesizing, with fixed memory
+            text_to_speech(TextFile(source), output, voice=voice, workers=workers)
+            size = os.path.getsize(output)
+            return ConversionResult(source, output, "converted", time.perf_counter() - start, size)
+
+        boilerplate = BoilerplateReport()
+        text = load_document_text(source, boilerplate)
+        if not text or not text.strip():
+            raise ValueError("No extractable text found in this file.")
+
+        # The MP3 only appears once complete, so a failed conversion never
+        # counts as up to date; its finished chunks are kept and the next
+        # run continues from there. The word timing index is saved next to it.
+        text_to_speech(
+            text, output, voice=voice, workers=workers, timing_path=timing_path_for(output)
+        )
+        size = os.path.getsize(output)
+        return ConversionResult(
+            source, output, "converted", time.perf_counter() - start, size, boilerplate=boilerplate
+        )
+
+    except Exception as e:
+        return ConversionResult(
+            source, output, "failed", time.perf_counter() - start, 0, str(e)
+        )
+
+
+def convert_documents(
+    sources: List[str],
+    out_dir: Optional[str] = None,
+    voice: str = DEFAULT_VOICE,
+    jobs: int = DEFAULT_JOBS,
+    workers: Optional[int] = DEFAULT_WORKERS,
+    force: bool = False,
+) -> List[ConversionResult]:
+    """
+    Converts documents with at most `jobs` of them in flight at once,
+    printing one summary line per document as it finishes.
+    Results are returned in the same order as sources.
+    """
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = {
+            pool.submit(
+                convert_document, source, output_path_for(source, out_dir), voice, workers, force
+            ): source
+            for source in sources
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            print_result(result)
+
+    return [results[source] for source in sources]
+
+
+def print_result(result: ConversionResult) -> None:
+    """ Prints a one-line summary of a conversion."""
+    line = f"{result.status:<10} {result.source} -> {result.output}"
+    if result.status == "converted":
+        line += f"  {result.seconds:.1f} s  {format_file_size(result.bytes_written)}"
+        if result.boilerplate is not None and result.boilerplate.lines_removed:
+            line += f"  ({result.boilerplate.summary()})"
+    elif result.status == "failed":
+        line += f"  {result.error}"
+    print(line, flush=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="PDF/TXT to MP3 converter")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert = commands.add_parser("convert", help="convert documents to MP3 files")
+    convert.add_argument("inputs", nargs="+", help="PDF/TXT files, directories or glob patterns")
+    convert.add_argument("-o", "--out-dir", help="directory for the MP3 files (default: next to each document)")
+    convert.add_argument("--voice", default=DEFAULT_VOICE)
+    convert.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="documents converted at the same time")
+    convert.add_argument(
+        "--workers", type=int, default=DEFAULT_WORKERS,
+        help="cap on concurrent requests per document (default: the adaptive limit shared by all documents)",
+    )
+    convert.add_argument("--force", action="store_true", help="convert even if the MP3 is up to date")
+    convert.add_argument(
+        "--keep-boilerplate", action="store_true",
+        help="also read running headers, footers, page numbers and repeated notices",
+    )
+    convert.add_argument(
+        "--metrics", metavar="PATH",
+        help="write stage timings and counters to PATH (Prometheus format for *.prom, else JSON lines)",
+    )
+
+    args = parser.parse_args(argv)
+    if args.metrics:
+        metrics.set_metrics_enabled(True)
+    if args.keep_boilerplate:
+        set_boilerplate_stripping(False)
+
+    sources = find_documents(args.inputs)
+    if not sources:
+        print("No PDF or TXT files found.", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    results = convert_documents(
+        sources, args.out_dir, args.voice, args.jobs, args.workers, args.force
+    )
+
+    converted = [r for r in results if r.status == "converted"]
+    failed = [r for r in results if r.status == "failed"]
+    total_bytes = sum(r.bytes_written for r in converted)
+    print(
+        f"\n{len(converted)} converted, {len(results) - len(converted) - len(failed)} up to date, "
+        f"{len(failed)} failed in {time.perf_counter() - start:.1f} s "
+        f"({format_file_size(total_bytes)} written)"
+    )
+    if args.metrics:
+        print(metrics.format_breakdown(metrics.stage_breakdown()))
+        metrics.write_metrics(args.metrics)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
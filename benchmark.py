@@ -0,0 +1,690 @@
+"""
+Performance benchmarks for the PDF to Speech application.
+Everything runs offline on generated data. Correctness is checked by the
+tests in tests/ (python -m pytest); these only measure.
+
+Usage:
+    python benchmark.py extract --pages 300
+    python benchmark.py backends --pages 100 [--pdf report.pdf]
+    python benchmark.py startup --budget-ms 250
+    python benchmark.py resynth --paragraphs 300
+    python benchmark.py throttle --paragraphs 300
+    python benchmark.py normalize --megabytes 8
+    python benchmark.py txt --megabytes 8
+    python benchmark.py boilerplate --pages 200
+    python benchmark.py voices
+    python benchmark.py suite --save baseline.json
+    python benchmark.py suite --compare baseline.json
+    python benchmark.py compare baseline.json new.json
+"""
+
+import argparse
+import difflib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from boilerplate import BoilerplateReport, strip_boilerplate
+from audio_buffer import AudioBuffer
+from fake_tts import FakeVoiceList, make_fake_communicate
+from pdf_processor import (
+    BACKENDS,
+    extract_text_from_pdf,
+    iter_pdf_pages,
+    iter_pdf_pages_parallel,
+    iter_txt_pages,
+    set_text_cache,
+)
+from tts_engine import (
+    DEFAULT_WORKERS,
+    RequestScheduler,
+    SynthesisRun,
+    get_scheduler,
+    set_communicate_factory,
+    set_scheduler,
+    set_synthesis_cache,
+    stream_speech,
+    text_to_speech,
+)
+from sample_data import (
+    sample_document,
+    sample_raw_text,
+    sample_report_pages,
+    sample_voices,
+    three_pass_clean,
+    write_sample_pdf,
+)
+from text_normalizer import clean_text, iter_clean_text
+from voices import VoiceCatalog, set_voice_fetcher
+
+# Modules that must not be loaded before the user actually needs them
+HEAVY_MODULES = ("edge_tts", "aiohttp", "asyncio", "pygame", "pdfplumber", "pdfminer", "pypdfium2")
+
+# Default limit for cold start to first window, in milliseconds
+STARTUP_BUDGET_MS = 250
+
+# Version of the baseline files written by `suite --save`
+BASELINE_VERSION = 1
+# A suite result this much worse than its baseline is a regression
+REGRESSION_TOLERANCE = 0.15
+# Document sizes measured by the suite
+SUITE_PAGE_COUNTS = (10, 100, 1000)
+SUITE_CLEAN_MB = 8
+SUITE_PARAGRAPHS = 60
+# The fake service: seconds before the first audio, and download rate in
+# KB/s (edge-tts audio is 6 KB per second of speech)
+SUITE_LATENCY = 0.2
+SUITE_BANDWIDTH_KB = 256.0
+
+# Suite results: name -> {"value": ..., "unit": ..., "better": "lower" or "higher"}
+SuiteResults = Dict[str, Dict[str, object]]
+
+
+def bench_extract(page_count: int, worker_counts: List[int], backend: str = "pdfplumber") -> None:
+    """ Prints pages/second of PDF extraction for each worker count."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = os.path.join(tmp_dir, "sample.pdf")
+        write_sample_pdf(pdf_path, page_count)
+        print(f"PDF extraction ({backend}), {page_count} pages ({os.cpu_count()} CPU cores)")
+
+        baseline = None
+        for workers in worker_counts:
+            start = time.perf_counter()
+            pages = sum(1 for _ in iter_pdf_pages_parallel(pdf_path, workers=workers, backend=backend))
+            elapsed = time.perf_counter() - start
+
+            rate = pages / elapsed
+            baseline = baseline or rate
+            print(f"  workers={workers:<3} {rate:8.1f} pages/s  x{rate / baseline:.2f}")
+
+
+def _text_agreement(a: str, b: str) -> float:
+    """ Similarity (0-1) of two texts, compared word by word."""
+    return difflib.SequenceMatcher(None, a.split(), b.split(), autojunk=False).ratio()
+
+
+def bench_backends(page_count: int, pdf_path: Optional[str] = None) -> None:
+    """
+    Compares the PDF extraction backends on speed and on how closely their
+    text agrees with the layout-accurate pdfplumber backend.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if pdf_path is None:
+            pdf_path = os.path.join(tmp_dir, "sample.pdf")
+            write_sample_pdf(pdf_path, page_count)
+        print(f"PDF backends on {pdf_path}")
+
+        results = {}
+        for backend in BACKENDS:
+            start = time.perf_counter()
+            pages = list(iter_pdf_pages(pdf_path, backend=backend))
+            elapsed = time.perf_counter() - start
+            results[backend] = (pages, elapsed)
+
+        reference = results["pdfplumber"][0]
+        for backend, (pages, elapsed) in results.items():
+            agreement = sum(
+                _text_agreement(page.text, ref.text) for page, ref in zip(pages, reference)
+            ) / max(1, len(reference))
+            print(
+                f"  {backend:<11} {len(pages) / elapsed:8.1f} pages/s  "
+                f"{elapsed:7.2f} s  agreement {agreement:6.1%}"
+            )
+
+
+# Run in a fresh interpreter: imports the GUI, opens the first window and
+# reports the elapsed time plus any heavy modules that were loaded
+_STARTUP_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import gui
+window_ms = None
+try:
+    from tkinter import Tk
+    root = Tk()
+    app = gui.PdfTtsApp(root)
+    root.update()
+    window_ms = (time.perf_counter() - start) * 1000
+    root.destroy()
+except Exception:
+    pass  # no display available: only the import time is measured
+import_ms = (time.perf_counter() - start) * 1000 if window_ms is None else None
+heavy = [m for m in %r if m in sys.modules]
+print(window_ms, import_ms, ",".join(heavy))
+"""
+
+
+def bench_startup(budget_ms: float, runs: int = 5) -> bool:
+    """
+    Measures cold start to first window (or just the GUI imports when
+    there is no display) in fresh interpreters, using the best of `runs`.
+    Prints the slowest imports from python -X importtime.
+    Returns False if over budget or if a heavy module was loaded eagerly.
+    """
+    script = _STARTUP_SCRIPT % (HEAVY_MODULES,)
+    best = None
+    heavy = ""
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True
+        )
+        window_ms, import_ms, heavy = result.stdout.split(" ")
+        what = "first window" if window_ms != "None" else "GUI import (no display)"
+        elapsed = float(window_ms if window_ms != "None" else import_ms)
+        best = elapsed if best is None else min(best, elapsed)
+        heavy = heavy.strip()
+
+    # Show where the import time goes
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import gui"],
+        capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].rstrip()))
+    print("Slowest imports (cumulative):")
+    for cumulative_us, name in sorted(rows, reverse=True)[:8]:
+        print(f"  {cumulative_us / 1000:7.1f} ms {name}")
+
+    ok = best <= budget_ms and not heavy
+    print(f"\nCold start to {what}: {best:.0f} ms (budget {budget_ms:.0f} ms)")
+    if heavy:
+        print(f"Loaded at startup but should be lazy: {heavy}")
+    print("OK" if ok else "FAIL")
+    return ok
+
+
+def bench_resynth(paragraphs: int, latency: float = 0.2) -> None:
+    """
+    Times regenerating a document after edits of increasing size, reusing
+    the previous run's audio (the disk cache is disabled). Regeneration
+    time should follow the size of the edit, not of the document.
+    """
+    set_communicate_factory(make_fake_communicate(latency=latency, chars_per_second=1000.0))
+    set_synthesis_cache(enabled=False)
+
+    def generate(text: str, previous: Optional[SynthesisRun]) -> SynthesisRun:
+        run = SynthesisRun(AudioBuffer(), previous)
+        for segment in stream_speech(text, run=run):
+            run.buffer.append(segment)
+        run.previous = None
+        return run
+
+    document = sample_document(paragraphs)
+    start = time.perf_counter()
+    base = generate("\n\n".join(document), None)
+    print(f"Incremental re-synthesis, {paragraphs} paragraphs, {latency * 1000:.0f} ms latency")
+    print(f"  full generation    {time.perf_counter() - start:7.2f} s  {base.synthesized} chunks")
+
+    for edited_paragraphs in (1, 10, paragraphs // 4):
+        edited = list(document)
+        for i in range(0, len(edited), max(1, len(edited) // edited_paragraphs))[:edited_paragraphs]:
+            edited[i] = edited[i].replace(" ", " typo ", 1)
+        start = time.perf_counter()
+        run = generate("\n\n".join(edited), base)
+        print(
+            f"  {edited_paragraphs:>4} paragraphs edited {time.perf_counter() - start:7.2f} s  "
+            f"{run.synthesized} synthesized, {run.reused} reused"
+        )
+        run.buffer.close()
+    base.buffer.close()
+
+
+def bench_throttle(
+    paragraphs: int,
+    max_concurrent: int = 6,
+    failure_rate: float = 0.03,
+    stall_rate: float = 0.01,
+    workers: Optional[int] = DEFAULT_WORKERS,
+) -> None:
+    """
+    Converts a document through a fake service that rejects requests above
+    max_concurrent, fails or stalls some requests at random and varies its
+    latency, and prints how the scheduler's limit adapted, its retry counts
+    and latency histogram. tests/test_scheduler.py checks that such
+    conversions succeed.
+    """
+    fake = make_fake_communicate(
+        latency=0.1,
+        chars_per_second=1000.0,
+        latency_jitter=0.1,
+        failure_rate=failure_rate,
+        stall_rate=stall_rate,
+        max_concurrent=max_concurrent,
+    )
+    set_communicate_factory(fake)
+    set_synthesis_cache(enabled=False)
+    set_scheduler(RequestScheduler(timeout=2.0, base_delay=0.05, max_delay=1.0))
+    print(
+        f"Throttled service: {max_concurrent} requests at once, {failure_rate:.0%} failures, "
+        f"{stall_rate:.0%} stalls, per-job cap {workers or 'none'}"
+    )
+
+    limits = []
+    done = False
+
+    def sample_limit() -> None:
+        while not done:
+            limits.append(get_scheduler().stats()["limit"])
+            time.sleep(0.05)
+
+    sampler = threading.Thread(target=sample_limit, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            text_to_speech(
+                "\n\n".join(sample_document(paragraphs)),
+                os.path.join(tmp_dir, "out.mp3"),
+                workers=workers,
+            )
+    finally:
+        done = True
+        sampler.join()
+    elapsed = time.perf_counter() - start
+
+    stats = get_scheduler().stats()
+    print(f"  time            {elapsed:7.2f} s")
+    print(f"  requests        {stats['requests']:7d}  ({stats['successes']} ok, {stats['failures']} failed)")
+    print(f"  retries         {stats['retries']:7d}  ({stats['timeouts']} timeouts)")
+    print(f"  peak requests   {fake.peak_active:7d}")
+    print(f"  limit           {min(limits):.1f} - {max(limits):.1f}, ended at {stats['limit']:.1f}")
+    print("  latency histogram:")
+    for bound, count in stats["latency_histogram"].items():
+        if count:
+            print(f"    <= {bound:5.2f} s  {count}")
+    set_scheduler(None)
+
+
+def _peak_memory(func: Callable[[], object]) -> int:
+    """ Peak bytes allocated while func runs."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_normalize(megabytes: float, page_kb: int = 4) -> None:
+    """
+    Compares the speed and peak memory of the three-pass reference, the
+    single-pass normalizer and the streaming normalizer on a large text.
+    Their equivalence is checked in tests/test_text_normalizer.py.
+    """
+    text = sample_raw_text(megabytes)
+    page_chars = page_kb * 1024
+    pages = [text[i:i + page_chars] for i in range(0, len(text), page_chars)]
+
+    def stream() -> None:
+        for _ in iter_clean_text(pages):
+            pass
+
+    print(f"Cleaning {megabytes:g} MB ({len(pages)} pieces of {page_kb} KB for the stream)")
+    baseline = None
+    for name, func in (
+        ("three passes", lambda: three_pass_clean(text)),
+        ("single pass", lambda: clean_text(text)),
+        ("stream", stream),
+    ):
+        seconds = _best_of(func, 3)
+        baseline = baseline or seconds
+        peak = _peak_memory(func) / (1024 * 1024)
+        print(f"  {name:<13} {megabytes / seconds:7.1f} MB/s  x{baseline / seconds:.2f}  peak {peak:7.2f} MB")
+
+
+def bench_txt(megabytes: float) -> None:
+    """
+    Compares the speed and peak memory of iter_txt_pages with reading the
+    whole file in text mode, on a large UTF-16 file. Encoding detection
+    and equivalence are checked in tests/test_txt_reader.py.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "sample.txt")
+        text = sample_raw_text(megabytes)
+        with open(path, "w", encoding="utf-16") as f:
+            f.write(text)
+
+        def read_whole() -> None:
+            with open(path, "r", encoding="utf-16") as f:
+                f.read()
+
+        def read_pages() -> None:
+            for _ in iter_txt_pages(path):
+                pass
+
+        print(f"Reading {megabytes:g} MB of text as UTF-16 ({os.path.getsize(path) / (1024 * 1024):.0f} MB file)")
+        for name, func in (("text mode", read_whole), ("pages", read_pages)):
+            seconds = _best_of(func, 3)
+            peak = _peak_memory(func) / (1024 * 1024)
+            print(f"  {name:<10} {megabytes / seconds:7.1f} MB/s  peak {peak:7.2f} MB")
+
+
+def bench_boilerplate(page_count: int, synth_pages: int = 4) -> None:
+    """
+    Measures how fast strip_boilerplate filters a generated report and the
+    synthesis time it saves against the fake service. What it removes is
+    checked in tests/test_boilerplate.py.
+    """
+    pages, _ = sample_report_pages(page_count)
+    report = BoilerplateReport()
+    seconds = _best_of(lambda: list(strip_boilerplate(pages, report, None)), 3)
+    print(f"Boilerplate of a {page_count}-page report")
+    print(f"  speed  {page_count / seconds:9.0f} pages/s")
+
+    # The first pages of the report, with and without stripping
+    fake = make_fake_communicate(latency=0.05, chars_per_second=15.0, bytes_per_second=SUITE_BANDWIDTH_KB * 1024)
+    set_communicate_factory(fake)
+    set_synthesis_cache(enabled=False)
+    short = pages[:synth_pages]
+    times = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for text in (
+            "\n".join(page.text for page in short),
+            "\n".join(page.text for page in strip_boilerplate(short, None, None)),
+        ):
+            start = time.perf_counter()
+            text_to_speech(text, os.path.join(tmp_dir, "out.mp3"), resume=False)
+            times.append(time.perf_counter() - start)
+    set_communicate_factory(None)
+    set_synthesis_cache()
+    print(f"  synthesis of {len(short)} pages: {times[0]:.2f} s with boilerplate, {times[1]:.2f} s without "
+          f"({1 - times[1] / times[0]:.0%} saved)")
+
+
+def bench_voices(count: int = 400) -> None:
+    """
+    Times loading the voice catalog (bundled list and saved snapshot) and
+    the locale/gender filters against a scan of all voices. The refresh,
+    snapshot and fallback behaviour is checked in tests/test_voices.py.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "voices.json")
+        set_voice_fetcher(FakeVoiceList(sample_voices(count)))
+        try:
+            print(f"Voice catalog, {count} voices")
+            seconds = _best_of(lambda: VoiceCatalog(path), 5)
+            print(f"  load bundled   {seconds * 1000:7.2f} ms")
+            VoiceCatalog(path).refresh().result(timeout=5)
+            seconds = _best_of(lambda: VoiceCatalog(path), 5)
+            print(f"  load snapshot  {seconds * 1000:7.2f} ms")
+            catalog = VoiceCatalog(path)
+        finally:
+            set_voice_fetcher(None)
+
+    combos = [(locale, gender) for locale in (None,) + catalog.index.locales for gender in (None, "Female", "Male")]
+
+    def scan() -> None:
+        for locale, gender in combos:
+            [v for v in catalog.voices if (locale is None or v.locale == locale) and (gender is None or v.gender == gender)]
+
+    def lookup() -> None:
+        for locale, gender in combos:
+            catalog.filter(locale, gender)
+
+    scan_us = _best_of(scan, 5) / len(combos) * 1e6
+    lookup_us = _best_of(lookup, 5) / len(combos) * 1e6
+    print(f"  filter: {lookup_us:.2f} us indexed, {scan_us:.1f} us scanning {count} voices")
+
+
+def _best_of(func: Callable[[], object], repeat: int) -> float:
+    """ Shortest of `repeat` timed calls, in seconds (the least noisy estimate)."""
+    times = []
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def _add_result(results: SuiteResults, name: str, value: float, unit: str, better: str = "lower") -> None:
+    results[name] = {"value": value, "unit": unit, "better": better}
+    print(f"  {name:<28} {value:12.4f} {unit}")
+
+
+def suite_extract(page_counts: List[int], repeat: int, results: SuiteResults) -> None:
+    """ extract_text_from_pdf on generated PDFs, without the text cache."""
+    set_text_cache(enabled=False)
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for page_count in page_counts:
+                pdf_path = os.path.join(tmp_dir, f"sample{page_count}.pdf")
+                write_sample_pdf(pdf_path, page_count)
+                # One run of the largest documents is enough
+                runs = repeat if page_count <= 100 else 1
+                seconds = _best_of(
+                    lambda: extract_text_from_pdf(pdf_path, workers=None, skip_boilerplate=False), runs
+                )
+                _add_result(results, f"extract_{page_count}_pages", seconds, "s")
+    finally:
+        set_text_cache()
+
+
+def suite_clean(megabytes: float, repeat: int, results: SuiteResults) -> None:
+    """ clean_text on a multi-megabyte document."""
+    text = sample_raw_text(megabytes)
+    seconds = _best_of(lambda: clean_text(text), repeat)
+    _add_result(results, f"clean_text_{megabytes:g}mb", seconds, "s")
+    _add_result(results, "clean_text_throughput", megabytes / seconds, "MB/s", "higher")
+
+
+def suite_synthesis(paragraphs: int, latency: float, bandwidth_kb: float, results: SuiteResults) -> None:
+    """
+    End-to-end text_to_speech against the fake service (speaking at a
+    realistic rate, so audio sizes are realistic too), and the time until
+    stream_speech yields its first segment.
+    """
+    fake = make_fake_communicate(
+        latency=latency, chars_per_second=15.0, bytes_per_second=bandwidth_kb * 1024
+    )
+    set_communicate_factory(fake)
+    set_synthesis_cache(enabled=False)
+    text = "\n\n".join(sample_document(paragraphs))
+    try:
+        set_scheduler(None)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            out_path = os.path.join(tmp_dir, "out.mp3")
+            start = time.perf_counter()
+            text_to_speech(text, out_path, resume=False)
+            seconds = time.perf_counter() - start
+            audio_bytes = os.path.getsize(out_path)
+        _add_result(results, "tts_seconds", seconds, "s")
+        _add_result(results, "tts_throughput", len(text) / seconds, "chars/s", "higher")
+        _add_result(results, "tts_download_rate", audio_bytes / 1024 / seconds, "KB/s", "higher")
+
+        set_scheduler(None)
+        start = time.perf_counter()
+        segments = stream_speech(text)
+        next(segments)
+        _add_result(results, "time_to_first_audio", time.perf_counter() - start, "s")
+        segments.close()
+    finally:
+        set_scheduler(None)
+        set_communicate_factory(None)
+        set_synthesis_cache()
+
+
+def run_suite(
+    page_counts: List[int],
+    clean_mb: float,
+    paragraphs: int,
+    latency: float,
+    bandwidth_kb: float,
+    repeat: int = 3,
+) -> Dict[str, object]:
+    """ Runs every suite benchmark and returns the results with the settings and machine used."""
+    results: SuiteResults = {}
+    print(f"PDF extraction ({os.cpu_count()} CPU cores)")
+    suite_extract(page_counts, repeat, results)
+    print("Text cleaning")
+    suite_clean(clean_mb, repeat, results)
+    print(f"Synthesis, {paragraphs} paragraphs, {latency * 1000:.0f} ms latency, {bandwidth_kb:g} KB/s")
+    suite_synthesis(paragraphs, latency, bandwidth_kb, results)
+    return {
+        "version": BASELINE_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "settings": {
+            "clean_mb": clean_mb,
+            "paragraphs": paragraphs,
+            "latency": latency,
+            "bandwidth_kb": bandwidth_kb,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def save_baseline(report: Dict[str, object], path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+    print(f"Saved to {path}")
+
+
+def load_baseline(path: str) -> Dict[str, object]:
+    with open(path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    if report.get("version") != BASELINE_VERSION:
+        raise ValueError(f"{path}: unsupported baseline version {report.get('version')!r}")
+    return report
+
+
+def compare_reports(
+    baseline: Dict[str, object], current: Dict[str, object], tolerance: float = REGRESSION_TOLERANCE
+) -> List[str]:
+    """
+    Prints each result next to its baseline and returns the names of the
+    results that got worse by more than `tolerance` (0.15 = 15%).
+    Results that only one of the reports has are listed but not compared.
+    """
+    for key in ("machine", "settings"):
+        if baseline.get(key) != current.get(key):
+            print(f"Warning: {key} differ from the baseline: {baseline.get(key)} vs {current.get(key)}")
+
+    old, new = baseline["results"], current["results"]
+    regressions = []
+    print(f"\n  {'benchmark':<28} {'baseline':>12} {'current':>12}  change")
+    for name in sorted(set(old) | set(new)):
+        if name not in old or name not in new:
+            print(f"  {name:<28} {'only in ' + ('current' if name in new else 'baseline'):>26}")
+            continue
+        before, after = old[name]["value"], new[name]["value"]
+        change = (after - before) / before if before else 0.0
+        # Positive means worse, whichever direction is better
+        worse = change if new[name]["better"] == "lower" else -change
+        flag = "REGRESSION" if worse > tolerance else ("improved" if worse < -tolerance else "")
+        if flag == "REGRESSION":
+            regressions.append(name)
+        print(f"  {name:<28} {before:12.4f} {after:12.4f}  {change:+7.1%} {flag}")
+
+    print(f"\n{len(regressions)} regression(s) beyond {tolerance:.0%}" if regressions else "\nOK")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="PDF to Speech benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    extract = commands.add_parser("extract", help="PDF extraction scaling with worker processes")
+    extract.add_argument("--pages", type=int, default=300)
+    extract.add_argument("--workers", type=int, nargs="+", help="worker counts to compare")
+    extract.add_argument("--backend", choices=sorted(BACKENDS), default="pdfplumber")
+
+    backends = commands.add_parser("backends", help="compare PDF extraction backends")
+    backends.add_argument("--pages", type=int, default=100)
+    backends.add_argument("--pdf", help="use this PDF instead of a generated one")
+
+    startup = commands.add_parser("startup", help="fail if cold start goes over budget")
+    startup.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    startup.add_argument("--runs", type=int, default=5)
+
+    resynth = commands.add_parser("resynth", help="regeneration time after small and large edits")
+    resynth.add_argument("--paragraphs", type=int, default=300)
+    resynth.add_argument("--latency", type=float, default=0.2, help="fake service latency in seconds")
+
+    throttle = commands.add_parser("throttle", help="retries and adaptive concurrency against a failing fake service")
+    throttle.add_argument("--paragraphs", type=int, default=300)
+    throttle.add_argument("--max-concurrent", type=int, default=6, help="requests the fake service accepts at once")
+    throttle.add_argument("--failure-rate", type=float, default=0.03)
+    throttle.add_argument("--stall-rate", type=float, default=0.01)
+
+    normalize = commands.add_parser("normalize", help="text normalizer speed and memory")
+    normalize.add_argument("--megabytes", type=float, default=SUITE_CLEAN_MB)
+
+    txt = commands.add_parser("txt", help="large TXT reader speed and memory")
+    txt.add_argument("--megabytes", type=float, default=SUITE_CLEAN_MB)
+
+    boiler = commands.add_parser("boilerplate", help="header/footer detection speed and synthesis time saved")
+    boiler.add_argument("--pages", type=int, default=200)
+
+    voices = commands.add_parser("voices", help="voice catalog load time and filter speed")
+    voices.add_argument("--count", type=int, default=400, help="voices returned by the stubbed service")
+
+    suite = commands.add_parser("suite", help="all core benchmarks, saved as or compared to a JSON baseline")
+    suite.add_argument("--pages", type=int, nargs="+", default=list(SUITE_PAGE_COUNTS), help="PDF sizes")
+    suite.add_argument("--clean-mb", type=float, default=SUITE_CLEAN_MB, help="size of the text to clean")
+    suite.add_argument("--paragraphs", type=int, default=SUITE_PARAGRAPHS, help="size of the text to synthesize")
+    suite.add_argument("--latency", type=float, default=SUITE_LATENCY, help="fake service latency in seconds")
+    suite.add_argument("--bandwidth", type=float, default=SUITE_BANDWIDTH_KB, help="fake service KB/s")
+    suite.add_argument("--repeat", type=int, default=3, help="runs per benchmark; the fastest counts")
+    suite.add_argument("--save", metavar="PATH", help="write the results to a JSON baseline")
+    suite.add_argument("--compare", metavar="PATH", help="compare with a baseline; exit 1 on regressions")
+    suite.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+
+    compare = commands.add_parser("compare", help="compare two saved suite results")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+
+    args = parser.parse_args()
+    if args.command == "extract":
+        cores = os.cpu_count() or 1
+        worker_counts = args.workers or sorted({1, 2, 4, cores} & set(range(1, cores + 1)))
+        bench_extract(args.pages, worker_counts, args.backend)
+    elif args.command == "backends":
+        bench_backends(args.pages, args.pdf)
+    elif args.command == "startup":
+        sys.exit(0 if bench_startup(args.budget_ms, args.runs) else 1)
+    elif args.command == "resynth":
+        bench_resynth(args.paragraphs, args.latency)
+    elif args.command == "throttle":
+        bench_throttle(args.paragraphs, args.max_concurrent, args.failure_rate, args.stall_rate)
+    elif args.command == "normalize":
+        bench_normalize(args.megabytes)
+    elif args.command == "txt":
+        bench_txt(args.megabytes)
+    elif args.command == "boilerplate":
+        bench_boilerplate(args.pages)
+    elif args.command == "voices":
+        bench_voices(args.count)
+    elif args.command == "suite":
+        # Read the baseline first, so a bad path fails before the long run
+        baseline = load_baseline(args.compare) if args.compare else None
+        report = run_suite(
+            args.pages, args.clean_mb, args.paragraphs, args.latency, args.bandwidth, args.repeat
+        )
+        if args.save:
+            save_baseline(report, args.save)
+        if baseline is not None:
+            sys.exit(1 if compare_reports(baseline, report, args.tolerance) else 0)
+    elif args.command == "compare":
+        regressions = compare_reports(load_baseline(args.baseline), load_baseline(args.current), args.tolerance)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Detection of running headers, footers, page numbers and repeated
+boilerplate in extracted PDF pages, so they are not read aloud.
+
+Lines are compared after normalization (lower case, whitespace collapsed,
+and in headers and footers every number replaced by "#", so "Page 3 of 40"
+matches "Page 4 of 40"). A line is boilerplate if it is on at least
+MIN_REPEATS pages and on at least REPEAT_RATIO of the pages indexed so far:
+
+    - among the first or last EDGE_LINES lines of a page with more than
+      2 * EDGE_LINES lines (running headers, footers and page numbers;
+      on shorter pages every line would count as one), or
+    - anywhere on the page, if it has at least MIN_BODY_LINE_CHARS
+      characters (copyright and confidentiality notices).
+
+The frequency index is built in the same pass that filters the pages:
+strip_boilerplate() holds back the first pages until it has seen enough
+of the document, then filters every later page as it arrives.
+"""
+
+import os
+import re
+from collections import Counter
+from typing import Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+import metrics
+
+# Lines at the top and bottom of a page that may be headers or footers
+EDGE_LINES = 3
+
+# A line must repeat on at least this many pages, and on at least this
+# share of the pages, to be removed. Books alternate two running headers,
+# so each of them is on about half of the pages.
+MIN_REPEATS = 3
+REPEAT_RATIO = 0.4
+
+# Lines inside the page only count as boilerplate if they are this long;
+# short lines (headings, "Yes.", ...) repeat naturally
+MIN_BODY_LINE_CHARS = 40
+
+# Pages held back to build the index before filtering starts
+WARMUP_PAGES = 16
+
+# Rough speed of the speech service for one request, used to estimate the
+# synthesis time saved
+SYNTHESIS_CHARS_PER_SECOND = 500.0
+
+_DIGITS = re.compile(r"\d+")
+_WHITESPACE = re.compile(r"\s+")
+
+# Set PDF_TTS_KEEP_BOILERPLATE=1 to read every line
+_enabled = os.environ.get("PDF_TTS_KEEP_BOILERPLATE", "") in ("", "0")
+
+# A page: PageText or any NamedTuple with a text field
+Page = TypeVar("Page")
+# (zone, normalized line); zone is "head", "foot" or "body"
+LineKey = Tuple[str, str]
+
+
+def set_boilerplate_stripping(enabled: bool = True) -> None:
+    """ Turns stripping of headers, footers and boilerplate on or off."""
+    global _enabled
+    _enabled = enabled
+
+
+def boilerplate_stripping_enabled() -> bool:
+    return _enabled
+
+
+def normalize_line(line: str, numbers: bool = True) -> str:
+    """ The form lines are compared in; numbers become "#" unless numbers is False."""
+    line = _WHITESPACE.sub(" ", line.strip().lower())
+    return _DIGITS.sub("#", line) if numbers else line
+
+
+class BoilerplateReport:
+    """ What strip_boilerplate removed; filled in as the pages go through."""
+
+    def __init__(self) -> None:
+        self.pages = 0
+        self.lines_removed = 0
+        self.chars_removed = 0
+        self.chars_total = 0
+
+    @property
+    def estimated_seconds_saved(self) -> float:
+        """ Estimated synthesis time of the removed text."""
+        return self.chars_removed / SYNTHESIS_CHARS_PER_SECOND
+
+    def summary(self) -> str:
+        share = self.chars_removed / self.chars_total if self.chars_total else 0.0
+        return (
+            f"skipped {self.lines_removed} header/footer lines, {self.chars_removed:,} characters "
+            f"({share:.1%}), about {self.estimated_seconds_saved:.0f} s of synthesis"
+        )
+
+
+class BoilerplateIndex:
+    """ The number of pages each line key was found on, over the pages added so far."""
+
+    def __init__(self) -> None:
+        self.counts: Counter = Counter()
+        self.pages = 0
+
+    @staticmethod
+    def line_keys(lines: List[str]) -> List[List[LineKey]]:
+        """ The keys under which each line is counted (none for blank lines)."""
+        content = [i for i, line in enumerate(lines) if line.strip()]
+        keys: List[List[LineKey]] = [[] for _ in lines]
+        # On short pages the edges are the whole page
+        has_edges = len(content) > 2 * EDGE_LINES
+        for rank, i in enumerate(content):
+            if has_edges and (rank < EDGE_LINES or rank >= len(content) - EDGE_LINES):
+                edge = normalize_line(lines[i])
+                if rank < EDGE_LINES:
+                    keys[i].append(("head", edge))
+                if rank >= len(content) - EDGE_LINES:
+                    keys[i].append(("foot", edge))
+            # Body text keeps its numbers: "Page 3, line 5" is not a notice
+            body = normalize_line(lines[i], numbers=False)
+            if len(body) >= MIN_BODY_LINE_CHARS:
+                keys[i].append(("body", body))
+        return keys
+
+    def add(self, keys: List[List[LineKey]]) -> None:
+        """ Counts the keys of one page (each key once per page)."""
+        self.pages += 1
+        self.counts.update({key for line_keys in keys for key in line_keys})
+
+    def is_boilerplate(self, key: LineKey) -> bool:
+        count = self.counts[key]
+        return count >= MIN_REPEATS and count >= REPEAT_RATIO * self.pages
+
+
+def _strip_page(
+    index: BoilerplateIndex,
+    page: Page,
+    lines: List[str],
+    keys: List[List[LineKey]],
+    report: Optional[BoilerplateReport],
+) -> Page:
+    kept = []
+    removed_lines = removed_chars = 0
+    for line, line_keys in zip(lines, keys):
+        if any(index.is_boilerplate(key) for key in line_keys):
+            removed_lines += 1
+            removed_chars += len(line.strip())
+        else:
+            kept.append(line)
+
+    metrics.increment("boilerplate_lines_removed", removed_lines)
+    metrics.increment("boilerplate_chars_removed", removed_chars)
+    if report is not None:
+        report.pages += 1
+        report.lines_removed += removed_lines
+        report.chars_removed += removed_chars
+        report.chars_total += len(page.text)
+    if not removed_lines:
+        return page
+    return page._replace(text="\n".join(kept))
+
+
+def strip_boilerplate(
+    pages: Iterable[Page],
+    report: Optional[BoilerplateReport] = None,
+    warmup_pages: Optional[int] = WARMUP_PAGES,
+) -> Iterator[Page]:
+    """
+    Yields the pages (PageText) with their headers, footers, page numbers
+    and repeated notices removed. Every page is added to the frequency
+    index before it is filtered; the first warmup_pages pages are held
+    back until the index has seen all of them (None holds back every page,
+    so the whole document is indexed first). Documents with fewer than
+    MIN_REPEATS pages come through unchanged. If a report is given, the
+    removed lines and characters are added to it.
+    """
+    index = BoilerplateIndex()
+    held: List[Tuple[Page, List[str], List[List[LineKey]]]] = []
+    for page in pages:
+        lines = page.text.split("\n")
+        keys = index.line_keys(lines)
+        index.add(keys)
+        held.append((page, lines, keys))
+        if warmup_pages is None or index.pages < warmup_pages:
+            continue
+        for item in held:
+            yield _strip_page(index, *item, report)
+        held.clear()
+
+    for item in held:
+        yield _strip_page(index, *item, report)
@@ -0,0 +1,351 @@
+"""
+Persistent on-disk caches.
+DiskCache stores byte blobs under content-addressed keys with a total size
+budget; the least recently used entries are removed when it is exceeded.
+Writes are atomic (temp file + rename), so several processes can share
+the same cache directory safely.
+"""
+
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils import get_cache_dir
+
+DEFAULT_AUDIO_CACHE_BYTES = 500 * 1024 * 1024
+DEFAULT_TEXT_CACHE_BYTES = 200 * 1024 * 1024
+DEFAULT_TIMING_CACHE_BYTES = 50 * 1024 * 1024
+
+# Temp files older than this were left behind by a crashed writer
+_STALE_TEMP_SECONDS = 3600
+
+# Content hashes of PDF files remembered by a PageTextCache
+_MAX_MEMO_HASHES = 1024
+
+
+class DiskCache:
+    """
+    A size-bounded LRU cache of byte blobs stored as files.
+    Recency is tracked with file modification times, which every process
+    sharing the directory can see.
+    """
+
+    suffix = ".bin"
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Approximate size of the cache; None until the directory is scanned
+        self._total_bytes: Optional[int] = None
+
+    def _path(self, key: str) -> str:
+        # Two-character sub-directories keep each directory small
+        return os.path.join(self.directory, key[:2], key + self.suffix)
+
+    def open(self, key: str) -> Optional[BinaryIO]:
+        """
+        Opens the entry for key for reading and counts a hit, or counts a
+        miss and returns None. The caller must close the file.
+        """
+        path = self._path(key)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            # Missing, or evicted by another process
+            f = None
+        else:
+            try:
+                # Mark as recently used; through the open file where possible,
+                # as the entry may be evicted by another process meanwhile
+                os.utime(f.fileno() if os.utime in os.supports_fd else path)
+            except OSError:
+                # Evicted after all (the open file can still be read), or
+                # a cache directory we may read but not write
+                pass
+
+        with self._lock:
+            if f is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return f
+
+    def get(self, key: str) -> Optional[bytes]:
+        """ Returns the cached bytes for key, or None on a miss."""
+        f = self.open(key)
+        if f is None:
+            return None
+        with f:
+            return f.read()
+
+    @contextmanager
+    def writer(self, key: str) -> Iterator[BinaryIO]:
+        """
+        Context manager giving a file to write the entry for key into.
+        The entry only appears once the block finishes without an error.
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temp file in the same directory, then rename it into
+        # place so readers never see a partially written entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                yield f
+                size = f.tell()
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += size
+            over_budget = self._total_bytes is None or self._total_bytes > self.max_bytes
+        if over_budget:
+            self.evict()
+
+    def put(self, key: str, data: bytes) -> None:
+        """ Stores data under key, evicting old entries if over budget."""
+        with self.writer(key) as f:
+            f.write(data)
+
+    def evict(self) -> int:
+        """
+        Removes least recently used entries until the cache fits its budget.
+        Returns the number of bytes removed.
+        """
+        entries = []
+        total = 0
+        now = time.time()
+        for dir_path, _, file_names in os.walk(self.directory):
+            for name in file_names:
+                path = os.path.join(dir_path, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if name.endswith(".tmp"):
+                    if now - st.st_mtime > _STALE_TEMP_SECONDS:
+                        self._remove(path)
+                    continue
+                if name.endswith(self.suffix):
+                    entries.append((st.st_mtime, st.st_size, path))
+                    total += st.st_size
+
+        removed = 0
+        if total > self.max_bytes:
+            # Oldest first
+            entries.sort()
+            for _, size, path in entries:
+                if total - removed <= self.max_bytes:
+                    break
+                if self._remove(path):
+                    removed += size
+
+        with self._lock:
+            self._total_bytes = total - removed
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            # Already removed by another process, or in use (Windows)
+            return False
+
+    def clear(self) -> None:
+        """ Removes every entry from the cache."""
+        max_bytes = self.max_bytes
+        self.max_bytes = 0
+        try:
+            self.evict()
+        finally:
+            self.max_bytes = max_bytes
+
+    def stats(self) -> Dict[str, int]:
+        """ Returns hit/miss counters and the approximate size in bytes."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bytes": self._total_bytes or 0,
+                "max_bytes": self.max_bytes,
+            }
+
+
+class SynthesisCache(DiskCache):
+    """
+    Cache of synthesized MP3 segments, keyed by a hash of the cleaned
+    chunk text, the voice and the engine version.
+    """
+
+    suffix = ".mp3"
+
+    def __init__(
+        self, directory: Optional[str] = None, max_bytes: int = DEFAULT_AUDIO_CACHE_BYTES
+    ) -> None:
+        super().__init__(directory or get_cache_dir("audio"), max_bytes)
+        # Word timings of each chunk, stored under the same key
+        self.timings = WordTimingCache(self.directory)
+
+    @staticmethod
+    def make_key(text: str, voice: str, engine_version: str) -> str:
+        """ Content-addressed key for one synthesized chunk."""
+        digest = hashlib.sha256()
+        for part in (engine_version, voice, text):
+            digest.update(part.encode("utf-8"))
+            # Separator so ("ab", "c") and ("a", "bc") hash differently
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+
+class WordTimingCache(DiskCache):
+    """
+    Word boundaries (see word_timing.pack_boundaries) of synthesized chunks,
+    next to the audio in the synthesis cache directory and under the same keys.
+    """
+
+    suffix = ".words"
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_TIMING_CACHE_BYTES) -> None:
+        super().__init__(directory, max_bytes)
+
+
+class PageTextCache(DiskCache):
+    """
+    Cache of extracted PDF text, keyed by a fingerprint of the PDF file.
+    Each entry stores the text of every page in a compact indexed format:
+
+        b"PTC1" | page texts (UTF-8, back to back) | index | footer
+
+    The index holds (page number, offset, length) for each page and the
+    footer holds the page count and the index position, so any page range
+    can be read without loading the rest of the document.
+    """
+
+    suffix = ".pages"
+
+    MAGIC = b"PTC1"
+    # page_count, index_offset
+    _FOOTER = struct.Struct("<IQ")
+
+    def __init__(
+        self, directory: Optional[str] = None, max_bytes: int = DEFAULT_TEXT_CACHE_BYTES
+    ) -> None:
+        super().__init__(directory or get_cache_dir("text"), max_bytes)
+        # (path, size, mtime) -> content hash, so unchanged files are only
+        # hashed once; holds the last _MAX_MEMO_HASHES files
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+
+    def make_key(self, path: str, backend: str) -> str:
+        """
+        Fingerprint of a PDF file: its size, modification time and a hash
+        of its contents. Any change to the file gives a new key, so stale
+        text is never returned; old entries are eventually evicted.
+        """
+        st = os.stat(path)
+        memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+        content_hash = self._hashes.get(memo_key)
+        if content_hash is None:
+            digest = hashlib.blake2b(digest_size=20)
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+            content_hash = digest.hexdigest()
+            with self._lock:
+                if len(self._hashes) >= _MAX_MEMO_HASHES:
+                    # Forget the oldest file
+                    self._hashes.pop(next(iter(self._hashes)))
+                self._hashes[memo_key] = content_hash
+
+        fingerprint = f"{st.st_size}\0{st.st_mtime_ns}\0{content_hash}\0{backend}"
+        return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+
+    def store(self, key: str, pages: Iterable[Tuple[int, str]]) -> Iterator[Tuple[int, str]]:
+        """
+        Writes (page number, text) pairs, such as pdf_processor.PageText,
+        to the cache while passing them through unchanged.
+        The entry is only saved if the iterator is consumed to the end.
+        """
+        numbers = array("I")
+        offsets = array("Q")
+        lengths = array("I")
+        with self.writer(key) as f:
+            f.write(self.MAGIC)
+            for page in pages:
+                number, text = page
+                data = text.encode("utf-8")
+                numbers.append(number)
+                offsets.append(f.tell())
+                lengths.append(len(data))
+                f.write(data)
+                yield page
+
+            index_offset = f.tell()
+            for column in (numbers, offsets, lengths):
+                f.write(column.tobytes())
+            f.write(self._FOOTER.pack(len(numbers), index_offset))
+            f.write(self.MAGIC)
+
+    def load(
+        self, key: str, pages: Optional[Iterable[int]] = None
+    ) -> Optional[List[Tuple[int, str]]]:
+        """
+        Returns the cached (page number, text) pairs (all pages, or only the
+        given 1-based page numbers), or None if the document is not cached
+        or its entry is truncated or corrupted (it is then overwritten by
+        the next store()).
+        """
+        f = self.open(key)
+        if f is None:
+            return None
+
+        try:
+            with f:
+                footer_offset = f.seek(0, os.SEEK_END) - self._FOOTER.size - len(self.MAGIC)
+                if footer_offset < len(self.MAGIC):
+                    return None
+                f.seek(footer_offset)
+                page_count, index_offset = self._FOOTER.unpack(f.read(self._FOOTER.size))
+                if f.read(len(self.MAGIC)) != self.MAGIC:
+                    return None
+                # (page number, offset, length) take 16 bytes per page
+                if index_offset < len(self.MAGIC) or index_offset + page_count * 16 > footer_offset:
+                    return None
+
+                f.seek(index_offset)
+                columns = []
+                for typecode in ("I", "Q", "I"):
+                    column = array(typecode)
+                    column.frombytes(f.read(column.itemsize * page_count))
+                    columns.append(column)
+                numbers, offsets, lengths = columns
+
+                wanted = set(pages) if pages is not None else None
+                result = []
+                for number, offset, length in zip(numbers, offsets, lengths):
+                    if wanted is not None and number not in wanted:
+                        continue
+                    if offset + length > index_offset:
+                        return None
+                    f.seek(offset)
+                    result.append((number, f.read(length).decode("utf-8")))
+                return result
+        except (OSError, ValueError, struct.error, UnicodeDecodeError):
+            return None
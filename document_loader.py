@@ -0,0 +1,106 @@
+"""
+Background loading of documents for the GUI.
+DocumentLoader reads a PDF page by page (or a TXT file in pages of whole
+lines, see iter_txt_pages) on its own thread. The GUI takes the loaded
+text with take_text() from a timer on the Tk main thread, so the window
+stays responsive, progress is known after every page and loading can be
+cancelled at any time.
+"""
+
+import queue
+import threading
+from pathlib import Path
+from typing import Optional
+
+import metrics
+from boilerplate import BoilerplateReport, strip_boilerplate
+from pdf_processor import get_document_page_count, iter_document_pages
+
+
+class DocumentLoader:
+    """
+    Loads one document in the background. Progress is `done` out of
+    `total` pages (blocks for a TXT file; total is 0 until known). The
+    pieces returned by take_text() join up to the same text as
+    extract_text_from_pdf() or extract_text_from_txt(), apart from their
+    final strip (and, in long PDFs, boilerplate that only became frequent
+    after the first pages were shown).
+    """
+
+    def __init__(self, path: str, skip_boilerplate: bool = False) -> None:
+        self.path = path
+        self.is_pdf = Path(path).suffix.lower() == ".pdf"
+        # With skip_boilerplate, headers, footers and repeated notices of
+        # PDFs are left out (see boilerplate.py); `boilerplate` reports
+        # what was removed
+        self.skip_boilerplate = skip_boilerplate and self.is_pdf
+        self.boilerplate = BoilerplateReport()
+        self.done = 0
+        self.total = 0
+        self.error: Optional[Exception] = None
+        self.finished = False
+        self._texts: "queue.Queue[str]" = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def cancel(self) -> None:
+        """ Stops loading after the current page; text loaded so far can still be taken."""
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def has_text(self) -> bool:
+        """ True if there is loaded text that was not taken yet."""
+        return not self._texts.empty()
+
+    def take_text(self, max_chars: int) -> str:
+        """
+        Returns the loaded text that was not taken yet, in whole pages
+        or blocks, stopping once max_chars is reached.
+        """
+        parts = []
+        size = 0
+        while size < max_chars:
+            try:
+                text = self._texts.get_nowait()
+            except queue.Empty:
+                break
+            parts.append(text)
+            size += len(text)
+        return "".join(parts)
+
+    def _run(self) -> None:
+        try:
+            with metrics.stage("file_load"):
+                self._load_pages()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished = True
+
+    def _load_pages(self) -> None:
+        self.total = get_document_page_count(self.path)
+        # Large PDFs are extracted using all CPU cores
+        page_iter = iter_document_pages(self.path, workers=None)
+        pages = page_iter
+        if self.skip_boilerplate:
+            # The first pages appear together, once they have been indexed
+            pages = strip_boilerplate(page_iter, self.boilerplate)
+        try:
+            separator = ""
+            for page in pages:
+                if self._cancel.is_set():
+                    break
+                if page.text:
+                    # Pages are joined with a newline, like extract_text_from_pdf
+                    self._texts.put(separator + page.text)
+                    separator = "\n"
+                self.done = page.number
+        finally:
+            # Stops worker processes that are still extracting
+            page_iter.close()
@@ -0,0 +1,167 @@
+"""
+A local stand-in for edge_tts.Communicate.
+Produces silent MP3 audio of a realistic length after a configurable delay
+and at a configurable download rate, so synthesis throughput can be
+measured without a network connection.
+It can also inject failures, stalls and throttling to exercise retries
+and the adaptive concurrency limit in tts_engine. FakeVoiceList stands in
+for edge_tts.list_voices in the same way.
+
+Usage:
+    from tts_engine import set_communicate_factory
+    from fake_tts import FakeCommunicate
+    set_communicate_factory(FakeCommunicate)
+"""
+
+import asyncio
+import random
+import re
+
+# One silent MPEG-2 Layer III frame: 24 kHz, 48 kbit/s, mono
+# (the same format edge-tts returns). Each frame holds 576 samples = 24 ms.
+FRAME_HEADER = b"\xff\xf3\x64\xc4"
+FRAME_SIZE = 144
+FRAME_SECONDS = 576 / 24000
+SILENT_FRAME = FRAME_HEADER + bytes(FRAME_SIZE - len(FRAME_HEADER))
+
+
+class FakeServiceError(Exception):
+    """ An injected failure (like a dropped connection or a throttled request)."""
+
+
+class FakeCommunicate:
+    """
+    Mimics the parts of edge_tts.Communicate used by tts_engine.
+    Class attributes can be changed to simulate a slower or faster service.
+    """
+
+    # Seconds to wait before the first audio is returned
+    latency = 0.2
+    # Speaking rate used to decide how much audio to produce
+    chars_per_second = 15.0
+    # Number of frames sent per audio message
+    frames_per_message = 40
+    # Download rate of the audio in bytes/second; None means unlimited
+    bytes_per_second = None
+    # Extra random delay of up to this many seconds per request
+    latency_jitter = 0.0
+    # Probability that a request fails after its latency
+    failure_rate = 0.0
+    # Probability that a request never answers (to trigger timeouts)
+    stall_rate = 0.0
+    # Requests beyond this many at once are rejected, like a throttling
+    # service would; None means no limit
+    max_concurrent = None
+    # Requests currently streaming, and the most seen at once
+    active = 0
+    peak_active = 0
+    rng = random.Random(0)
+
+    def __init__(
+        self, text: str, voice: str = "", boundary: str = "SentenceBoundary", **kwargs
+    ) -> None:
+        self.text = text
+        self.voice = voice
+        self.boundary = boundary
+
+    def audio_seconds(self) -> float:
+        """ Length of the audio this text would produce."""
+        return len(self.text) / self.chars_per_second
+
+    async def stream(self):
+        cls = type(self)
+        cls.active += 1
+        cls.peak_active = max(cls.peak_active, cls.active)
+        try:
+            throttled = self.max_concurrent is not None and cls.active > self.max_concurrent
+            await asyncio.sleep(self.latency + self.rng.uniform(0, self.latency_jitter))
+            if self.rng.random() < self.stall_rate:
+                await asyncio.sleep(3600)
+            if throttled:
+                raise FakeServiceError("Too many requests")
+            if self.rng.random() < self.failure_rate:
+                raise FakeServiceError("Connection reset")
+        finally:
+            cls.active -= 1
+
+        frames = max(1, int(self.audio_seconds() / FRAME_SECONDS))
+        while frames > 0:
+            count = min(frames, self.frames_per_message)
+            data = SILENT_FRAME * count
+            # Let other workers run between messages
+            await asyncio.sleep(len(data) / self.bytes_per_second if self.bytes_per_second else 0)
+            yield {"type": "audio", "data": data}
+            frames -= count
+
+        if self.boundary == "WordBoundary":
+            for message in self.word_boundaries():
+                yield message
+
+    def word_boundaries(self):
+        """
+        WordBoundary messages as edge-tts sends them (offsets in 100 ns
+        ticks, words without surrounding punctuation), timed as if the
+        text were spoken at chars_per_second.
+        """
+        ticks_per_char = 10_000_000 / self.chars_per_second
+        for match in re.finditer(r"\w+(?:['’-]\w+)*", self.text):
+            yield {
+                "type": "WordBoundary",
+                "offset": int(match.start() * ticks_per_char),
+                "duration": int(len(match.group()) * ticks_per_char),
+                "text": match.group(),
+            }
+
+    async def save(self, audio_fname: str) -> None:
+        with open(audio_fname, "wb") as audio:
+            async for message in self.stream():
+                if message["type"] == "audio":
+                    audio.write(message["data"])
+
+
+def make_fake_communicate(latency: float = 0.2, chars_per_second: float = 15.0, **settings):
+    """
+    Returns a FakeCommunicate subclass with the given settings; any other
+    class attribute (failure_rate, max_concurrent, ...) can be passed too.
+    """
+    unknown = set(settings) - set(vars(FakeCommunicate))
+    if unknown:
+        raise TypeError(f"Unknown FakeCommunicate settings: {', '.join(sorted(unknown))}")
+    return type(
+        "FakeCommunicate",
+        (FakeCommunicate,),
+        {"latency": latency, "chars_per_second": chars_per_second, **settings},
+    )
+
+
+
+class FakeVoiceList:
+    """
+    A stand-in for edge_tts.list_voices (see voices.set_voice_fetcher).
+    Calling it returns a coroutine that answers with entries shaped like
+    the service's after `latency` seconds, or raises FakeServiceError if
+    `fail` is set. `calls` counts the requests.
+    """
+
+    def __init__(self, voices=None, latency: float = 0.0, fail: bool = False) -> None:
+        # (ShortName, Locale, Gender) tuples
+        self.voices = list(voices or [("en-GB-RyanNeural", "en-GB", "Male"), ("en-US-JennyNeural", "en-US", "Female")])
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.fail:
+            raise FakeServiceError("Injected voice list failure")
+        return [
+            {
+                "Name": f"Microsoft Server Speech Text to Speech Voice ({locale}, {voice_id})",
+                "ShortName": voice_id,
+                "Gender": gender,
+                "Locale": locale,
+                "Status": "GA",
+            }
+            for voice_id, locale, gender in self.voices
+        ]
@@ -1,5 +1,9 @@
-from tts_engine import text_to_speech, play_audio, start_playback, pause_playback, unpause_playback, stop_playback, is_playing
-import shutil
+from tts_engine import start_playback, pause_playback, unpause_playback, stop_playback
+from tts_engine import DEFAULT_VOICE, stream_speech, play_segments, previous_segment, next_segment, seek_playback, AudioBuffer, SynthesisRun
+from playback import get_controller, PLAYING, FINISHED, STOPPED
+from word_timing import WordTimingIndex, timing_path_for
+import metrics
+import time
 import threading
 from tkinter import (
     Tk, 
@@ -16,23 +20,33 @@ from tkinter import (
     Label,
     StringVar,
     OptionMenu,
+    Frame,
+    Checkbutton,
+    BooleanVar,
     )
 
 from tkinter import ttk # Added for the progress bar
-from pdf_processor import extract_text_from_pdf
-from tts_engine import text_to_speech, play_audio
-from utils import get_unique_audio_path, is_valid_pdf_file
+from document_loader import DocumentLoader
+from boilerplate import boilerplate_stripping_enabled
+from voices import get_voice_catalog
+from utils import is_valid_pdf_file
 from pathlib import Path
 
-VOICE_LABEL_TO_ID = {
-    "Ryan (Uk Male)": "en-GB-RyanNeural",
-    "Jenny (US Female)": "en-US-JennyNeural",
-    "Guy (US Male)": "en-US-GuyNeural",
-    "Libby (UK Female)": "en-GB-LibbyNeural",
-  }
+# Gender filter entry that shows every voice of the locale
+ANY_GENDER = "Any"
 
-# Cretae a list of voice labels for the dropdown menu
-VOICE_LABELS = list(VOICE_LABEL_TO_ID.keys())
+# The spoken-word highlight is refreshed when the next word starts,
+# and at least this often (to follow seeks and newly synthesized audio)
+HIGHLIGHT_MAX_DELAY_MS = 500
+
+# While a document loads, loaded text is added to the text box every
+# LOAD_POLL_MS, at most about LOAD_BATCH_CHARS at a time
+LOAD_POLL_MS = 30
+LOAD_BATCH_CHARS = 64 * 1024
+
+# The voice list is refreshed this long after the window first appears;
+# the refresh loads asyncio and edge_tts, which would slow down startup
+VOICE_REFRESH_DELAY_MS = 3000
 
 class PdfTtsApp:
     def __init__(self, root: Tk) -> None:
@@ -47,6 +61,8 @@ class PdfTtsApp:
         self.text_box = Text(root, wrap="word", yscrollcommand=scrollbar.set)
         self.text_box.pack(side=LEFT, fill=BOTH, expand=True)
         scrollbar.config(command=self.text_box.yview)
+        # Highlight of the word being spoken
+        self.text_box.tag_configure("spoken", background="yellow")
 
         # Buttons
         self.open_btn = Button(root, text="Open File", command=self.open_pdf, width=15)
@@ -62,31 +78,100 @@ class PdfTtsApp:
         self.stop_btn = Button(root, text="Stop", command=self.stop_audio, width=15, state="disabled")
         self.stop_btn.pack(pady=5)    
 
+        # Jump between segments (paragraph-sized chunks) of the current audio
+        self.prev_btn = Button(root, text="<< Previous", command=self.previous_audio_segment, width=15, state="disabled")
+        self.prev_btn.pack(pady=5)
+
+        self.next_btn = Button(root, text="Next >>", command=self.next_audio_segment, width=15, state="disabled")
+        self.next_btn.pack(pady=5)
+
+        self.cursor_btn = Button(root, text="Play from Cursor", command=self.play_from_cursor, width=15)
+        self.cursor_btn.pack(pady=5)
+
         self.save_btn = Button(root, text="Save", command=self.save_audio, width=15, state="disabled")
         self.save_btn.pack(pady=5)
 
         self.play_saved_btn = Button(root, text="Play", command=self.play_saved_audio, width=15)
         self.play_saved_btn.pack(pady=5)
 
+        self.timings_btn = Button(root, text="Timings", command=self.show_timings, width=15)
+        self.timings_btn.pack(pady=5)
+
         # Progress Bar (hidden by default)
         self.progress = ttk.Progressbar(root, mode='indeterminate', length=300)
         self.progress.pack(pady=5)
         self.progress.pack_forget() # Hide the progress bar initially
+
+        # Document loading progress and cancel button (hidden by default)
+        self.load_frame = Frame(root)
+        self.load_progress = ttk.Progressbar(self.load_frame, mode='determinate', length=300)
+        self.load_progress.pack(pady=2)
+        self.cancel_load_btn = Button(self.load_frame, text="Cancel Loading", command=self.cancel_loading, width=15)
+        self.cancel_load_btn.pack(pady=2)
         
-        # Voice Selection Dropdown        
-        self.voice_var = StringVar(value=VOICE_LABELS[0]) # default voice
-        self.voice_menu = OptionMenu(root, self.voice_var, *VOICE_LABELS) # * unpacks the list into individual arguments
-        self.voice_menu.pack(pady=5)
+        # Voice selection: the locale and gender dropdowns filter the voice
+        # dropdown. The catalog loads from disk at once; once the window is
+        # up it is refreshed in the background and the dropdowns are filled
+        # again when that finishes.
+        self.voice_catalog = get_voice_catalog()
+        default_voice = self.voice_catalog.get(DEFAULT_VOICE) or self.voice_catalog.voices[0]
+        self.default_voice = default_voice
+        self.locale_var = StringVar(value=default_voice.locale)
+        self.gender_var = StringVar(value=ANY_GENDER)
+        self.voice_var = StringVar(value=default_voice.label)
+        self.voice_ids = {} # label -> voice id of the voices in voice_menu
+        voice_frame = Frame(root)
+        self.locale_menu = OptionMenu(voice_frame, self.locale_var, default_voice.locale)
+        self.locale_menu.pack(side=LEFT)
+        self.gender_menu = OptionMenu(voice_frame, self.gender_var, ANY_GENDER)
+        self.gender_menu.pack(side=LEFT)
+        self.voice_menu = OptionMenu(voice_frame, self.voice_var, default_voice.label)
+        self.voice_menu.pack(side=LEFT)
+        voice_frame.pack(pady=5)
+        self._update_voice_menus()
+        self.voice_catalog.add_listener(lambda _: self.root.after(0, self._update_voice_menus))
+        self.root.after_idle(lambda: self.root.after(VOICE_REFRESH_DELAY_MS, self.voice_catalog.refresh))
+
+        # Leave out running headers, footers and page numbers of PDFs (applies to the next file opened)
+        self.skip_boilerplate_var = BooleanVar(value=boilerplate_stripping_enabled())
+        self.skip_boilerplate_check = Checkbutton(
+            root, text="Skip Headers/Footers", variable=self.skip_boilerplate_var
+        )
+        self.skip_boilerplate_check.pack(pady=5)
 
         # Status label at the bottom
         self.status_label = Label(root, text="Ready", relief="sunken", anchor="w", padx=5, pady=2)
         self.status_label.pack(side="bottom", fill="x")
 
-        self.audio_path = get_unique_audio_path()
+        self.audio_buffer = None # Audio of the last complete generation (in memory)
+        self.audio_timing = None # Word timings of audio_buffer
+        self.audio_run = None # Chunks of audio_buffer, reused when the edited text is read again
+        self.playing_timing = None # Word timings of the audio being played (None for saved files)
+        self._highlight_job = None
         self.audio_exists = False
         self.is_playing_audio = False # Track if audio is currently playing
         self.is_paused = False # Track if audio is currently paused
 
+        # Stage timings of the last file load and generation (see show_timings);
+        # recorded only when PDF_TTS_METRICS is set, as for batch conversion
+        self.load_timings = []
+        self.run_timings = []
+        self._run_snapshot = None
+        self._run_start = None
+        self.first_audio_seconds = None
+
+        # Document being loaded in the background (see open_pdf)
+        self.loader = None
+        self._load_job = None
+        self._load_snapshot = None
+        self._loaded_any = False
+
+        # The playback controller reports state changes from its own thread;
+        # root.after hands them to the Tk main thread
+        get_controller().add_listener(
+            lambda state: self.root.after(0, self._on_playback_state, state)
+        )
+
 
     def update_status(self, message: str) -> None:
         """
@@ -111,6 +196,38 @@ class PdfTtsApp:
         self.root.after(0, lambda: self.status_label.config(text=message, bg=color, fg="white"))
 
 
+    @staticmethod
+    def _fill_menu(menu: OptionMenu, var: StringVar, options, command=None) -> None:
+        """ Replaces the entries of an OptionMenu; choosing one sets var and calls command."""
+        entries = menu["menu"]
+        entries.delete(0, END)
+        for option in options:
+            def choose(value=option):
+                var.set(value)
+                if command is not None:
+                    command()
+            entries.add_command(label=option, command=choose)
+
+    def _update_voice_menus(self) -> None:
+        """ Fills the voice dropdowns from the catalog for the chosen locale and gender (main thread)."""
+        index = self.voice_catalog.index
+        if self.locale_var.get() not in index.locales:
+            locale = self.default_voice.locale
+            self.locale_var.set(locale if locale in index.locales else index.locales[0])
+        genders = (ANY_GENDER,) + index.genders
+        if self.gender_var.get() not in genders:
+            self.gender_var.set(ANY_GENDER)
+        self._fill_menu(self.locale_menu, self.locale_var, index.locales, self._update_voice_menus)
+        self._fill_menu(self.gender_menu, self.gender_var, genders, self._update_voice_menus)
+
+        gender = None if self.gender_var.get() == ANY_GENDER else self.gender_var.get()
+        voices = index.filter(self.locale_var.get(), gender) or index.filter(self.locale_var.get())
+        self.voice_ids = {voice.label: voice.id for voice in voices}
+        self._fill_menu(self.voice_menu, self.voice_var, list(self.voice_ids))
+        # Keep the chosen voice if it is still listed
+        if self.voice_var.get() not in self.voice_ids and voices:
+            self.voice_var.set(voices[0].label)
+
     def open_pdf(self) -> None:
         path = filedialog.askopenfilename(
             title= "Select File",
@@ -120,51 +237,100 @@ class PdfTtsApp:
         if not path:
             return
 
-        #Update status label
-        self.update_status("Loading file ...")
-
         # Work out the file extension
         file_extension = Path(path).suffix.lower()
+        if file_extension == ".pdf":
+            # Validate that the file is a real PDF
+            if not is_valid_pdf_file(path):
+                messagebox.showwarning("Invalid File", "Please select a valid PDF file.")
+                return
+        elif file_extension != ".txt":
+            messagebox.showwarning("Invalid File", "Please select a valid PDF or Text file.")
+            return
 
-        try:
-            if file_extension == ".pdf":
-                # Validate that the file is a real PDF
-                if not is_valid_pdf_file(path):
-                    messagebox.showwarning("Invalid File", "Please select a valid PDF file.")
-                    return
-
-                text = extract_text_from_pdf(path)
+        # The document is read on a background thread; _poll_loader adds
+        # the text to text_box as it arrives, so Read Aloud can already be
+        # used on the pages loaded so far
+        self.cancel_loading()
+        self.text_box.delete("1.0", END)
+        self.audio_exists = False
+        self.save_btn.config(state="disabled")
 
-            elif file_extension == ".txt":
-                # Read plain text file
-                with open(path, "r", encoding="utf-8") as f:
-                    text = f.read()
+        self._load_snapshot = metrics.snapshot()
+        self._loaded_any = False
+        self.loader = DocumentLoader(path, skip_boilerplate=self.skip_boilerplate_var.get())
+        self.loader.start()
 
-            else:
-                self.update_status("Ready")
-                messagebox.showwarning("Invalid File", "Please select a valid PDF or Text file.")
-                return
+        self.load_progress.config(value=0, maximum=1)
+        self.load_frame.pack(pady=5)
+        self.update_status("Loading file ...")
+        self._load_job = self.root.after(LOAD_POLL_MS, self._poll_loader)
 
-            if not text or not text.strip():
-                self.update_status("Ready")
-                messagebox.showwarining("Invalid File", "No extractable text found in this file." )
-                return
+    def _poll_loader(self) -> None:
+        """ Adds the next batch of loaded text to text_box and updates the progress (main thread)."""
+        self._load_job = None
+        loader = self.loader
+        if loader is None:
+            return
 
-            self.text_box.delete("1.0", END)
+        # Read before taking the text, so no text loaded after it is missed
+        finished = loader.finished
+        text = loader.take_text(LOAD_BATCH_CHARS)
+        if text:
+            # Appending does not move the text being read aloud, so the
+            # word highlighting can carry on
+            modified = self.text_box.edit_modified()
             self.text_box.insert(END, text)
-            self.update_status("Ready")   # Successfully loaded file
-            self.audio_exists = False
-            self.save_btn.config(state="disabled")
-
-
-        except Exception as e:
+            self.text_box.edit_modified(modified)
+            self._loaded_any = self._loaded_any or bool(text.strip())
+
+        if loader.total:
+            self.load_progress.config(maximum=loader.total, value=loader.done)
+            # While reading aloud, the status shows the playback instead
+            if not self.is_playing_audio and loader.is_pdf:
+                self.update_status(f"Loading page {loader.done} of {loader.total} ...")
+            elif not self.is_playing_audio:
+                self.update_status(f"Loading file ... {loader.done * 100 // loader.total}%")
+
+        if finished and not loader.has_text():
+            self._finish_loading()
+        else:
+            self._load_job = self.root.after(LOAD_POLL_MS, self._poll_loader)
+
+    def _finish_loading(self) -> None:
+        """ Hides the loading progress and reports how loading ended."""
+        loader = self.loader
+        self.loader = None
+        if self._load_job is not None:
+            self.root.after_cancel(self._load_job)
+            self._load_job = None
+        self.load_frame.pack_forget()
+
+        if loader.cancelled:
+            self.update_status("Loading cancelled")
+            return
+        if not self.is_playing_audio and loader.boilerplate.lines_removed:
+            self.update_status(f"Ready - {loader.boilerplate.summary()}")
+        elif not self.is_playing_audio:
             self.update_status("Ready")
-            messagebox.showerror("Error", str(e))
+        if loader.error is not None:
+            messagebox.showerror("Error", str(loader.error))
+        elif not self._loaded_any:
+            messagebox.showwarning("Invalid File", "No extractable text found in this file.")
+        else:
+            self.load_timings = metrics.stage_breakdown(self._load_snapshot)
+
+    def cancel_loading(self) -> None:
+        """ Stops loading the current document; the text loaded so far is kept."""
+        if self.loader is not None:
+            self.loader.cancel()
+            self._finish_loading()
 
 
     def read_aloud(self) -> None:
-        text = self.text_box.get("1.0", END).strip()
-        if not text:
+        # The text is passed unstripped, so word timings line up with text_box
+        text = self.text_box.get("1.0", "end-1c")
+        if not text.strip():
             messagebox.showwarning("No Text", "Please load a PDF or type some text first.")
             return
 
@@ -180,6 +346,12 @@ class PdfTtsApp:
         self.open_btn.config(state="disabled")
         self.save_btn.config(state="disabled")
         self.audio_exists = False
+        # Highlighting stops if the text is edited while it is being read
+        self.text_box.edit_modified(False)
+        # Everything recorded from here on belongs to this run
+        self._run_snapshot = metrics.snapshot()
+        self._run_start = time.perf_counter()
+        self.first_audio_seconds = None
 
         thread = threading.Thread(target=self._generate_and_play, args=(text,), daemon=True)
         thread.start()
@@ -189,13 +361,12 @@ class PdfTtsApp:
         Checks if audio exists
         Opens a file dialog to choose where to save the file
         If user cancels, do nothing
-        Copies the temp audio file to the user-specified location
+        Writes the generated audio (held in memory) to the user-specified location
         Shows a success message
         Handles errors and updates status
         Saves the generated audio file to a user-specified location
         """
-        print("DEBUG save_audio: audio_exists =", self.audio_exists, "path =", self.audio_path)
-        if not self.audio_exists or not self.audio_path:
+        if not self.audio_exists or not self.audio_buffer:
             messagebox.showwarning("No Audio", "Please generate audio first by clicking 'Read Aloud'.")
             return
 
@@ -211,8 +382,11 @@ class PdfTtsApp:
             return
 
         try:                  
-            # Copy the temp audio file the user specified location
-            shutil.copy2(self.audio_path, save_path)
+            # Write the audio to the user specified location,
+            # with its word timings next to it
+            self.audio_buffer.save(save_path)
+            if self.audio_timing is not None:
+                self.audio_timing.save(timing_path_for(save_path))
 
             # Show success message
             messagebox.showinfo("Success", f"Audio saved to:\n{save_path}.")
@@ -259,20 +433,15 @@ class PdfTtsApp:
             self.update_status("Playing saved audio ...")
 
             # Start playback (non-blocking)
+            self.playing_timing = None
             start_playback(file_path)
             self.is_playing_audio = True
 
             # Enable playback control buttons
+            # (_on_playback_state disables them when playback ends)
             self.pause_btn.config(state="normal")
             self.stop_btn.config(state="normal")
 
-            # Monitor playback in background
-            threading.Thread(target=self._monitor_playback, daemon=True).start()        
-     
-
-            # Update status: done
-            self.update_status("Ready")
-
         except Exception as e:
             # Show error message
             messagebox.showerror("Playback Error", f"Failed to play audio: {str(e)}")
@@ -285,6 +454,18 @@ class PdfTtsApp:
             self.save_btn.config(state="normal")
             self.play_saved_btn.config(state="normal")
 
+    def show_timings(self) -> None:
+        """ Shows where the time went in the last file load and Read Aloud run."""
+        if not metrics.metrics_enabled():
+            messagebox.showinfo("Timings", "Set PDF_TTS_METRICS=1 before starting the app to record stage timings.")
+            return
+        parts = ["File load:\n" + metrics.format_breakdown(self.load_timings)]
+        run = "Last Read Aloud:\n" + metrics.format_breakdown(self.run_timings)
+        if self.first_audio_seconds is not None:
+            run += f"\n\nTime to first audio: {self.first_audio_seconds * 1000:.0f} ms"
+        parts.append(run)
+        messagebox.showinfo("Timings", "\n\n".join(parts))
+
     def pause_audio(self) -> None:
         """ Pause the current audio playback."""
         if self.is_playing_audio:
@@ -311,61 +492,136 @@ class PdfTtsApp:
             # Disable control buttons
             self.pause_btn.config(state="disabled")
             self.stop_btn.config(state="disabled")
+            self.prev_btn.config(state="disabled")
+            self.next_btn.config(state="disabled")
             # Reset pause button text
             self.pause_btn.config(text="Pause", command=self.pause_audio)       
 
 
-    def _monitor_playback(self) -> None:
-        """ Monitor the current audio playback and update the GUI accordingly."""
-        import time
-        while self.is_playing_audio: # while audio is playing
-            if not self.is_paused: # if audio is not paused
-                if not is_playing:
-                    # audio playback has finished
-                    break
-            time.sleep(0.1)
+    def previous_audio_segment(self) -> None:
+        """ Go back to the start of the current or previous chunk."""
+        previous_segment()
+        self._restart_highlight()
 
-        # playback finished
-        self.is_playing_audio = False
-        self.root.after(0, lambda: self.pause_btn.config(state="disabled"))
-        self.root.after(0, lambda: self.stop_btn.config(state="disabled"))
-        self.root.after(0),lambda: self.pause_btn.config(text="Pause", command=self.pause_audio)        
-        self.root.after(0, lambda: self.update_status("Ready"))
+    def next_audio_segment(self) -> None:
+        """ Skip to the next chunk."""
+        next_segment()
+        self._restart_highlight()
 
+    def play_from_cursor(self) -> None:
+        """
+        Plays the generated audio from the word at the text cursor.
+        The position is looked up in the word timing index; nothing is
+        synthesized again.
+        """
+        if self.playing_timing is None or self.text_box.edit_modified():
+            messagebox.showwarning("No Audio", "Please click 'Read Aloud' to generate audio for this text first.")
+            return
+
+        offset = len(self.text_box.get("1.0", "insert"))
+        seconds = self.playing_timing.time_at(offset)
+        if seconds is None:
+            self.update_status("That part of the text has not been generated yet")
+            return
+        seek_playback(seconds)
+        self._restart_highlight()
+
+    def _restart_highlight(self) -> None:
+        if self._highlight_job is not None:
+            self.root.after_cancel(self._highlight_job)
+        self._highlight_job = self.root.after(0, self._highlight_spoken_word)
+
+    def _highlight_spoken_word(self) -> None:
+        """ Highlights the word being spoken, then reschedules itself for the next word."""
+        self._highlight_job = None
+        self.text_box.tag_remove("spoken", "1.0", END)
+        controller = get_controller()
+        timing = self.playing_timing
+        if timing is None or controller.state != PLAYING or self.text_box.edit_modified():
+            return
+
+        position = controller.position()
+        span = timing.word_at(position)
+        if span is not None:
+            start, end = (f"1.0 + {offset} chars" for offset in span)
+            self.text_box.tag_add("spoken", start, end)
+            self.text_box.see(start)
+
+        next_time = timing.next_word_time(position)
+        delay = HIGHLIGHT_MAX_DELAY_MS
+        if next_time is not None:
+            delay = min(delay, max(10, int((next_time - position) * 1000)))
+        self._highlight_job = self.root.after(delay, self._highlight_spoken_word)
+
+    def _on_playback_state(self, state: str) -> None:
+        """ Update the GUI when playback starts, finishes or is stopped (runs on the main thread)."""
+        self._restart_highlight()
+        if state == PLAYING and self.playing_timing is not None:
+            # Also reached by seeking after the audio finished
+            self.is_playing_audio = True
+            for button in (self.pause_btn, self.stop_btn, self.prev_btn, self.next_btn):
+                button.config(state="normal")
+            return
+        if state not in (FINISHED, STOPPED):
+            return
+
+        self.is_playing_audio = False
+        self.is_paused = False
+        self.pause_btn.config(state="disabled", text="Pause", command=self.pause_audio)
+        self.stop_btn.config(state="disabled")
+        self.prev_btn.config(state="disabled")
+        self.next_btn.config(state="disabled")
+        if state == FINISHED:
+            self.update_status("Ready")
 
 
     def _generate_and_play(self, text: str) -> None:
         try:
-            # Temporary mp3 file (unique name)
-            out_path = get_unique_audio_path()
-
             # Update status: generating
             self.update_status("Generating audio ...")
             label = self.voice_var.get()
-            voice_id = VOICE_LABEL_TO_ID.get(label, "en-GB-RyanNeural" )            
-            text_to_speech(text, out_path, voice=voice_id)
-
-            # Update status: playing
-            self.update_status("Playing Audio ...")
-            self.audio_path = out_path
-            self.audio_exists = True
-
-            # Stop and hide progress bar
-            self.root.after(0, lambda: self.progress.stop())
-            self.root.after(0, lambda: self.progress.pack_forget())
-
-            print("DEBUG -generate_and_play: audio_exists=", self.audio_exists, " path =", self.audio_path)
-            play_audio(out_path)
-
-            # Update status: done
-            self.update_status("Ready")
-
-            # Enable the save button (must be done on the main thread)
-            # root.after is used to schedule the update to run in the main thread 
-            # because tkinter GUI components must be updated from the main thread.
-            self.root.after(0, lambda: self.save_btn.config(state="normal"))            
+            voice_id = self.voice_ids.get(label, DEFAULT_VOICE)
+
+            # Segments are played as soon as they are synthesized and are
+            # also kept in memory, so playback can jump back and forth and
+            # the full audio can be saved later
+            buffer = AudioBuffer()
+            timing = WordTimingIndex()
+            self.playing_timing = timing
+            # Chunks that did not change since the last generation are
+            # taken from its audio instead of being synthesized again
+            run = SynthesisRun(buffer, previous=self.audio_run)
+            segments = stream_speech(text, voice=voice_id, timing=timing, run=run)
+            self.is_playing_audio = True
+            self.is_paused = False
+            # Buttons are reset by _on_playback_state when this returns
+            completed = play_segments(segments, on_segment=self._on_segment_started, buffer=buffer)
+
+            if completed:
+                # Replace the previous audio, releasing its memory/temp file
+                if self.audio_buffer is not None:
+                    self.audio_buffer.close()
+                self.audio_buffer = buffer
+                self.audio_timing = timing
+                run.previous = None
+                self.audio_run = run
+                self.audio_exists = True
+                self.run_timings = metrics.stage_breakdown(self._run_snapshot)
+
+                # Enable the save button (must be done on the main thread)
+                # root.after is used to schedule the update to run in the main thread 
+                # because tkinter GUI components must be updated from the main thread.
+                self.root.after(0, lambda: self.save_btn.config(state="normal"))            
+            else:
+                buffer.close()
 
         except Exception as e:
+            self.is_playing_audio = False
+            self.root.after(0, lambda: self.pause_btn.config(state="disabled", text="Pause", command=self.pause_audio))
+            self.root.after(0, lambda: self.stop_btn.config(state="disabled"))
+            self.root.after(0, lambda: self.prev_btn.config(state="disabled"))
+            self.root.after(0, lambda: self.next_btn.config(state="disabled"))
+
             # Update status: error
             self.update_status("Ready")
 
@@ -376,10 +632,26 @@ class PdfTtsApp:
             # We must show the messagebox in the main thread
             self.root.after(
                 0,
-                lambda: messagebox.showerror("TTS Error", str(e)),
+                lambda err=e: messagebox.showerror("TTS Error", str(err)),
             )
         finally:
             # Re-enable buttons on the main thread
             self.root.after(0, lambda: self.read_btn.config(state="normal"))
             self.root.after(0, lambda: self.open_btn.config(state="normal"))
-          
+
+    def _on_segment_started(self, index: int) -> None:
+        """ Called from the playback thread each time a new segment starts."""
+        if index != 0:
+            return
+        if self._run_start is not None and self.first_audio_seconds is None:
+            self.first_audio_seconds = time.perf_counter() - self._run_start
+
+        # First audio is playing: hide the progress bar and enable the controls
+        if not self.is_paused:
+            self.update_status("Playing Audio ...")
+        self.root.after(0, lambda: self.progress.stop())
+        self.root.after(0, lambda: self.progress.pack_forget())
+        self.root.after(0, lambda: self.pause_btn.config(state="normal"))
+        self.root.after(0, lambda: self.stop_btn.config(state="normal"))
+        self.root.after(0, lambda: self.prev_btn.config(state="normal"))
+        self.root.after(0, lambda: self.next_btn.config(state="normal"))
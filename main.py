@@ -1,12 +1,30 @@
-from tkinter import Tk
-from gui import PdfTtsApp
+import sys
+
 
 def main() -> None:
+    # "python main.py convert ..." runs the headless batch converter,
+    # which must work without tkinter or a display
+    if len(sys.argv) > 1 and sys.argv[1] == "convert":
+        from batch import main as batch_main
+        sys.exit(batch_main(sys.argv[1:]))
+
+    # "python main.py serve ..." runs the local HTTP synthesis service
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        from server import main as server_main
+        sys.exit(server_main(sys.argv[1:]))
+
+    # "python main.py voices ..." lists the available voices
+    if len(sys.argv) > 1 and sys.argv[1] == "voices":
+        from voices import main as voices_main
+        sys.exit(voices_main(sys.argv[1:]))
+
+    from tkinter import Tk
+    from gui import PdfTtsApp
+
     root = Tk()
     app = PdfTtsApp(root)
     root.mainloop()
 
 if __name__ == "__main__":
     main()
-    
 
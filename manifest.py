@@ -0,0 +1,114 @@
+"""
+Checkpoint manifests for long conversions.
+While text_to_speech writes a file, its segments go to "<out>.part" and a
+manifest next to it records the chunk plan and every segment that has been
+completely written. If the job dies, running it again with the same text,
+voice and engine version keeps the finished segments and continues with
+the first incomplete chunk; the final file is the same as from an
+uninterrupted run.
+
+The manifest is a JSON lines file, appended to as segments finish:
+
+    {"manifest": 1, "voice": ..., "engine": ..., "chunks": [key, ...]}
+    {"bytes": 40320, "words": [[offset, duration, word], ...]}
+    ...
+"""
+
+import json
+import os
+from typing import IO, List, Optional, Sequence, Tuple
+
+from word_timing import WordBoundary
+
+MANIFEST_VERSION = 1
+MANIFEST_SUFFIX = ".manifest"
+
+# (size in bytes, word boundaries) of one finished segment
+SegmentRecord = Tuple[int, List[WordBoundary]]
+
+
+def manifest_path_for(out_path: str) -> str:
+    """ Path of the manifest kept next to an output file while it is written."""
+    return out_path + MANIFEST_SUFFIX
+
+
+class ConversionManifest:
+    """
+    The checkpoint of one output file. `chunk_keys` are the synthesis cache
+    keys of the chunks in order, so they identify the text, voice and
+    engine version of every segment.
+    """
+
+    def __init__(self, path: str, voice: str, engine: str, chunk_keys: Sequence[str]) -> None:
+        self.path = path
+        self.header = {
+            "manifest": MANIFEST_VERSION,
+            "voice": voice,
+            "engine": engine,
+            "chunks": list(chunk_keys),
+        }
+        self._file: Optional[IO[str]] = None
+
+    def load_progress(self, available_bytes: int) -> List[SegmentRecord]:
+        """
+        Returns the segments recorded by an earlier run of the same plan,
+        limited to those that fit in available_bytes (the size of the
+        partial output). Returns [] if there is no manifest or the plan
+        differs.
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.read().split("\n")
+        except FileNotFoundError:
+            return []
+
+        try:
+            if json.loads(lines[0]) != self.header:
+                return []
+        except ValueError:
+            return []
+
+        records: List[SegmentRecord] = []
+        total = 0
+        for line in lines[1:len(self.header["chunks"]) + 1]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break  # the last line was cut off when the job was killed
+            total += entry["bytes"]
+            if total > available_bytes:
+                break
+            records.append((entry["bytes"], [tuple(word) for word in entry["words"]]))
+        return records
+
+    def start(self, records: Sequence[SegmentRecord] = ()) -> None:
+        """
+        Rewrites the manifest with the header and the segments kept from
+        an earlier run, then opens it for appending.
+        """
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.header) + "\n")
+            for size, words in records:
+                f.write(json.dumps({"bytes": size, "words": words}) + "\n")
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def add(self, size: int, words: Sequence[WordBoundary]) -> None:
+        """
+        Records a segment. Call this only after the segment's bytes are
+        flushed to the output, so the manifest never claims unwritten data.
+        """
+        self._file.write(json.dumps({"bytes": size, "words": list(words)}) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self) -> None:
+        """ Deletes the manifest once the output is complete."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
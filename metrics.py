@@ -0,0 +1,259 @@
+"""
+Lightweight performance instrumentation.
+Code records counters and latency histograms here, e.g.
+
+    with metrics.stage("clean_text"):
+        ...
+    metrics.increment("cache_hits")
+
+and they can be exported as JSON lines or in the Prometheus text format.
+Metrics are disabled unless set_metrics_enabled(True) is called or the
+PDF_TTS_METRICS environment variable is set; while disabled, every call
+returns immediately and nothing is recorded.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf,
+)
+
+# Prefix of every metric name in the Prometheus export
+PROMETHEUS_PREFIX = "pdf_tts"
+
+# Histogram of the time spent in each stage, labelled with the stage name
+STAGE_SECONDS = "stage_seconds"
+
+_enabled = os.environ.get("PDF_TTS_METRICS", "") not in ("", "0")
+_lock = threading.Lock()
+
+# Metric name and sorted label pairs identify a series
+SeriesKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+_counters: Dict[SeriesKey, float] = {}
+_histograms: Dict[SeriesKey, "Histogram"] = {}
+
+# Shared do-nothing context manager returned while disabled
+_NULL_TIMER = nullcontext()
+
+
+class Histogram:
+    """ Counts of observed values per bucket, plus their sum and count."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * len(self.bounds)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def copy(self) -> "Histogram":
+        other = Histogram(self.bounds)
+        other.counts = list(self.counts)
+        other.sum = self.sum
+        other.count = self.count
+        return other
+
+
+def set_metrics_enabled(enabled: bool = True) -> None:
+    """ Turns recording on or off (recorded values are kept)."""
+    global _enabled
+    _enabled = enabled
+
+
+def metrics_enabled() -> bool:
+    return _enabled
+
+
+def _key(name: str, labels: Dict[str, object]) -> SeriesKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def increment(name: str, value: float = 1.0, **labels) -> None:
+    """ Adds value to a counter."""
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0.0) + value
+
+
+def observe(name: str, value: float, **labels) -> None:
+    """ Records a value (usually seconds) in a histogram."""
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(value)
+
+
+class _Timer:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name: str, labels: Dict[str, object]) -> None:
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+
+def timer(name: str, **labels):
+    """ Context manager recording the duration of its block in a histogram."""
+    if not _enabled:
+        return _NULL_TIMER
+    return _Timer(name, labels)
+
+
+def stage(name: str):
+    """ Times a pipeline stage (file_load, clean_text, synthesis, ...)."""
+    if not _enabled:
+        return _NULL_TIMER
+    return _Timer(STAGE_SECONDS, {"stage": name})
+
+
+def snapshot() -> Tuple[Dict[SeriesKey, float], Dict[SeriesKey, Histogram]]:
+    """ Returns copies of all counters and histograms."""
+    with _lock:
+        return dict(_counters), {key: h.copy() for key, h in _histograms.items()}
+
+
+def reset() -> None:
+    """ Forgets everything recorded so far."""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def stage_breakdown(
+    before: Optional[Tuple[Dict, Dict]] = None, after: Optional[Tuple[Dict, Dict]] = None
+) -> List[Tuple[str, int, float]]:
+    """
+    Returns (stage, count, total seconds) for each stage timed between two
+    snapshots (default: from the start, until now), slowest first.
+    Use it for a per-run breakdown: take a snapshot before the run and
+    call stage_breakdown(before) after it.
+    """
+    _, before_histograms = before or ({}, {})
+    _, after_histograms = after or snapshot()
+    rows = []
+    for (name, labels), histogram in after_histograms.items():
+        if name != STAGE_SECONDS:
+            continue
+        previous = before_histograms.get((name, labels))
+        count = histogram.count - (previous.count if previous else 0)
+        seconds = histogram.sum - (previous.sum if previous else 0.0)
+        if count:
+            rows.append((dict(labels).get("stage", ""), count, seconds))
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return rows
+
+
+def format_breakdown(rows: List[Tuple[str, int, float]]) -> str:
+    """ Formats stage_breakdown() rows as an aligned table."""
+    if not rows:
+        return "No timings recorded."
+    return "\n".join(
+        f"{stage:<22} {count:>6}x {seconds * 1000:10.1f} ms" for stage, count, seconds in rows
+    )
+
+
+def export_json_lines() -> str:
+    """ One JSON object per series, with a timestamp."""
+    counters, histograms = snapshot()
+    now = time.time()
+    lines = []
+    for (name, labels), value in sorted(counters.items()):
+        lines.append(json.dumps(
+            {"time": now, "type": "counter", "name": name, "labels": dict(labels), "value": value}
+        ))
+    for (name, labels), histogram in sorted(histograms.items()):
+        lines.append(json.dumps({
+            "time": now,
+            "type": "histogram",
+            "name": name,
+            "labels": dict(labels),
+            "count": histogram.count,
+            "sum": histogram.sum,
+            "buckets": {_format_bound(b): c for b, c in zip(histogram.bounds, histogram.counts)},
+        }))
+    return "".join(line + "\n" for line in lines)
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == math.inf else repr(bound)
+
+
+def _format_value(value: float) -> str:
+    # Exact: "{:g}" keeps only six significant digits (1234567 -> 1.23457e+06)
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: Tuple = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in pairs
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def export_prometheus(prefix: str = PROMETHEUS_PREFIX) -> str:
+    """ All metrics in the Prometheus text exposition format."""
+    counters, histograms = snapshot()
+    out = []
+    typed = set()
+    for (name, labels), value in sorted(counters.items()):
+        full_name = f"{prefix}_{name}_total"
+        if full_name not in typed:
+            out.append(f"# TYPE {full_name} counter")
+            typed.add(full_name)
+        out.append(f"{full_name}{_format_labels(labels)} {_format_value(value)}")
+    for (name, labels), histogram in sorted(histograms.items()):
+        full_name = f"{prefix}_{name}"
+        if full_name not in typed:
+            out.append(f"# TYPE {full_name} histogram")
+            typed.add(full_name)
+        cumulative = 0
+        for bound, count in zip(histogram.bounds, histogram.counts):
+            cumulative += count
+            le = (("le", _format_bound(bound)),)
+            out.append(f"{full_name}_bucket{_format_labels(labels, le)} {cumulative}")
+        out.append(f"{full_name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+        out.append(f"{full_name}_count{_format_labels(labels)} {histogram.count}")
+    return "".join(line + "\n" for line in out)
+
+
+def write_metrics(path: str) -> None:
+    """ Writes all metrics to path: Prometheus format for *.prom, else JSON lines."""
+    data = export_prometheus() if path.endswith(".prom") else export_json_lines()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(data)
@@ -1,23 +1,510 @@
-import pdfplumber
-from typing import Optional
+import codecs
+import mmap
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
 
-def extract_text_from_pdf(path: str) -> Optional[str]:
+import metrics
+from boilerplate import BoilerplateReport, strip_boilerplate
+from cache import PageTextCache
+
+if TYPE_CHECKING:
+    import pypdfium2 as pdfium
+
+# pdfplumber (with pdfminer) and pypdfium2 take a while to import, so they
+# are loaded by the functions that use them rather than at import time.
+
+# Documents with fewer pages than this are always extracted in-process;
+# starting worker processes would cost more than it saves.
+PARALLEL_MIN_PAGES = 32
+
+# Each worker gets page ranges of about this many pages at a time, so
+# results can be returned in order while other ranges are still running.
+PAGES_PER_SHARD = 16
+
+# Worker processes are started fresh rather than forked: the GUI and the
+# batch converter extract from threads, and a forked child can inherit a
+# lock (logging, the import lock, Tk's) that another thread was holding.
+WORKER_START_METHOD = "spawn"
+
+DEFAULT_BACKEND = "auto"
+
+# In "auto" mode, give up on the fast backend if this many leading pages
+# all needed the pdfplumber fallback.
+AUTO_PROBE_PAGES = 3
+
+# TXT files are decoded in blocks of this many bytes, giving at most one
+# page each; memory use does not depend on the size of the file.
+TXT_PAGE_BYTES = 256 * 1024
+
+# Lines longer than this (e.g. a transcript without line breaks) are split
+# at a space, so a page never has to hold much more than this
+TXT_MAX_LINE_CHARS = 1024 * 1024
+
+# Bytes at the start of a TXT file used to detect its encoding
+ENCODING_SNIFF_BYTES = 64 * 1024
+
+# Byte order marks, longest first (a UTF-32-LE mark starts like UTF-16-LE)
+_BOM_ENCODINGS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+# pdfium must not be called from several threads at the same time
+_PDFIUM_LOCK = threading.RLock()
+
+# Cache of extracted text. Created on first use; see set_text_cache().
+_text_cache: Optional[PageTextCache] = None
+_text_cache_enabled = True
+
+
+class PageText(NamedTuple):
+    """ Text of a single page. number is 1-based, like a PDF viewer."""
+    number: int
+    text: str
+
+
+def _iter_pages_pdfplumber(path: str, pages: Optional[Iterable[int]] = None) -> Iterator[PageText]:
     """
-    Extracts text from all pages in a PDF file.
-    Returns the text as a single string, or None if no text was found.
+    Layout-accurate backend: pdfplumber rebuilds lines and word spacing
+    from character positions. Slow, but copes with unusual PDFs.
+    """
+    import pdfplumber
+
+    wanted = set(pages) if pages is not None else None
+    with pdfplumber.open(path, pages=wanted) as pdf:
+        for page in pdf.pages:
+            try:
+                text = page.extract_text() or ""
+            finally:
+                # Drop the characters/layout pdfplumber cached for this page
+                page.close()
+            yield PageText(page.page_number, text)
+
+
+def _pdfium_page_text(pdf: "pdfium.PdfDocument", number: int) -> str:
+    """ Plain text of one page (1-based) of an open pdfium document."""
+    with _PDFIUM_LOCK:
+        page = pdf[number - 1]
+        try:
+            text_page = page.get_textpage()
+            try:
+                text = text_page.get_text_bounded()
+            finally:
+                text_page.close()
+        finally:
+            page.close()
+
+    # pdfium uses Windows line endings and marks soft hyphens specially
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text.replace("\x02", "").replace("\ufffe", "").rstrip()
+
+
+def _iter_pages_pdfium(path: str, pages: Optional[Iterable[int]] = None) -> Iterator[PageText]:
+    """
+    Fast plain-text backend using pdfium (installed with pdfplumber).
+    Reads the text in content order without any layout analysis.
     """
+    import pypdfium2 as pdfium
+
+    with _PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(path)
+        page_count = len(pdf)
     try:
-        all_text = []
-        with pdfplumber.open(path) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    all_text.append(text)
-        
-        joined = "\n".join(all_text).strip()
-        return joined or None
+        numbers = sorted(set(pages)) if pages is not None else range(1, page_count + 1)
+        for number in numbers:
+            yield PageText(number, _pdfium_page_text(pdf, number))
+    finally:
+        with _PDFIUM_LOCK:
+            pdf.close()
+
+
+def _needs_layout_backend(text: str) -> bool:
+    """
+    Heuristic check of fast-backend output. True if the text looks damaged
+    in a way pdfplumber usually gets right: words run together because the
+    PDF positions words instead of using spaces, or lots of characters that
+    could not be mapped to Unicode.
+    """
+    if len(text) < 200:
+        return False
+    spaces = text.count(" ") + text.count("\n")
+    if spaces / len(text) < 0.05:
+        return True
+    unmapped = sum(1 for ch in text if ch == "\ufffd" or (ch < " " and ch not in "\n\t"))
+    return unmapped / len(text) > 0.05
+
+
+def _iter_pages_auto(path: str, pages: Optional[Iterable[int]] = None) -> Iterator[PageText]:
+    """
+    Uses pdfium for every page and falls back to pdfplumber for pages
+    whose text fails the _needs_layout_backend check. If the first
+    AUTO_PROBE_PAGES pages all need the fallback, the rest of the document
+    goes straight to pdfplumber.
+    """
+    import pdfplumber
+    import pypdfium2 as pdfium
+
+    fallback_pdf = None
+    fallbacks = 0
+    checked = 0
+    with _PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(path)
+        page_count = len(pdf)
+    try:
+        numbers = sorted(set(pages)) if pages is not None else list(range(1, page_count + 1))
+        for index, number in enumerate(numbers):
+            if checked >= AUTO_PROBE_PAGES and fallbacks == checked:
+                # The whole document needs layout analysis
+                yield from _iter_pages_pdfplumber(path, numbers[index:])
+                return
+
+            text = _pdfium_page_text(pdf, number)
+            checked += 1
+            if _needs_layout_backend(text):
+                fallbacks += 1
+                if fallback_pdf is None:
+                    fallback_pdf = pdfplumber.open(path)
+                page = fallback_pdf.pages[number - 1]
+                try:
+                    text = page.extract_text() or ""
+                finally:
+                    page.close()
+            yield PageText(number, text)
+    finally:
+        if fallback_pdf is not None:
+            fallback_pdf.close()
+        with _PDFIUM_LOCK:
+            pdf.close()
+
+
+# Available extraction backends. Each one is a function
+# (path, pages) -> iterator of PageText, yielding pages in order.
+BACKENDS: Dict[str, Callable[[str, Optional[Iterable[int]]], Iterator[PageText]]] = {
+    "auto": _iter_pages_auto,
+    "pdfium": _iter_pages_pdfium,
+    "pdfplumber": _iter_pages_pdfplumber,
+}
+
+
+def iter_pdf_pages(
+    path: str, pages: Optional[Iterable[int]] = None, backend: str = DEFAULT_BACKEND
+) -> Iterator[PageText]:
+    """
+    Yields the text of each page of a PDF file, one page at a time.
+    pages optionally limits extraction to the given 1-based page numbers
+    (e.g. range(1, 11) for the first ten pages); other pages are not parsed.
+    backend selects the extractor (see BACKENDS); "auto" uses the fast
+    pdfium backend and falls back to pdfplumber where the text looks wrong.
+    Memory use does not grow with the size of the document.
+    Pages without text are yielded with an empty string.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown PDF backend: {backend}")
+    try:
+        yield from BACKENDS[backend](path, pages)
+    except Exception as e:
+        raise RuntimeError(f"Failed to read PDF: {e}") from e
+
+
+def get_pdf_page_count(path: str) -> int:
+    """ Returns the number of pages in a PDF file."""
+    import pypdfium2 as pdfium
+
+    try:
+        with _PDFIUM_LOCK:
+            pdf = pdfium.PdfDocument(path)
+            try:
+                return len(pdf)
+            finally:
+                pdf.close()
     except Exception as e:
-        # For now jusr re-raise; GUI will handle showing a message
         raise RuntimeError(f"Failed to read PDF: {e}") from e
-        
-    
\ No newline at end of file
+
+
+def _extract_page_range(path: str, pages: List[int], backend: str) -> List[PageText]:
+    """ Worker process entry point: extracts the given pages."""
+    return list(iter_pdf_pages(path, pages, backend))
+
+
+def iter_pdf_pages_parallel(
+    path: str,
+    pages: Optional[Iterable[int]] = None,
+    workers: Optional[int] = None,
+    backend: str = DEFAULT_BACKEND,
+) -> Iterator[PageText]:
+    """
+    Same as iter_pdf_pages, but shards the pages across `workers` processes
+    (default: one per CPU core). Each worker opens the PDF on its own.
+    Pages are still yielded in page order.
+    Small documents, or workers=1, are extracted in this process.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        yield from iter_pdf_pages(path, pages, backend)
+        return
+
+    if pages is None:
+        numbers = list(range(1, get_pdf_page_count(path) + 1))
+    else:
+        numbers = sorted(set(pages))
+
+    if len(numbers) < PARALLEL_MIN_PAGES:
+        yield from iter_pdf_pages(path, numbers, backend)
+        return
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    shards = [numbers[i:i + PAGES_PER_SHARD] for i in range(0, len(numbers), PAGES_PER_SHARD)]
+    context = multiprocessing.get_context(WORKER_START_METHOD)
+    with ProcessPoolExecutor(max_workers=min(workers, len(shards)), mp_context=context) as pool:
+        futures = [pool.submit(_extract_page_range, path, shard, backend) for shard in shards]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            # Don't start shards nobody is waiting for any more
+            for future in futures:
+                future.cancel()
+
+
+def set_text_cache(cache: Optional[PageTextCache] = None, enabled: bool = True) -> None:
+    """
+    Configures the on-disk cache of extracted PDF text.
+    Pass a PageTextCache to use a different directory or byte budget,
+    or enabled=False to always parse the PDF.
+    """
+    global _text_cache, _text_cache_enabled
+    _text_cache = cache
+    _text_cache_enabled = enabled
+
+
+def get_text_cache() -> Optional[PageTextCache]:
+    """ Returns the active text cache, or None if caching is disabled."""
+    global _text_cache
+    if not _text_cache_enabled:
+        return None
+    if _text_cache is None:
+        _text_cache = PageTextCache()
+    return _text_cache
+
+
+def _timed_pages(page_iter: Iterable[PageText]) -> Iterator[PageText]:
+    """ Records the time taken to produce each page as the pdf_page stage."""
+    if not metrics.metrics_enabled():
+        yield from page_iter
+        return
+    page_iter = iter(page_iter)
+    while True:
+        start = time.perf_counter()
+        page = next(page_iter, None)
+        if page is None:
+            return
+        metrics.observe(metrics.STAGE_SECONDS, time.perf_counter() - start, stage="pdf_page")
+        yield page
+
+
+def iter_pdf_pages_cached(
+    path: str,
+    pages: Optional[Iterable[int]] = None,
+    workers: Optional[int] = 1,
+    backend: str = DEFAULT_BACKEND,
+) -> Iterator[PageText]:
+    """
+    Same as iter_pdf_pages_parallel, but serves documents that were
+    extracted before from the text cache without opening the PDF.
+    A full-document extraction is added to the cache once it completes;
+    any page range can then be loaded from it.
+    """
+    cache = get_text_cache()
+    if cache is None:
+        yield from _timed_pages(iter_pdf_pages_parallel(path, pages, workers, backend))
+        return
+
+    try:
+        key = cache.make_key(path, backend)
+    except OSError as e:
+        raise RuntimeError(f"Failed to read PDF: {e}") from e
+
+    with metrics.stage("text_cache_load"):
+        cached = cache.load(key, pages)
+    if cached is not None:
+        metrics.increment("text_cache_hits")
+        for number, text in cached:
+            yield PageText(number, text)
+        return
+
+    metrics.increment("text_cache_misses")
+    page_iter = _timed_pages(iter_pdf_pages_parallel(path, pages, workers, backend))
+    if pages is None:
+        page_iter = cache.store(key, page_iter)
+    yield from page_iter
+
+
+def extract_text_from_pdf(
+    path: str,
+    pages: Optional[Iterable[int]] = None,
+    workers: Optional[int] = 1,
+    backend: str = DEFAULT_BACKEND,
+    skip_boilerplate: bool = False,
+    report: Optional[BoilerplateReport] = None,
+) -> Optional[str]:
+    """
+    Extracts text from all pages in a PDF file (or only the given pages).
+    workers > 1 (or None for one per CPU core) extracts large documents
+    in several processes; see iter_pdf_pages_parallel.
+    backend selects the extractor; see iter_pdf_pages.
+    Documents that were extracted before are read from the text cache.
+    skip_boilerplate=True leaves out running headers, footers, page
+    numbers and repeated notices (see boilerplate.py) and adds what was
+    removed to report; by default every line is kept. The applications
+    pass boilerplate_stripping_enabled() here.
+    Returns the text as a single string, or None if no text was found.
+    """
+    with metrics.stage("pdf_extract"):
+        page_iter = iter_pdf_pages_cached(path, pages, workers, backend)
+        if skip_boilerplate:
+            # The whole document is indexed before any page is filtered
+            page_iter = strip_boilerplate(page_iter, report, warmup_pages=None)
+        joined = "\n".join(page.text for page in page_iter if page.text).strip()
+    return joined or None
+
+
+def detect_text_encoding(prefix: bytes, whole_file: bool = False) -> str:
+    """
+    Guesses the encoding of a text file from its first bytes: a byte order
+    mark, UTF-16 without one (NUL in every other byte), then UTF-8, and
+    cp1252 (the usual Windows encoding) if the bytes are not valid UTF-8.
+    Pass whole_file if prefix is the entire file, so an unfinished UTF-8
+    sequence at its end counts as invalid.
+    """
+    for bom, encoding in _BOM_ENCODINGS:
+        if prefix.startswith(bom):
+            return encoding
+
+    # ASCII text in UTF-16 has a NUL byte next to every character
+    pairs = len(prefix) // 2
+    if pairs:
+        even_nuls = prefix[0:pairs * 2:2].count(0)
+        odd_nuls = prefix[1:pairs * 2:2].count(0)
+        if odd_nuls > pairs * 0.3 and even_nuls < pairs * 0.05:
+            return "utf-16-le"
+        if even_nuls > pairs * 0.3 and odd_nuls < pairs * 0.05:
+            return "utf-16-be"
+
+    try:
+        # The prefix may end in the middle of a character
+        codecs.getincrementaldecoder("utf-8")().decode(prefix, final=whole_file)
+    except UnicodeDecodeError:
+        return "cp1252"
+    return "utf-8"
+
+
+def get_txt_page_count(path: str) -> int:
+    """ Number of blocks iter_txt_pages reads; page numbers go up to this."""
+    return -(-os.path.getsize(path) // TXT_PAGE_BYTES)
+
+
+def iter_txt_pages(path: str, encoding: Optional[str] = None) -> Iterator[PageText]:
+    """
+    Reads a text file through a memory map and yields it as pages of whole
+    lines, so it can be handled like a PDF without ever being held in
+    memory whole. Each block of TXT_PAGE_BYTES gives at most one page,
+    numbered by the block (numbers of blocks that end inside a long line
+    are skipped). The encoding is detected with detect_text_encoding
+    unless given; undecodable bytes become U+FFFD. Newlines are translated
+    as in text mode, and "\\n".join() of the page texts gives the text of
+    the file (a line longer than TXT_MAX_LINE_CHARS is split at a space).
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if encoding is None:
+                encoding = detect_text_encoding(
+                    data[:ENCODING_SNIFF_BYTES], size <= ENCODING_SNIFF_BYTES
+                )
+            decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+            block_count = get_txt_page_count(path)
+            # Decoded text after the last complete line
+            pending = ""
+            for number in range(1, block_count + 1):
+                start = (number - 1) * TXT_PAGE_BYTES
+                final = number == block_count
+                text = pending + decoder.decode(data[start:start + TXT_PAGE_BYTES], final)
+                # A \r at the end may be the first half of a \r\n
+                held_cr = not final and text.endswith("\r")
+                if held_cr:
+                    text = text[:-1]
+                text = text.replace("\r\n", "\n").replace("\r", "\n")
+
+                if final:
+                    page, pending = text, ""
+                else:
+                    cut = text.rfind("\n")
+                    if cut <= 0 and len(text) >= TXT_MAX_LINE_CHARS:
+                        # Too long without a line end: split at a space instead
+                        cut = text.rfind(" ")
+                    if cut > 0:
+                        page, pending = text[:cut], text[cut + 1:]
+                    elif len(text) >= TXT_MAX_LINE_CHARS:
+                        page, pending = text, ""
+                    else:
+                        page, pending = "", text
+                    if held_cr:
+                        pending += "\r"
+                if page:
+                    yield PageText(number, page)
+
+
+def extract_text_from_txt(path: str, encoding: Optional[str] = None) -> Optional[str]:
+    """
+    Reads a text file with iter_txt_pages (detecting its encoding).
+    Returns the text as a single string, or None if the file is empty.
+    """
+    with metrics.stage("txt_extract"):
+        joined = "\n".join(page.text for page in iter_txt_pages(path, encoding)).strip()
+    return joined or None
+
+
+class TextFile:
+    """
+    The text of a TXT file as a source of pieces for text_to_speech.
+    Every iteration reads the file again with iter_txt_pages, so the text
+    can be chunked for the manifest and then synthesized while only one
+    page at a time is in memory. "".join(TextFile(path)) is the text of
+    the file.
+    """
+
+    def __init__(self, path: str, encoding: Optional[str] = None) -> None:
+        self.path = path
+        self.encoding = encoding
+
+    def __iter__(self) -> Iterator[str]:
+        separator = ""
+        for page in iter_txt_pages(self.path, self.encoding):
+            yield separator + page.text
+            separator = "\n"
+
+
+def iter_document_pages(path: str, workers: Optional[int] = 1) -> Iterator[PageText]:
+    """
+    Pages of a PDF (iter_pdf_pages_cached) or TXT file (iter_txt_pages),
+    chosen by the file extension.
+    """
+    if path.lower().endswith(".pdf"):
+        return iter_pdf_pages_cached(path, workers=workers)
+    return iter_txt_pages(path)
+
+
+def get_document_page_count(path: str) -> int:
+    """ Page count of a PDF, or block count of a TXT file; see iter_document_pages."""
+    if path.lower().endswith(".pdf"):
+        return get_pdf_page_count(path)
+    return get_txt_page_count(path)
@@ -0,0 +1,431 @@
+"""
+Audio playback for the whole process, built on pygame.mixer.
+A single PlaybackController owns the mixer: it is initialized once and
+kept open. Track completion is learned from pygame end-of-track events on
+a background thread that sleeps until an event arrives, so nothing polls
+while audio plays. State changes are reported to listeners (the GUI wraps
+its listener in root.after so updates happen on the Tk thread).
+
+Segmented audio (an AudioBuffer) is played gaplessly: while one segment
+plays, the next one is already queued with pygame.mixer.music.queue.
+The buffer's duration index lets seek() jump to any time or segment
+immediately, without re-synthesizing.
+
+Use get_controller() to get the shared controller. For tests, construct
+PlaybackController(audio_driver="dummy") to run without a sound card.
+"""
+
+import io
+import os
+import threading
+from typing import Callable, Iterable, List, Optional, Union
+
+import metrics
+from audio_buffer import AudioBuffer
+
+# Playback states reported to listeners
+PLAYING = "playing"
+PAUSED = "paused"
+STOPPED = "stopped"    # stopped by the user
+FINISHED = "finished"  # reached the end of the audio
+
+# "Previous" restarts the current segment if it has played this long
+PREVIOUS_RESTART_SECONDS = 2.0
+
+# Number of end-of-track event types to rotate through; see _next_end_event()
+_END_EVENT_TYPES = 8
+
+
+class PlaybackController:
+    """
+    Plays MP3 files, or an AudioBuffer of segments with gapless transitions,
+    seeking and next/previous segment. All methods are thread-safe.
+    """
+
+    def __init__(self, audio_driver: Optional[str] = None) -> None:
+        self._audio_driver = audio_driver
+        self._lock = threading.RLock()
+        self._started = False
+        self._thread: Optional[threading.Thread] = None
+        self._quit_event = 0
+        self._end_events: List[int] = []
+        self._generation = 0
+        # Event type posted when the current track ends with nothing after
+        # it, and when it ends and the queued track starts
+        self._end_event = 0
+        self._queued_end_event = 0
+        self._listeners: List[Callable[[str], None]] = []
+
+        self.state = FINISHED
+        # Set whenever nothing is playing or paused
+        self._idle = threading.Event()
+        self._idle.set()
+
+        # Segmented playback: the buffer, the segment playing now, the one
+        # queued behind it, and whether more segments are still coming
+        self._buffer: Optional[AudioBuffer] = None
+        self._current: Optional[int] = None
+        self._queued: Optional[int] = None
+        self._complete = True
+        # Playback caught up with synthesis and waits for the next segment
+        self._starved = False
+        # Set by stop(); tells play_segments() to stop pulling segments
+        self._stopped = False
+        # Timeline position at which the current track started playing
+        self._base_time = 0.0
+        self._on_segment: Optional[Callable[[int], None]] = None
+
+    # --- setup -------------------------------------------------------------
+
+    def start(self) -> None:
+        """ Initializes the mixer and the event thread (once per process)."""
+        with self._lock:
+            if self._started:
+                return
+            if self._audio_driver:
+                os.environ["SDL_AUDIODRIVER"] = self._audio_driver
+            # Only SDL's event queue is used, never an SDL window (tkinter
+            # draws the UI), so the dummy video driver works everywhere
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+            import pygame
+            pygame.mixer.init()
+            pygame.display.init()
+            self._quit_event = pygame.event.custom_type()
+            self._end_events = [pygame.event.custom_type() for _ in range(_END_EVENT_TYPES)]
+            self._end_event = self._end_events[0]
+            pygame.mixer.music.set_endevent(self._end_event)
+
+            self._thread = threading.Thread(
+                target=self._event_loop, name="playback-events", daemon=True
+            )
+            self._started = True
+            self._thread.start()
+
+    def shutdown(self) -> None:
+        """ Stops playback, ends the event thread and closes the mixer."""
+        with self._lock:
+            if not self._started:
+                return
+            self.stop()
+            import pygame
+            pygame.event.post(pygame.event.Event(self._quit_event))
+        self._thread.join(timeout=2)
+        with self._lock:
+            pygame.mixer.quit()
+            pygame.display.quit()
+            self._started = False
+
+    def add_listener(self, listener: Callable[[str], None]) -> None:
+        """
+        Registers listener(state), called on every state change.
+        It runs on a playback thread, so GUI code must hand off to its own
+        thread (e.g. with root.after).
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _set_state(self, state: str) -> None:
+        with self._lock:
+            if state == self.state:
+                return
+            self.state = state
+            if state in (STOPPED, FINISHED):
+                self._idle.set()
+            else:
+                self._idle.clear()
+        for listener in list(self._listeners):
+            listener(state)
+
+    # --- events ------------------------------------------------------------
+
+    def _next_end_event(self) -> int:
+        """ Switches to the next end-of-track event type and returns it (lock held)."""
+        import pygame
+        self._generation += 1
+        event_type = self._end_events[self._generation % _END_EVENT_TYPES]
+        pygame.mixer.music.set_endevent(event_type)
+        return event_type
+
+    def _new_generation(self) -> None:
+        """
+        Halts the mixer and switches to the next end-of-track event type.
+        Halting (and loading over) a track also posts an end event; since
+        that event carries the old type it is recognised as stale and
+        ignored instead of being mistaken for the new track finishing.
+        """
+        import pygame
+        pygame.mixer.music.stop()
+        self._end_event = self._next_end_event()
+
+    def _event_loop(self) -> None:
+        import pygame
+        while True:
+            # Sleeps until SDL has an event for us; no polling
+            event = pygame.event.wait()
+            if event.type == self._quit_event:
+                return
+            if event.type in self._end_events:
+                self._on_track_end(event.type)
+
+    def _on_track_end(self, event_type: int) -> None:
+        with self._lock:
+            if self._queued is not None and event_type == self._queued_end_event:
+                # The event type was switched after the next segment was
+                # queued, so pygame has already started it: no gap
+                self._current = self._queued
+                self._queued = None
+                self._end_event = event_type
+                # get_pos() restarts from zero with each queued track
+                self._base_time = self._buffer.segment_start(self._current)
+                self._notify_segment()
+                self._queue_next()
+                return
+
+            if event_type != self._end_event:
+                return  # from a track that was stopped or replaced
+
+            if self._buffer is not None and self._current + 1 < self._buffer.segment_count:
+                # The next segment arrived, or was queued, too late
+                self._play_segment(self._current + 1)
+                return
+
+            if self._buffer is not None and not self._complete:
+                # Playback caught up with synthesis; resume in _segment_added()
+                self._starved = True
+                return
+
+        self._set_state(FINISHED)
+
+    # --- playback ----------------------------------------------------------
+
+    def _notify_segment(self) -> None:
+        if self._on_segment is not None:
+            self._on_segment(self._current)
+
+    def _play_segment(self, index: int, offset: float = 0.0) -> None:
+        """ Starts segment `index` of the buffer at `offset` seconds (lock held)."""
+        import pygame
+        self._new_generation()
+        data = self._buffer.read_segment(index)
+        with metrics.stage("playback_start"):
+            pygame.mixer.music.load(io.BytesIO(data), "mp3")
+            pygame.mixer.music.play(start=offset)
+        if self.state == PAUSED:
+            pygame.mixer.music.pause()
+
+        self._current = index
+        self._queued = None
+        self._starved = False
+        self._base_time = self._buffer.segment_start(index) + offset
+        self._notify_segment()
+        self._queue_next()
+
+    def _queue_next(self) -> None:
+        """ Queues the segment after the current one, if it exists yet (lock held)."""
+        import pygame
+        following = self._current + 1
+        if self._queued is None and following < self._buffer.segment_count:
+            data = self._buffer.read_segment(following)
+            pygame.mixer.music.queue(io.BytesIO(data), "mp3")
+            self._queued = following
+            # From now on the current track ends by starting the queued
+            # one. Switched after queue(), so this type never reports a
+            # start that did not happen
+            self._queued_end_event = self._next_end_event()
+
+    def _segment_added(self) -> None:
+        """ Called after a segment was appended to the playing buffer (lock held)."""
+        if self._current is None:
+            self._play_segment(0)
+            self._set_state(PLAYING)
+        elif self._starved:
+            self._play_segment(self._current + 1)
+        elif self.state in (PLAYING, PAUSED):
+            self._queue_next()
+
+    def play(self, source: Union[str, bytes]) -> None:
+        """ Starts playing a file path or MP3 bytes; returns immediately."""
+        self.start()
+        import pygame
+        with self._lock:
+            self._new_generation()
+            self._buffer = None
+            self._current = self._queued = None
+            self._complete = True
+            self._stopped = False
+            self._base_time = 0.0
+            self._on_segment = None
+            with metrics.stage("playback_start"):
+                if isinstance(source, (bytes, bytearray)):
+                    pygame.mixer.music.load(io.BytesIO(source), "mp3")
+                else:
+                    pygame.mixer.music.load(source)
+                pygame.mixer.music.play()
+            self.state = STOPPED  # so the change to PLAYING is reported
+        self._set_state(PLAYING)
+
+    def play_segments(
+        self,
+        segments: Iterable[bytes],
+        on_segment: Optional[Callable[[int], None]] = None,
+        buffer: Optional[AudioBuffer] = None,
+    ) -> bool:
+        """
+        Plays MP3 segments one after another without gaps (blocks until
+        finished). Segments are pulled from the iterable as soon as they are
+        available and appended to `buffer` (a new AudioBuffer if not given),
+        so playback can start while synthesis is still running, and seek()
+        can reach any segment received so far. on_segment(index) is called
+        as each segment starts. Returns True if playback reached the end,
+        False if it was stopped.
+        """
+        self.start()
+        buffer = buffer if buffer is not None else AudioBuffer()
+        with self._lock:
+            self._new_generation()
+            self._buffer = buffer
+            self._current = self._queued = None
+            self._complete = False
+            self._starved = False
+            self._stopped = False
+            self._base_time = 0.0
+            self._on_segment = on_segment
+            self.state = STOPPED
+            self._idle.set()
+
+        try:
+            for segment in segments:
+                with self._lock:
+                    if self._buffer is not buffer or self._stopped:
+                        return False  # stopped, or replaced by another playback
+                    buffer.append(segment)
+                    self._segment_added()
+        finally:
+            # Release the generator so unfinished synthesis is cancelled
+            close = getattr(segments, "close", None)
+            if close:
+                close()
+            finished = False
+            with self._lock:
+                if self._buffer is buffer:
+                    self._complete = True
+                    # Playback already caught up, or there was nothing to play
+                    finished = not self._stopped and (self._starved or self._current is None)
+                    self._starved = False
+            if finished:
+                self._set_state(FINISHED)
+
+        self._idle.wait()
+        with self._lock:
+            return self._buffer is buffer and not self._stopped and self.state == FINISHED
+
+    def seek(self, seconds: float) -> None:
+        """
+        Jumps to a time (in seconds from the start) in the segmented audio.
+        Works while playing, paused, or after playback ended.
+        """
+        with self._lock:
+            if self._buffer is None or self._buffer.segment_count == 0:
+                return
+            index, offset = self._buffer.segment_at(max(0.0, seconds))
+            self._seek_to(index, offset)
+
+    def seek_segment(self, index: int) -> None:
+        """ Jumps to the start of segment `index`."""
+        with self._lock:
+            if self._buffer is None or not 0 <= index < self._buffer.segment_count:
+                return
+            self._seek_to(index, 0.0)
+
+    def _seek_to(self, index: int, offset: float) -> None:
+        restart = self.state in (STOPPED, FINISHED)
+        self._stopped = False
+        self._play_segment(index, offset)
+        if restart:
+            self._set_state(PLAYING)
+
+    def next_segment(self) -> None:
+        """ Skips to the start of the next segment."""
+        with self._lock:
+            if self._current is not None:
+                self.seek_segment(self._current + 1)
+
+    def previous_segment(self) -> None:
+        """
+        Restarts the current segment, or goes to the previous one if the
+        current segment has only just started.
+        """
+        with self._lock:
+            if self._current is None or self._buffer is None:
+                return
+            into_segment = self.position() - self._buffer.segment_start(self._current)
+            if into_segment > PREVIOUS_RESTART_SECONDS or self._current == 0:
+                self.seek_segment(self._current)
+            else:
+                self.seek_segment(self._current - 1)
+
+    def position(self) -> float:
+        """ Current playback position in seconds from the start."""
+        import pygame
+        with self._lock:
+            if not self._started or self.state in (STOPPED, FINISHED):
+                return self._base_time
+            # get_pos() counts from the start of the current track (or the
+            # play() offset) and excludes time spent paused
+            return self._base_time + max(0, pygame.mixer.music.get_pos()) / 1000
+
+    @property
+    def current_segment(self) -> Optional[int]:
+        return self._current
+
+    def pause(self) -> None:
+        with self._lock:
+            if self.state != PLAYING:
+                return
+            import pygame
+            pygame.mixer.music.pause()
+        self._set_state(PAUSED)
+
+    def resume(self) -> None:
+        with self._lock:
+            if self.state != PAUSED:
+                return
+            import pygame
+            pygame.mixer.music.unpause()
+        self._set_state(PLAYING)
+
+    def stop(self) -> None:
+        with self._lock:
+            if self.state in (PLAYING, PAUSED):
+                self._base_time = self.position()
+            if self._started:
+                self._new_generation()
+            self._queued = None
+            self._starved = False
+            self._stopped = True
+        self._set_state(STOPPED)
+
+    def is_active(self) -> bool:
+        """ True while audio is playing or paused."""
+        return not self._idle.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """ Blocks until playback finishes or is stopped. False on timeout."""
+        return self._idle.wait(timeout)
+
+
+_controller: Optional[PlaybackController] = None
+_controller_lock = threading.Lock()
+
+
+def get_controller() -> PlaybackController:
+    """ Returns the process-wide playback controller (the mixer opens on first play)."""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = PlaybackController()
+        return _controller
@@ -0,0 +1,137 @@
+"""
+Generated documents and voice lists, shared by the tests and benchmarks,
+and the original text cleanup that text_normalizer must match.
+Everything is deterministic: the same arguments give the same data.
+"""
+
+import random
+import re
+from typing import List, Optional, Tuple
+
+from pdf_processor import PageText
+
+SAMPLE_LINE = "The quick brown fox jumps over the lazy dog while the band plays on."
+
+
+def write_sample_pdf(path: str, page_count: int, lines_per_page: int = 40) -> None:
+    """
+    Writes a simple text-only PDF with page_count pages.
+    The file is built by hand so no PDF writing library is needed.
+    """
+    objects: List[Optional[bytes]] = []
+
+    def add(body: Optional[bytes]) -> int:
+        objects.append(body)
+        return len(objects)  # PDF object numbers start at 1
+
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = add(None)  # filled in once the page ids are known
+
+    page_ids = []
+    for number in range(1, page_count + 1):
+        lines = [
+            f"BT /F1 10 Tf 50 {780 - i * 18} Td (Page {number}, line {i}: {SAMPLE_LINE}) Tj ET"
+            for i in range(lines_per_page)
+        ]
+        stream = "\n".join(lines).encode("latin-1")
+        content_id = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (pages_id, font_id, content_id)
+        ))
+
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+    catalog_id = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog_id, xref_offset
+    )
+
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def sample_document(paragraphs: int, seed: int = 0) -> List[str]:
+    """ Paragraphs of 1-8 varied sentences built from SAMPLE_LINE."""
+    rng = random.Random(seed)
+    words = SAMPLE_LINE.rstrip(".").lower().split()
+    result = []
+    for _ in range(paragraphs):
+        sentences = []
+        for _ in range(rng.randint(1, 8)):
+            sentence = " ".join(rng.choice(words) for _ in range(rng.randint(6, 16)))
+            sentences.append(sentence.capitalize() + ".")
+        result.append(" ".join(sentences))
+    return result
+
+
+def sample_raw_text(megabytes: float) -> str:
+    """
+    Text shaped like extracted PDF text: paragraphs hard-wrapped at 80
+    columns, blank lines between them and some doubled spaces.
+    """
+    lines = []
+    for paragraph in sample_document(400, seed=1):
+        line = ""
+        for word in paragraph.split(" "):
+            if len(line) + len(word) > 80:
+                lines.append(line)
+                line = ""
+            line += word + ("  " if word.endswith(".") else " ")
+        lines.append(line.rstrip() + "\n")
+    block = "\n".join(lines)
+    repeats = max(1, int(megabytes * 1024 * 1024 / len(block)) + 1)
+    return (block * repeats)[:int(megabytes * 1024 * 1024)]
+
+
+def sample_report_pages(page_count: int, boilerplate: bool = True) -> Tuple[List[PageText], int]:
+    """
+    Pages of a report whose paragraphs are wrapped at 80 columns. With
+    boilerplate, each page has a running header (alternating between even
+    and odd pages), a confidentiality notice and a page number footer.
+    Returns the pages and the number of boilerplate lines on them.
+    """
+    lines = sample_raw_text(page_count * 3000 / (1024 * 1024)).split("\n")
+    per_page = len(lines) // page_count
+    pages = []
+    added = 0
+    for number in range(1, page_count + 1):
+        body = lines[(number - 1) * per_page:number * per_page]
+        if boilerplate:
+            header = "ACME Corporation Annual Report 2024" if number % 2 else "Section 4: Financial Statements"
+            notice = "CONFIDENTIAL - Do not distribute without written permission of ACME Corporation."
+            body = [header, ""] + body + ["", notice, f"Page {number} of {page_count}"]
+            added += 3
+        pages.append(PageText(number, "\n".join(body)))
+    return pages, added
+
+
+def sample_voices(count: int) -> List[Tuple[str, str, str]]:
+    """ (ShortName, Locale, Gender) of `count` made-up voices spread over many locales."""
+    rng = random.Random(0)
+    languages = ["ar", "de", "en", "es", "fr", "hi", "it", "ja", "ko", "nl", "pl", "pt", "ru", "sv", "zh"]
+    regions = ["AU", "BR", "CA", "CN", "DE", "ES", "FR", "GB", "IN", "IT", "JP", "MX", "US"]
+    voices = []
+    for i in range(count):
+        locale = f"{rng.choice(languages)}-{rng.choice(regions)}"
+        voices.append((f"{locale}-Voice{i}Neural", locale, rng.choice(["Female", "Male"])))
+    return voices
+
+
+def three_pass_clean(text: str) -> str:
+    """ The original three-pass cleanup of tts_engine, kept as the reference for text_normalizer."""
+    text = re.sub(r"\n\s*\n", " ", text)
+    text = text.replace("\n", " ")
+    text = re.sub(r" +", " ", text)
+    return text.strip()
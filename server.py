@@ -0,0 +1,447 @@
+"""
+Local HTTP synthesis service, so other tools can use the converter.
+Runs without a display or sound card, like batch.py.
+
+Usage:
+    python main.py serve --port 8765
+    python main.py serve --fake          # offline fake backend (see fake_tts.py)
+
+Endpoints:
+    POST /speech     JSON {"text": ..., "voice": ...}             -> MP3
+    POST /document   a PDF or TXT file as the body (?voice=...)   -> MP3
+    GET  /health     job queue and scheduler status (JSON)
+    GET  /metrics    all metrics in the Prometheus text format
+
+MP3 responses are streamed with chunked transfer encoding, one chunk per
+synthesized segment, starting as soon as the first sentence is ready:
+
+    curl --data-binary @report.pdf http://127.0.0.1:8765/document -o report.mp3
+
+Identical requests (same text and voice) that arrive while one of them is
+being synthesized share that synthesis: the later ones get the segments
+produced so far and then follow along. At most `jobs` syntheses run at
+once and `queue` more can wait; beyond that requests are answered with
+503 and a Retry-After header.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import queue
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import metrics
+from audio_buffer import AudioBuffer
+from boilerplate import boilerplate_stripping_enabled
+from pdf_processor import detect_text_encoding, extract_text_from_pdf
+from tts_engine import DEFAULT_VOICE, DEFAULT_WORKERS, get_scheduler, set_communicate_factory, stream_speech
+from utils import get_session_temp_dir
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Syntheses running at once, and how many more may wait for a slot
+DEFAULT_MAX_ACTIVE_JOBS = 2
+DEFAULT_MAX_QUEUED_JOBS = 8
+
+# Largest request body accepted (uploaded documents included)
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+# Suggested wait, in seconds, when the job queue is full
+RETRY_AFTER_SECONDS = 5
+
+
+class QueueFullError(Exception):
+    """ Raised when a new synthesis cannot be queued."""
+
+
+class SpeechJob:
+    """
+    One synthesis, shared by every request for the same text and voice.
+    Segments are kept in an AudioBuffer, so a request that joins late
+    still gets the whole MP3. The job is cancelled if all of its readers
+    go away before it finishes, and its audio is released once the last
+    reader is done.
+    """
+
+    def __init__(self, key: str, text: str, voice: str, workers: Optional[int]) -> None:
+        self.key = key
+        self.text = text
+        self.voice = voice
+        self.workers = workers
+        self.buffer = AudioBuffer()
+        self.done = False
+        self.cancelled = False
+        self.error: Optional[Exception] = None
+        # Set once the audio is released; the job cannot be joined after that
+        self.released = False
+        self._readers = 0
+        self._changed = threading.Condition()
+
+    def attach(self) -> bool:
+        """
+        Registers a reader; returns False if the job was already cancelled,
+        or finished and released its audio before it was removed from the
+        service.
+        """
+        with self._changed:
+            if self.cancelled or self.released:
+                return False
+            self._readers += 1
+            return True
+
+    def detach(self) -> None:
+        with self._changed:
+            self._readers -= 1
+            if self._readers:
+                return
+            if self.done:
+                self._release()
+            else:
+                # Nobody is waiting for the audio any more
+                self.cancelled = True
+
+    def run(self) -> None:
+        """ Synthesizes the text (on a job worker thread)."""
+        segments = None
+        try:
+            if not self.cancelled:
+                segments = stream_speech(self.text, self.voice, self.workers)
+                for segment in segments:
+                    if self.cancelled:
+                        break
+                    with self._changed:
+                        self.buffer.append(segment)
+                        self._changed.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            if segments is not None:
+                # Cancels any synthesis still running
+                segments.close()
+            with self._changed:
+                self.done = True
+                self._changed.notify_all()
+                if not self._readers:
+                    self._release()
+
+    def _release(self) -> None:
+        # Called with self._changed held
+        self.released = True
+        self.buffer.close()
+
+    def segments(self) -> Iterator[bytes]:
+        """ Yields every segment in order, waiting for the ones not synthesized yet."""
+        index = 0
+        while True:
+            with self._changed:
+                while index >= self.buffer.segment_count and not self.done:
+                    self._changed.wait()
+                if index >= self.buffer.segment_count:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                data = self.buffer.read_segment(index)
+            index += 1
+            yield data
+
+
+class SpeechService:
+    """
+    Runs SpeechJobs on max_active worker threads, with up to max_queued
+    jobs waiting, and coalesces identical requests into one job.
+    """
+
+    def __init__(
+        self,
+        max_active: int = DEFAULT_MAX_ACTIVE_JOBS,
+        max_queued: int = DEFAULT_MAX_QUEUED_JOBS,
+        workers: Optional[int] = DEFAULT_WORKERS,
+    ) -> None:
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.workers = workers
+        self._lock = threading.Lock()
+        # Jobs that are queued or running, by text and voice
+        self._jobs: Dict[str, SpeechJob] = {}
+        # A worker takes a job as soon as it is put here, so the queue
+        # only holds jobs waiting for a free worker
+        self._queue: "queue.Queue[Optional[SpeechJob]]" = queue.Queue(maxsize=max_queued)
+        self._running = 0
+        self._threads: List[threading.Thread] = []
+        for _ in range(max_active):
+            thread = threading.Thread(target=self._work, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    @staticmethod
+    def job_key(text: str, voice: str) -> str:
+        return hashlib.sha256(f"{voice}\0{text}".encode("utf-8")).hexdigest()
+
+    def submit(self, text: str, voice: str) -> SpeechJob:
+        """
+        Returns the job synthesizing text with voice, starting one if
+        there is none, already attached for the caller (who must call
+        detach() when done). Raises QueueFullError if a new job is needed
+        but the queue is full.
+        """
+        key = self.job_key(text, voice)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.attach():
+                metrics.increment("server_jobs_coalesced")
+                return job
+
+            job = SpeechJob(key, text, voice, self.workers)
+            job.attach()
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                job.buffer.close()
+                metrics.increment("server_jobs_rejected")
+                raise QueueFullError("Too many requests; try again later.") from None
+            self._jobs[key] = job
+            metrics.increment("server_jobs_started")
+            return job
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                self._running += 1
+            try:
+                with metrics.stage("server_job"):
+                    job.run()
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    # A cancelled job may have been replaced by a new one
+                    if self._jobs.get(job.key) is job:
+                        del self._jobs[job.key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "jobs_running": self._running,
+                "jobs_queued": self._queue.qsize(),
+                "max_active_jobs": self.max_active,
+                "max_queued_jobs": self.max_queued,
+            }
+
+    def shutdown(self) -> None:
+        """ Stops the worker threads once the jobs already queued are done."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+
+def document_text(body: bytes) -> str:
+    """
+    Text of an uploaded document: a PDF (by its signature) or plain text
+    in any encoding detect_text_encoding() recognizes.
+    """
+    if not body.startswith(b"%PDF-"):
+        return body.decode(detect_text_encoding(body, whole_file=True), errors="replace")
+
+    fd, path = tempfile.mkstemp(suffix=".pdf", dir=get_session_temp_dir())
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+        return extract_text_from_pdf(path, skip_boilerplate=boilerplate_stripping_enabled()) or ""
+    finally:
+        os.remove(path)
+
+
+class SpeechRequestHandler(BaseHTTPRequestHandler):
+    """ Handles one HTTP connection; see the module docstring for the endpoints."""
+
+    # Needed for chunked transfer encoding
+    protocol_version = "HTTP/1.1"
+    server: "SpeechServer"
+
+    def do_GET(self) -> None:
+        path = urlsplit(self.path).path
+        if path == "/health":
+            status = {"status": "ok", **self.server.service.stats(), "scheduler": get_scheduler().stats()}
+            self._send(200, "application/json", json.dumps(status).encode("utf-8"))
+        elif path == "/metrics":
+            self._send(200, "text/plain; version=0.0.4", metrics.export_prometheus().encode("utf-8"))
+        else:
+            self._send_error(404, "Not found")
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        if url.path not in ("/speech", "/document"):
+            self._send_error(404, "Not found")
+            return
+
+        body = self._read_body()
+        if body is None:
+            return
+        voice = parse_qs(url.query).get("voice", [DEFAULT_VOICE])[0]
+        try:
+            if url.path == "/speech":
+                request = json.loads(body)
+                text = request["text"]
+                voice = request.get("voice", voice)
+                if not isinstance(text, str) or not isinstance(voice, str):
+                    raise TypeError("text and voice must be strings")
+            else:
+                with metrics.stage("file_load"):
+                    text = document_text(body)
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_error(400, f"Bad request: {e}")
+            return
+        except Exception as e:
+            self._send_error(422, f"Could not read the document: {e}")
+            return
+
+        if not text.strip():
+            self._send_error(400, "No text to convert to speech.")
+            return
+
+        try:
+            job = self.server.service.submit(text, voice)
+        except QueueFullError as e:
+            self._send_error(503, str(e), {"Retry-After": str(RETRY_AFTER_SECONDS)})
+            return
+        try:
+            self._stream_job(job)
+        finally:
+            job.detach()
+
+    def _stream_job(self, job: SpeechJob) -> None:
+        segments = job.segments()
+        # The status is only sent once the first segment (or an error) is in
+        try:
+            first = next(segments, None)
+        except ValueError as e:
+            self._send_error(400, str(e))
+            return
+        except Exception as e:
+            self._send_error(502, f"Speech synthesis failed: {e}")
+            return
+        if first is None:
+            self._send_error(503, "The request was cancelled.")
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        metrics.increment("server_responses", status=200)
+        try:
+            self._write_chunk(first)
+            for segment in segments:
+                self._write_chunk(segment)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client went away
+            self.close_connection = True
+        except Exception as e:
+            # Too late to report an error status: ending the connection
+            # without the final chunk tells the client the MP3 is incomplete
+            self.log_error("Synthesis failed while streaming: %s", e)
+            self.close_connection = True
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+        metrics.increment("server_bytes_sent", len(data))
+
+    def _read_body(self) -> Optional[bytes]:
+        """ Returns the request body, or None after sending an error."""
+        length = self.headers.get("Content-Length")
+        if length is None or not length.isdigit():
+            self._send_error(411, "Content-Length required")
+            return None
+        if int(length) > MAX_BODY_BYTES:
+            self._send_error(413, f"Request body larger than {MAX_BODY_BYTES} bytes")
+            self.close_connection = True
+            return None
+        return self.rfile.read(int(length))
+
+    def _send(self, status: int, content_type: str, body: bytes, headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        metrics.increment("server_responses", status=status)
+
+    def _send_error(self, status: int, message: str, headers: Optional[Dict[str, str]] = None) -> None:
+        self._send(status, "application/json", json.dumps({"error": message}).encode("utf-8"), headers)
+
+    def log_message(self, format: str, *args) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class SpeechServer(ThreadingHTTPServer):
+    """ ThreadingHTTPServer with the SpeechService its handlers submit jobs to."""
+
+    daemon_threads = True
+
+    def __init__(self, address, service: SpeechService, quiet: bool = False) -> None:
+        super().__init__(address, SpeechRequestHandler)
+        self.service = service
+        self.quiet = quiet
+
+
+def make_server(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    max_active: int = DEFAULT_MAX_ACTIVE_JOBS,
+    max_queued: int = DEFAULT_MAX_QUEUED_JOBS,
+    workers: Optional[int] = DEFAULT_WORKERS,
+    quiet: bool = False,
+) -> SpeechServer:
+    """ Creates a server (port 0 picks a free port); call serve_forever() to run it."""
+    metrics.set_metrics_enabled(True)
+    return SpeechServer((host, port), SpeechService(max_active, max_queued, workers), quiet)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Local HTTP text-to-speech service")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="run the HTTP service")
+    serve.add_argument("--host", default=DEFAULT_HOST)
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--jobs", type=int, default=DEFAULT_MAX_ACTIVE_JOBS, help="syntheses running at once")
+    serve.add_argument("--queue", type=int, default=DEFAULT_MAX_QUEUED_JOBS, help="syntheses waiting for a slot")
+    serve.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="cap on concurrent requests per synthesis (default: adaptive)")
+    serve.add_argument("--fake", action="store_true", help="use the offline fake TTS backend")
+    serve.add_argument("--fake-latency", type=float, default=0.2, help="fake backend latency in seconds")
+    serve.add_argument("--quiet", action="store_true", help="do not log every request")
+
+    args = parser.parse_args(argv)
+    if args.fake:
+        from fake_tts import make_fake_communicate
+        set_communicate_factory(make_fake_communicate(latency=args.fake_latency))
+
+    server = make_server(args.host, args.port, args.jobs, args.queue, args.workers, args.quiet)
+    host, port = server.server_address[:2]
+    print(f"Serving on http://{host}:{port} (Ctrl+C to stop)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
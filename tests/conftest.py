@@ -0,0 +1,33 @@
+"""
+Shared fixtures. The tests run offline: synthesis goes to the fake backend
+in fake_tts.py and the disk caches are turned off.
+"""
+
+import os
+import sys
+
+import pytest
+
+# The modules live at the top of the repository, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_tts import make_fake_communicate  # noqa: E402
+from pdf_processor import set_text_cache  # noqa: E402
+from tts_engine import set_communicate_factory, set_scheduler, set_synthesis_cache  # noqa: E402
+
+
+@pytest.fixture
+def fake_service():
+    """
+    A fast fake backend, no audio or text cache and a fresh request
+    scheduler; tests may install a differently configured fake on top.
+    """
+    set_communicate_factory(make_fake_communicate(latency=0.0, chars_per_second=1000.0))
+    set_synthesis_cache(enabled=False)
+    set_text_cache(enabled=False)
+    set_scheduler(None)
+    yield
+    set_communicate_factory(None)
+    set_synthesis_cache()
+    set_text_cache()
+    set_scheduler(None)
@@ -0,0 +1,46 @@
+""" The segment index of AudioBuffer."""
+
+import pytest
+
+from audio_buffer import AudioBuffer, mp3_duration
+from fake_tts import FRAME_SECONDS, SILENT_FRAME
+
+
+@pytest.fixture
+def buffer():
+    buffer = AudioBuffer()
+    for frames in (10, 20, 30):
+        buffer.append(SILENT_FRAME * frames)
+    yield buffer
+    buffer.close()
+
+
+def test_durations_come_from_the_frame_headers(buffer):
+    assert mp3_duration(SILENT_FRAME * 10) == pytest.approx(10 * FRAME_SECONDS)
+    assert buffer.duration == pytest.approx(60 * FRAME_SECONDS)
+    assert buffer.segment_start(1) == pytest.approx(10 * FRAME_SECONDS)
+    assert buffer.segment_start(2) == pytest.approx(30 * FRAME_SECONDS)
+
+
+def test_segment_at(buffer):
+    assert buffer.segment_at(0.0) == (0, 0.0)
+    # A segment's start time belongs to that segment, not the one before
+    assert buffer.segment_at(buffer.segment_start(1)) == (1, 0.0)
+    index, offset = buffer.segment_at(buffer.segment_start(1) + 0.1)
+    assert index == 1 and offset == pytest.approx(0.1)
+    index, offset = buffer.segment_at(buffer.segment_start(2) - 0.001)
+    assert index == 1 and offset == pytest.approx(20 * FRAME_SECONDS - 0.001)
+    # Times past the end stay in the last segment
+    assert buffer.segment_at(100.0)[0] == 2
+
+
+def test_segments_read_back_as_appended(buffer):
+    assert buffer.read_segment(1) == SILENT_FRAME * 20
+    assert buffer.getvalue() == SILENT_FRAME * 60
+
+
+def test_empty_buffer_has_no_segments():
+    buffer = AudioBuffer()
+    with pytest.raises(IndexError):
+        buffer.segment_at(0.0)
+    buffer.close()
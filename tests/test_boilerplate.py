@@ -0,0 +1,40 @@
+""" Removal of running headers, footers and repeated notices (boilerplate.py)."""
+
+import pytest
+
+from boilerplate import BoilerplateReport, strip_boilerplate
+from pdf_processor import PageText, extract_text_from_pdf
+from sample_data import sample_report_pages, write_sample_pdf
+
+
+@pytest.mark.parametrize("warmup", [None, 16])
+def test_removes_exactly_the_boilerplate(warmup):
+    pages, added = sample_report_pages(60)
+    clean_pages, _ = sample_report_pages(60, boilerplate=False)
+    report = BoilerplateReport()
+    stripped = list(strip_boilerplate(pages, report, warmup))
+    assert [page.text.strip() for page in stripped] == [page.text.strip() for page in clean_pages]
+    assert report.lines_removed == added
+
+
+@pytest.mark.parametrize("warmup", [None, 16])
+def test_leaves_a_clean_report_alone(warmup):
+    clean_pages, _ = sample_report_pages(60, boilerplate=False)
+    assert list(strip_boilerplate(clean_pages, None, warmup)) == clean_pages
+
+
+def test_short_pages_have_no_header_or_footer():
+    # Every line is at the edge of a page this short
+    pages = [PageText(n, "\n".join(f"Item {n}.{i}" for i in range(6))) for n in range(1, 11)]
+    assert list(strip_boilerplate(pages, None, None)) == pages
+
+
+def test_extraction_keeps_every_line_unless_asked(fake_service, tmp_path):
+    path = str(tmp_path / "report.pdf")
+    write_sample_pdf(path, 4, lines_per_page=20)
+    assert len(extract_text_from_pdf(path).split("\n")) == 4 * 20
+    # The sample lines differ only in their numbers, so the first and
+    # last EDGE_LINES lines of each page look like headers and footers
+    report = BoilerplateReport()
+    assert len(extract_text_from_pdf(path, skip_boilerplate=True, report=report).split("\n")) == 4 * 14
+    assert report.lines_removed == 4 * 6
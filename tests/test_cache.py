@@ -0,0 +1,71 @@
+""" The on-disk caches (cache.py)."""
+
+import os
+import struct
+
+import cache
+from cache import DiskCache, PageTextCache
+
+
+def test_put_get_and_eviction(tmp_path):
+    disk = DiskCache(str(tmp_path), max_bytes=10)
+    disk.put("aa01", b"12345")
+    disk.put("aa02", b"67890")
+    # Both written long ago, so only the read below makes one recent
+    for key in ("aa01", "aa02"):
+        os.utime(disk._path(key), (1000, 1000))
+    assert disk.get("aa01") == b"12345"
+    disk.put("aa03", b"abcde")
+    assert disk.get("aa02") is None
+    assert disk.get("aa01") == b"12345"
+    assert disk.stats()["hits"] == 2 and disk.stats()["misses"] == 1
+
+
+def test_read_only_entries_are_still_hits(tmp_path, monkeypatch):
+    disk = DiskCache(str(tmp_path), max_bytes=1000)
+    disk.put("aa01", b"data")
+
+    def deny(*args, **kwargs):
+        raise PermissionError("read-only cache")
+
+    monkeypatch.setattr(os, "utime", deny)
+    assert disk.get("aa01") == b"data"
+    assert disk.stats()["hits"] == 1
+
+
+def test_content_hashes_are_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_MAX_MEMO_HASHES", 3)
+    text_cache = PageTextCache(str(tmp_path / "cache"))
+    for i in range(6):
+        path = tmp_path / f"{i}.pdf"
+        path.write_bytes(b"%PDF-" + bytes([i]))
+        text_cache.make_key(str(path), "pdfplumber")
+    assert len(text_cache._hashes) == 3
+
+
+def test_damaged_text_entries_are_misses(tmp_path):
+    text_cache = PageTextCache(str(tmp_path))
+    pages = [(1, "First page"), (2, "Zweite Seite ä")]
+    list(text_cache.store("aa01", pages))
+    path = text_cache._path("aa01")
+    with open(path, "rb") as f:
+        data = f.read()
+
+    damaged = [
+        b"",
+        data[:3],
+        data[:-1],
+        data[:4] + data[30:],
+        # Index pointing past the end of the file
+        data[:-12] + struct.pack("<Q", len(data)) + data[-4:],
+        # Invalid UTF-8 in a page
+        data[:4] + b"\xff" + data[5:],
+    ]
+    for content in damaged:
+        with open(path, "wb") as f:
+            f.write(content)
+        assert text_cache.load("aa01") is None
+
+    # The next extraction overwrites the entry
+    list(text_cache.store("aa01", pages))
+    assert text_cache.load("aa01") == pages
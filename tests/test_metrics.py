@@ -0,0 +1,41 @@
+""" Counters, histograms and their export (metrics.py)."""
+
+import pytest
+
+import metrics
+
+
+@pytest.fixture
+def enabled():
+    metrics.reset()
+    metrics.set_metrics_enabled(True)
+    yield
+    metrics.set_metrics_enabled(False)
+    metrics.reset()
+
+
+def test_prometheus_values_are_exact(enabled):
+    metrics.increment("bytes", 123456789)
+    metrics.increment("ratio", 0.1)
+    metrics.observe("seconds", 1234567.25)
+    lines = metrics.export_prometheus().splitlines()
+    assert "pdf_tts_bytes_total 123456789" in lines
+    assert "pdf_tts_ratio_total 0.1" in lines
+    assert "pdf_tts_seconds_sum 1234567.25" in lines
+    assert "pdf_tts_seconds_count 1" in lines
+
+
+def test_disabled_metrics_record_nothing():
+    metrics.reset()
+    metrics.set_metrics_enabled(False)
+    metrics.increment("ignored")
+    assert metrics.snapshot() == ({}, {})
+
+
+def test_chunking_records_the_clean_text_stage(enabled):
+    from tts_engine import iter_text_chunks
+
+    chunks = list(iter_text_chunks(["First paragraph.\n\nSecond ", "paragraph."]))
+    assert chunks == ["First paragraph. Second paragraph."]
+    stages = {name: count for name, count, _ in metrics.stage_breakdown()}
+    assert stages["clean_text"] == 2
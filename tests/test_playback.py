@@ -0,0 +1,135 @@
+""" PlaybackController on the dummy SDL audio driver (no sound card needed)."""
+
+import threading
+
+import pytest
+
+from fake_tts import FRAME_SECONDS, SILENT_FRAME
+from playback import FINISHED, PAUSED, PLAYING, STOPPED, PlaybackController
+
+# Each silent frame plays for 24 ms
+SHORT = SILENT_FRAME * 10
+MEDIUM = SILENT_FRAME * 40
+LONG = SILENT_FRAME * 200
+MEDIUM_SECONDS = 40 * FRAME_SECONDS
+
+
+@pytest.fixture(scope="module")
+def controller():
+    controller = PlaybackController(audio_driver="dummy")
+    yield controller
+    controller.shutdown()
+
+
+@pytest.fixture
+def states(controller):
+    """ The states reported to a listener during one test."""
+    reported = []
+    controller.add_listener(reported.append)
+    yield reported
+    controller.stop()
+    controller.remove_listener(reported.append)
+
+
+def play_in_background(controller, segments):
+    """ Runs play_segments on a thread; returns it once playback has started."""
+    started = threading.Event()
+    result = {}
+
+    def listener(state):
+        if state == PLAYING:
+            started.set()
+
+    def run():
+        result["completed"] = controller.play_segments(iter(segments))
+
+    controller.add_listener(listener)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert started.wait(5)
+    controller.remove_listener(listener)
+    return thread, result
+
+
+def test_play_segments_finishes(controller, states):
+    assert controller.play_segments([SHORT]) is True
+    assert states == [PLAYING, FINISHED]
+    assert not controller.is_active()
+
+
+def test_stop(controller, states):
+    thread, result = play_in_background(controller, [LONG])
+    controller.stop()
+    thread.join(5)
+    assert result["completed"] is False
+    assert controller.state == STOPPED
+    assert states == [PLAYING, STOPPED]
+
+
+def test_pause_and_resume(controller, states):
+    thread, result = play_in_background(controller, [MEDIUM])
+    controller.pause()
+    assert controller.state == PAUSED
+    assert controller.is_active()
+    # Paused playback does not finish on its own
+    assert not controller.wait(0.5)
+
+    controller.resume()
+    assert controller.state == PLAYING
+    assert controller.wait(5)
+    thread.join(5)
+    assert result["completed"] is True
+    assert states == [PLAYING, PAUSED, PLAYING, FINISHED]
+
+
+def test_queued_segments_play_in_order_without_finishing_early(controller, states):
+    started = []
+
+    def on_segment(index):
+        # Each segment starts before playback is reported as finished
+        assert FINISHED not in states
+        started.append(index)
+
+    assert controller.play_segments([SHORT, SHORT, SHORT], on_segment=on_segment) is True
+    assert started == [0, 1, 2]
+    assert states == [PLAYING, FINISHED]
+
+
+def test_playback_waits_for_late_segments(controller, states):
+    def segments():
+        yield SHORT
+        # Synthesis falls behind: the first segment ends before this one arrives
+        controller.wait(0.5)
+        assert FINISHED not in states
+        yield SHORT
+
+    started = []
+    assert controller.play_segments(segments(), on_segment=started.append) is True
+    assert started == [0, 1]
+    assert states == [PLAYING, FINISHED]
+
+
+def test_seek_lands_in_the_right_segment(controller, states):
+    received = threading.Event()
+
+    def segments():
+        yield from [MEDIUM, MEDIUM, MEDIUM]
+        received.set()
+
+    thread, result = play_in_background(controller, segments())
+    controller.pause()
+    # seek() only reaches segments the buffer has received
+    assert received.wait(5)
+    controller.seek(MEDIUM_SECONDS + 0.25)
+    assert controller.current_segment == 1
+    assert controller.position() == pytest.approx(MEDIUM_SECONDS + 0.25, abs=0.05)
+
+    controller.seek(0.0)
+    assert controller.current_segment == 0
+    controller.seek_segment(2)
+    assert controller.position() == pytest.approx(2 * MEDIUM_SECONDS, abs=0.05)
+    assert controller.state == PAUSED
+
+    controller.stop()
+    thread.join(5)
+    assert result["completed"] is False
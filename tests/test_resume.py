@@ -0,0 +1,71 @@
+""" Resuming an interrupted conversion from its manifest (see manifest.py)."""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+from manifest import manifest_path_for
+from sample_data import sample_document
+from word_timing import timing_path_for
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run in a fresh interpreter: converts a text file with the offline fake
+# backend and no synthesis cache, so only the manifest can save work
+CONVERT_SCRIPT = """
+import sys
+from fake_tts import make_fake_communicate
+from tts_engine import set_communicate_factory, set_synthesis_cache, text_to_speech
+from word_timing import timing_path_for
+set_communicate_factory(make_fake_communicate(latency=0.1, chars_per_second=1000.0))
+set_synthesis_cache(enabled=False)
+with open(sys.argv[1], encoding="utf-8") as f:
+    text = f.read()
+text_to_speech(text, sys.argv[2], workers=2, timing_path=timing_path_for(sys.argv[2]))
+"""
+
+
+def convert(*paths: str) -> "subprocess.Popen":
+    return subprocess.Popen([sys.executable, "-c", CONVERT_SCRIPT, *paths], cwd=REPO)
+
+
+def read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def kill_when_done(job: "subprocess.Popen", manifest_path: str, share: float) -> None:
+    """ Kills job once `share` of its chunks are recorded in the manifest."""
+    while job.poll() is None:
+        try:
+            with open(manifest_path, encoding="utf-8") as f:
+                lines = f.read().split("\n")
+            chunk_count = len(json.loads(lines[0])["chunks"])
+            if len(lines) - 2 >= chunk_count * share:
+                job.kill()
+                break
+        except (FileNotFoundError, ValueError, IndexError):
+            pass
+        time.sleep(0.01)
+    job.wait()
+
+
+def test_killed_conversion_resumes_to_identical_output(tmp_path):
+    text_path = str(tmp_path / "book.txt")
+    with open(text_path, "w", encoding="utf-8") as f:
+        f.write("\n\n".join(sample_document(120)))
+    reference = str(tmp_path / "reference.mp3")
+    output = str(tmp_path / "book.mp3")
+    assert convert(text_path, reference).wait() == 0
+
+    kill_when_done(convert(text_path, output), manifest_path_for(output), 0.5)
+    assert not os.path.exists(output), "finished before it could be killed"
+    assert os.path.exists(output + ".part")
+
+    assert convert(text_path, output).wait() == 0
+    assert read(output) == read(reference)
+    assert read(timing_path_for(output)) == read(timing_path_for(reference))
+    assert not os.path.exists(output + ".part")
+    assert not os.path.exists(manifest_path_for(output))
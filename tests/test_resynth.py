@@ -0,0 +1,38 @@
+""" Regenerating edited text reuses the audio of unchanged chunks (SynthesisRun)."""
+
+from typing import Optional
+
+import pytest
+
+from audio_buffer import AudioBuffer
+from sample_data import sample_document
+from tts_engine import SynthesisRun, stream_speech
+
+DOCUMENT = sample_document(30)
+
+
+def generate(text: str, previous: Optional[SynthesisRun] = None) -> SynthesisRun:
+    run = SynthesisRun(AudioBuffer(), previous)
+    for segment in stream_speech(text, run=run):
+        run.buffer.append(segment)
+    run.previous = None
+    return run
+
+
+@pytest.mark.parametrize("edited_paragraph", [0, 15, 29])
+def test_one_edited_paragraph_is_synthesized_again(fake_service, edited_paragraph):
+    base = generate("\n\n".join(DOCUMENT))
+    edited = list(DOCUMENT)
+    edited[edited_paragraph] = edited[edited_paragraph].replace(" ", " typo ", 1)
+    edited_text = "\n\n".join(edited)
+
+    run = generate(edited_text, base)
+    assert run.synthesized == 1
+    assert run.reused == len(run.keys) - 1 > 0
+
+    # Reused audio is exactly what synthesizing from scratch gives
+    fresh = generate(edited_text)
+    assert fresh.keys == run.keys
+    assert run.buffer.getvalue() == fresh.buffer.getvalue()
+    for r in (base, run, fresh):
+        r.buffer.close()
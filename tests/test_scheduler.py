@@ -0,0 +1,54 @@
+""" Retries and the adaptive concurrency limit of RequestScheduler."""
+
+import random
+
+from fake_tts import make_fake_communicate
+from sample_data import sample_document
+from tts_engine import RequestScheduler, get_scheduler, set_communicate_factory, set_scheduler, text_to_speech
+
+TEXT = "\n\n".join(sample_document(200))
+
+
+def convert(tmp_path, name: str, **kwargs) -> bytes:
+    path = str(tmp_path / name)
+    text_to_speech(TEXT, path, resume=False, **kwargs)
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_failures_stalls_and_throttling_are_retried(fake_service, tmp_path):
+    expected = convert(tmp_path, "clean.mp3")
+
+    set_communicate_factory(make_fake_communicate(
+        latency=0.05,
+        chars_per_second=1000.0,
+        latency_jitter=0.05,
+        failure_rate=0.1,
+        stall_rate=0.01,
+        max_concurrent=6,
+        rng=random.Random(1),
+    ))
+    set_scheduler(RequestScheduler(timeout=1.0, base_delay=0.05, max_delay=1.0))
+    assert convert(tmp_path, "throttled.mp3") == expected
+
+    stats = get_scheduler().stats()
+    assert stats["failures"] > 0
+    assert stats["retries"] >= stats["failures"]
+
+
+def test_limit_grows_when_the_service_keeps_up(fake_service, tmp_path):
+    fake = make_fake_communicate(latency=0.05, chars_per_second=1000.0, max_concurrent=50)
+    set_communicate_factory(fake)
+    set_scheduler(RequestScheduler(initial_limit=2))
+    convert(tmp_path, "out.mp3")
+
+    # Nothing in front of the scheduler may hold the limit at its start
+    assert get_scheduler().stats()["limit"] > 4
+    assert fake.peak_active > 2
+
+
+def test_workers_caps_one_job(fake_service, tmp_path):
+    fake = make_fake_communicate(latency=0.02, chars_per_second=1000.0)
+    set_communicate_factory(fake)
+    convert(tmp_path, "out.mp3", workers=2)
+    assert fake.peak_active <= 2
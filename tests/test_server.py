@@ -0,0 +1,134 @@
+""" The HTTP synthesis service (server.py), end to end with the fake backend."""
+
+import http.client
+import json
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+import pytest
+
+import metrics
+from fake_tts import make_fake_communicate
+from sample_data import sample_document, write_sample_pdf
+from server import SpeechJob, document_text, make_server
+from tts_engine import set_communicate_factory, stream_speech
+
+TEXT = "\n\n".join(sample_document(30))
+
+
+@pytest.fixture
+def server(fake_service):
+    """ A server with one job slot and one queue place, serving on a free port."""
+    set_communicate_factory(make_fake_communicate(latency=0.2, chars_per_second=1000.0))
+    server = make_server(port=0, max_active=1, max_queued=1, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    server.service.shutdown()
+
+
+def request(server, method: str, path: str, body: Optional[bytes] = None) -> Tuple[int, bytes]:
+    """ (status, body) of one request to the server."""
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=60)
+    try:
+        connection.request(method, path, body=body)
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+
+def speech(text: str) -> bytes:
+    return json.dumps({"text": text}).encode("utf-8")
+
+
+def run_together(calls: List[Callable[[], Tuple[int, bytes]]]) -> List[Tuple[int, bytes]]:
+    """ Runs the calls at the same time and returns their results in order."""
+    results: List[Optional[Tuple[int, bytes]]] = [None] * len(calls)
+
+    def run(i: int) -> None:
+        results[i] = calls[i]()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(calls))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def wait_for(condition: Callable[[], bool], timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def counter(name: str) -> float:
+    counters, _ = metrics.snapshot()
+    return counters.get((name, ()), 0.0)
+
+
+def test_identical_requests_share_one_synthesis(server):
+    expected = b"".join(stream_speech(TEXT))
+    started, coalesced = counter("server_jobs_started"), counter("server_jobs_coalesced")
+    results = run_together([lambda: request(server, "POST", "/speech", speech(TEXT))] * 8)
+    assert all(result == (200, expected) for result in results)
+    assert counter("server_jobs_started") - started == 1
+    assert counter("server_jobs_coalesced") - coalesced == 7
+
+
+def test_full_queue_answers_503(server):
+    service = server.service
+    set_communicate_factory(make_fake_communicate(latency=1.0, chars_per_second=1000.0))
+    results = []
+    running = threading.Thread(target=lambda: results.append(request(server, "POST", "/speech", speech("One."))))
+    running.start()
+    wait_for(lambda: service.stats()["jobs_running"] == 1)
+    queued = threading.Thread(target=lambda: results.append(request(server, "POST", "/speech", speech("Two."))))
+    queued.start()
+    wait_for(lambda: service.stats()["jobs_queued"] == 1)
+
+    assert request(server, "POST", "/speech", speech("Three."))[0] == 503
+    running.join()
+    queued.join()
+    assert [status for status, _ in results] == [200, 200]
+
+
+def test_document_uploads(server, tmp_path):
+    path = tmp_path / "upload.pdf"
+    write_sample_pdf(str(path), 4, lines_per_page=5)
+    status, audio = request(server, "POST", "/document", path.read_bytes())
+    assert status == 200 and audio
+
+    status, audio = request(server, "POST", "/document", "Plain text upload, café.".encode("cp1252"))
+    assert status == 200 and audio
+
+
+def test_bad_request_answers_400(server):
+    assert request(server, "POST", "/speech", b"not json")[0] == 400
+
+
+def test_health_and_metrics(server):
+    request(server, "POST", "/speech", speech("Counted."))
+    status, health = request(server, "GET", "/health")
+    assert status == 200 and json.loads(health)["status"] == "ok"
+    status, exposition = request(server, "GET", "/metrics")
+    assert status == 200 and b"pdf_tts_server_jobs_started_total" in exposition
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "utf-8-sig", "utf-16", "cp1252"])
+def test_text_uploads_in_any_encoding(encoding):
+    assert document_text("Café au lait.\n".encode(encoding)) == "Café au lait.\n"
+
+
+def test_finished_job_cannot_be_joined_after_release():
+    job = SpeechJob("key", "Text.", "voice", None)
+    assert job.attach()
+    job.done = True
+    job.detach()
+    # The last reader released the audio; a new request needs a new job
+    assert not job.attach()
@@ -0,0 +1,47 @@
+"""
+The single-pass and streaming normalizers must give exactly what the
+original three-pass cleanup (sample_data.three_pass_clean) gave, however
+the text is split into pieces.
+"""
+
+from hypothesis import given, settings, strategies as st
+
+from sample_data import three_pass_clean
+from text_normalizer import clean_text, iter_clean_text
+from tts_engine import iter_text_chunks
+
+# Whitespace-heavy text: words, sentence ends and every kind of line break
+TOKENS = ["Word", "a", "x.", "y!", "z?", ".", " ", "  ", "\n", "\n\n", " \n ", "\t", "\r", "\xa0", "\x85"]
+
+texts = st.lists(st.sampled_from(TOKENS), max_size=60).map("".join)
+
+
+@st.composite
+def split_texts(draw):
+    """ A text and the same text cut at random places (pieces may be empty)."""
+    text = draw(texts)
+    cuts = sorted(draw(st.lists(st.integers(0, len(text)), max_size=8)))
+    return text, [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+
+
+@given(texts)
+def test_single_pass_matches_reference(text):
+    assert clean_text(text) == three_pass_clean(text)
+
+
+@given(st.text())
+def test_single_pass_matches_reference_on_any_text(text):
+    assert clean_text(text) == three_pass_clean(text)
+
+
+@given(split_texts())
+def test_stream_matches_reference(split):
+    text, pieces = split
+    assert "".join(iter_clean_text(pieces)) == three_pass_clean(text)
+
+
+@settings(max_examples=300)
+@given(split_texts(), st.sampled_from([5, 40, 1500]))
+def test_chunks_do_not_depend_on_the_pieces(split, max_chars):
+    text, pieces = split
+    assert list(iter_text_chunks(pieces, max_chars)) == list(iter_text_chunks([text], max_chars))
@@ -0,0 +1,67 @@
+""" Encoding detection and block-wise reading of TXT files (iter_txt_pages)."""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+from hypothesis import given, strategies as st
+
+import pdf_processor
+from pdf_processor import TextFile, detect_text_encoding, iter_txt_pages
+from sample_data import sample_document
+from tts_engine import text_to_speech
+
+TOKENS = ["Word", "a", " ", "\n", "\r", "\r\n", "\n\n", "\xe9", "€", "日"]
+
+
+@contextmanager
+def txt_limits(page_bytes: int, max_line_chars: int):
+    """ Temporarily changes the TXT page size and line limit of pdf_processor."""
+    saved = pdf_processor.TXT_PAGE_BYTES, pdf_processor.TXT_MAX_LINE_CHARS
+    pdf_processor.TXT_PAGE_BYTES, pdf_processor.TXT_MAX_LINE_CHARS = page_bytes, max_line_chars
+    try:
+        yield
+    finally:
+        pdf_processor.TXT_PAGE_BYTES, pdf_processor.TXT_MAX_LINE_CHARS = saved
+
+
+@st.composite
+def encoded_texts(draw):
+    encoding = draw(st.sampled_from(["utf-8", "utf-8-sig", "utf-16", "cp1252"]))
+    tokens = TOKENS if encoding != "cp1252" else [t for t in TOKENS if t != "日"]
+    text = "".join(draw(st.lists(st.sampled_from(tokens), max_size=60)))
+    if encoding == "cp1252":
+        # Short cp1252 texts can be valid UTF-8 by chance; "\xe9 " never is
+        text = "\xe9 " + text
+    return encoding, text
+
+
+@given(encoded_texts(), st.sampled_from([4, 7, 64]))
+def test_pages_match_text_mode(encoded, page_bytes):
+    # Tiny pages split characters and \r\n pairs between blocks
+    encoding, text = encoded
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "sample.txt")
+        with open(path, "wb") as f:
+            f.write(text.encode(encoding))
+        with open(path, "r", encoding=encoding) as f:
+            expected = f.read()
+        with txt_limits(page_bytes, 1024):
+            pages = list(iter_txt_pages(path))
+        with open(path, "rb") as f:
+            assert detect_text_encoding(f.read(), whole_file=True) == encoding
+    assert "\n".join(page.text for page in pages) == expected
+
+
+def test_streamed_file_synthesizes_like_its_text(fake_service, tmp_path):
+    document = "\n\n".join(sample_document(40))
+    path = str(tmp_path / "book.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(document)
+    whole_path = str(tmp_path / "whole.mp3")
+    streamed_path = str(tmp_path / "streamed.mp3")
+    text_to_speech(document, whole_path, resume=False)
+    with txt_limits(1024, 4096):
+        text_to_speech(TextFile(path), streamed_path)
+    with open(whole_path, "rb") as whole, open(streamed_path, "rb") as streamed:
+        assert whole.read() == streamed.read()
@@ -0,0 +1,105 @@
+""" The voice catalog: bundled list, saved snapshot, background refresh and filters."""
+
+import time
+
+import pytest
+
+from fake_tts import FakeVoiceList
+from sample_data import sample_voices
+from tts_engine import DEFAULT_VOICE
+from voices import VoiceCatalog, set_voice_fetcher
+
+VOICE_COUNT = 400
+
+
+@pytest.fixture
+def fetcher():
+    fetcher = FakeVoiceList(sample_voices(VOICE_COUNT), latency=0.2)
+    set_voice_fetcher(fetcher)
+    yield fetcher
+    set_voice_fetcher(None)
+
+
+@pytest.fixture
+def snapshot(tmp_path, fetcher):
+    """ Path of a snapshot saved by a refresh from the fetcher."""
+    path = str(tmp_path / "voices.json")
+    assert VoiceCatalog(path).refresh().result(timeout=5)
+    return path
+
+
+def test_bundled_voices_without_a_snapshot(tmp_path, fetcher):
+    catalog = VoiceCatalog(str(tmp_path / "voices.json"))
+    assert catalog.source == "bundled"
+    assert catalog.is_stale()
+    assert catalog.get(DEFAULT_VOICE) is not None
+    assert fetcher.calls == 0
+
+
+def test_refresh_runs_in_the_background(tmp_path, fetcher):
+    catalog = VoiceCatalog(str(tmp_path / "voices.json"))
+    updates = []
+    catalog.add_listener(lambda c: updates.append(len(c.voices)))
+
+    start = time.perf_counter()
+    future = catalog.refresh()
+    assert time.perf_counter() - start < fetcher.latency / 2
+    # A refresh already running is shared
+    assert catalog.refresh() is future
+    assert future.result(timeout=5)
+
+    assert fetcher.calls == 1
+    assert catalog.source == "service"
+    assert len(catalog.voices) == VOICE_COUNT
+    assert updates == [VOICE_COUNT]
+
+
+def test_snapshot_is_loaded_and_not_fetched_while_fresh(snapshot, fetcher):
+    catalog = VoiceCatalog(snapshot)
+    assert catalog.source == "snapshot"
+    assert len(catalog.voices) == VOICE_COUNT
+    assert catalog.refresh() is None
+    assert fetcher.calls == 1
+
+
+def test_expired_snapshot_is_refreshed(snapshot, fetcher):
+    assert VoiceCatalog(snapshot, ttl=0).refresh().result(timeout=5)
+    assert fetcher.calls == 2
+
+
+def test_offline_keeps_the_snapshot(snapshot):
+    saved = VoiceCatalog(snapshot).voices
+    set_voice_fetcher(FakeVoiceList(fail=True))
+    catalog = VoiceCatalog(snapshot, ttl=0)
+    assert catalog.refresh().result(timeout=5) is False
+    assert catalog.source == "snapshot"
+    assert catalog.voices == saved
+    assert catalog.last_error is not None
+
+
+def test_offline_without_a_snapshot_keeps_the_bundled_voices(tmp_path):
+    set_voice_fetcher(FakeVoiceList(fail=True))
+    try:
+        catalog = VoiceCatalog(str(tmp_path / "voices.json"))
+        assert catalog.refresh().result(timeout=5) is False
+        assert catalog.source == "bundled"
+    finally:
+        set_voice_fetcher(None)
+
+
+def test_damaged_snapshot_falls_back_to_the_bundled_voices(tmp_path):
+    path = tmp_path / "voices.json"
+    path.write_text('{"version": 1, "voices": [', encoding="utf-8")
+    catalog = VoiceCatalog(str(path))
+    assert catalog.source == "bundled"
+    assert catalog.last_error is not None
+
+
+def test_filters_match_a_scan(snapshot):
+    catalog = VoiceCatalog(snapshot)
+    for locale in (None,) + catalog.index.locales:
+        for gender in (None, "Female", "Male"):
+            assert list(catalog.filter(locale, gender)) == [
+                voice for voice in catalog.voices
+                if (locale is None or voice.locale == locale) and (gender is None or voice.gender == gender)
+            ]
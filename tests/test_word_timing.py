@@ -0,0 +1,79 @@
+""" Word boundaries and the word timing index (word_timing.py)."""
+
+import pytest
+from hypothesis import given, strategies as st
+
+from fake_tts import FRAME_SECONDS, SILENT_FRAME
+from tts_engine import _clean_text_with_offsets
+from word_timing import (
+    TICKS_PER_SECOND,
+    WordAligner,
+    WordTimingIndex,
+    pack_boundaries,
+    unpack_boundaries,
+)
+
+ticks = st.integers(0, 2 ** 64 - 1)
+# Words never contain a newline (see pack_boundaries)
+words = st.text(st.characters(blacklist_categories=("Cs",), blacklist_characters="\n"))
+
+
+@given(st.lists(st.tuples(ticks, ticks, words)))
+def test_boundaries_round_trip(boundaries):
+    assert unpack_boundaries(pack_boundaries(boundaries)) == boundaries
+
+
+@pytest.fixture
+def index():
+    # "One two" followed by "three" in a second chunk
+    index = WordTimingIndex()
+    index.append(0, 3, 0.0, 0.4)
+    index.append(4, 3, 0.5, 0.3)
+    index.append(10, 5, 1.2, 0.6)
+    return index
+
+
+def test_word_at(index):
+    assert index.word_at(-0.1) is None
+    assert index.word_at(0.0) == (0, 3)
+    assert index.word_at(0.45) == (0, 3)
+    assert index.word_at(0.5) == (4, 7)
+    assert index.word_at(1.2) == (10, 15)
+    assert index.word_at(99.0) == (10, 15)
+
+
+def test_time_at(index):
+    assert index.time_at(0) == 0.0
+    assert index.time_at(2) == 0.0
+    # Between words: the next word
+    assert index.time_at(3) == 0.5
+    assert index.time_at(8) == 1.2
+    assert index.time_at(14) == 1.2
+    assert index.time_at(15) is None
+
+
+def test_save_and_load(index, tmp_path):
+    path = str(tmp_path / "book.words")
+    index.save(path)
+    loaded = WordTimingIndex.load(path)
+    assert len(loaded) == 3
+    assert [loaded.word_at(t) for t in (0.0, 0.5, 1.2)] == [(0, 3), (4, 7), (10, 15)]
+
+
+def test_aligner_offsets_later_chunks():
+    text = "One  two\n\nthree"
+    cleaned, offsets = _clean_text_with_offsets(text)
+    assert cleaned == "One two three"
+    timing = WordTimingIndex()
+    aligner = WordAligner(cleaned, offsets, timing)
+    first = SILENT_FRAME * 50
+    aligner.add_segment(first, [(0, 4_000_000, "One"), (5_000_000, 3_000_000, "two")])
+    aligner.add_segment(SILENT_FRAME * 10, [(1_000_000, 6_000_000, "three")])
+
+    # Words map back to the uncleaned text
+    assert [timing.word_at(t) for t in (0.0, 0.5)] == [(0, 3), (5, 8)]
+    # The second chunk's words start after the first chunk's audio
+    second_start = 50 * FRAME_SECONDS + 1_000_000 / TICKS_PER_SECOND
+    assert timing.time_at(text.index("three")) == pytest.approx(second_start)
+    assert timing.word_at(second_start + 0.01) == (10, 15)
+    assert timing.time_at(text.index("\n")) == pytest.approx(second_start)
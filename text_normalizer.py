@@ -0,0 +1,146 @@
+"""
+Whitespace normalization of text before it is spoken.
+clean_text() makes a single regex pass over the text. The iter_* functions
+do the same work on a stream of pieces (pages, lines, file blocks), so a
+multi-megabyte document never has to be held or copied as one string:
+
+    iter_clean_text(pieces)  -> the cleaned text, piece by piece
+    iter_sentences(pieces)   -> (sentence, ends_paragraph) pairs, ready to
+                                be grouped into chunks for synthesis
+
+Pieces are concatenated exactly as given; add a separator ("\\n") to each
+page yourself if the pages should not run together. Every function gives
+the same result as the original three-pass cleaner:
+
+    text = re.sub(r"\\n\\s*\\n", " ", text)
+    text = text.replace("\\n", " ")
+    text = re.sub(r" +", " ", text).strip()
+"""
+
+import re
+from typing import Dict, Iterable, Iterator, Tuple
+
+import metrics
+
+# Paragraph break: a blank line
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+# Sentence boundary: whitespace that follows ., ! or ?
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+# Whitespace runs that cleaning may change: every run except a single
+# space (the most common one, which is left alone without a function call)
+_CHANGING_WHITESPACE = re.compile(r"[^\S ]\s*| \s+")
+_SPACES = re.compile(r" +")
+
+# Cleaned form of each whitespace run seen so far; documents only contain
+# a handful of distinct runs ("\n", "\n\n", "  ", ...)
+_run_cache: Dict[str, str] = {}
+_RUN_CACHE_SIZE = 4096
+
+
+def _clean_run(match: "re.Match") -> str:
+    """ Cleaned form of one whitespace run between two words."""
+    run = match.group()
+    cleaned = _run_cache.get(run)
+    if cleaned is None:
+        if run.count("\n") >= 2:
+            # A paragraph break: everything from the first to the last
+            # newline becomes one space
+            cleaned = run[:run.index("\n")] + " " + run[run.rindex("\n") + 1:]
+        else:
+            cleaned = run.replace("\n", " ")
+        cleaned = _SPACES.sub(" ", cleaned)
+        if len(_run_cache) < _RUN_CACHE_SIZE:
+            _run_cache[run] = cleaned
+    return cleaned
+
+
+def _content_end(text: str) -> int:
+    """ Index just past the last non-whitespace character (0 if there is none)."""
+    end = len(text)
+    while end and text[end - 1].isspace():
+        end -= 1
+    return end
+
+
+def clean_text(text: str) -> str:
+    """
+    Cleans text to remove unwanted pauses from line breaks:
+    paragraph breaks and single newlines become spaces, runs of spaces
+    become one space, and leading/trailing whitespace is removed.
+    """
+    return _CHANGING_WHITESPACE.sub(_clean_run, text.strip())
+
+
+def iter_clean_text(pieces: Iterable[str]) -> Iterator[str]:
+    """
+    Yields the cleaned text of "".join(pieces) in parts, one per piece
+    that adds text. Only the whitespace at the end of the last piece (which
+    may continue in the next one) is held back.
+    """
+    # The last word character plus the whitespace after it; the whitespace
+    # can only be cleaned once it is known where it ends
+    carry = ""
+    started = False
+    for piece in pieces:
+        text = carry + piece
+        end = _content_end(text)
+        if not end:
+            # Nothing but whitespace so far
+            carry = text if started else ""
+            continue
+        cleaned = _CHANGING_WHITESPACE.sub(_clean_run, text[:end])
+        # The carried character was already yielded with the previous part
+        yield cleaned[1:] if started else cleaned.lstrip()
+        started = True
+        carry = text[end - 1:]
+
+
+def _paragraph_sentences(paragraph: str, ends_paragraph: bool) -> Iterator[Tuple[str, bool]]:
+    with metrics.stage("clean_text"):
+        cleaned = clean_text(paragraph)
+    if not cleaned:
+        return
+    sentences = SENTENCE_END.split(cleaned)
+    for sentence in sentences[:-1]:
+        yield sentence, False
+    yield sentences[-1], ends_paragraph
+
+
+def iter_sentences(pieces: Iterable[str]) -> Iterator[Tuple[str, bool]]:
+    """
+    Splits "".join(pieces) into paragraphs (at PARAGRAPH_BREAK), cleans
+    each one and yields its sentences (split at SENTENCE_END) as
+    (sentence, ends_paragraph) pairs. Empty paragraphs yield nothing.
+    A sentence is yielded as soon as the text after it has started, so
+    only the unfinished sentence is kept between pieces.
+    """
+    # Raw text of the paragraph being read, from its first unyielded sentence
+    pending = ""
+    for piece in pieces:
+        if not piece:
+            continue
+        # Paragraph and sentence breaks that finished before this piece
+        # were handled already; the trailing whitespace may continue
+        scan_from = _content_end(pending)
+        pending += piece
+        # Whitespace past `complete` may still continue in the next piece
+        complete = _content_end(pending)
+
+        start = 0
+        for match in PARAGRAPH_BREAK.finditer(pending, scan_from, complete):
+            yield from _paragraph_sentences(pending[start:match.start()], True)
+            start = match.end()
+
+        # Complete sentences of the unfinished paragraph can go already
+        last_end = None
+        for last_end in SENTENCE_END.finditer(pending, max(start, scan_from), complete):
+            pass
+        if last_end is not None and last_end.start() > start:
+            yield from _paragraph_sentences(pending[start:last_end.start()], False)
+            start = last_end.end()
+
+        if start:
+            pending = pending[start:]
+
+    yield from _paragraph_sentences(pending, True)
@@ -1,109 +1,1031 @@
-import asyncio
+import itertools
+import math
 import os
+import queue
+import random
 import re
-from typing import Iterable, List
-import edge_tts
-import pygame
+import threading
 import time
+import zlib
+from array import array
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+import metrics
+from audio_buffer import AudioBuffer
+from cache import SynthesisCache
+from manifest import ConversionManifest, SegmentRecord, manifest_path_for
+from playback import get_controller
+from text_normalizer import iter_sentences
+from word_timing import WordAligner, WordBoundary, WordTimingIndex, pack_boundaries, unpack_boundaries
 
 # This provides a blocking text-to-speech function  you can call from the GUI.
 # Can both generate and play audio files.
+# edge_tts, asyncio and pygame are heavy, so they are only imported by the
+# functions that need them: importing this module stays fast, and synthesis
+# can run on machines without audio (see batch.py).
+# Playback is handled by the shared controller in playback.py.
 
 DEFAULT_VOICE = "en-GB-RyanNeural"
 
+# Text to synthesize: a str, or pieces of text that can be iterated more
+# than once (see text_to_speech)
+TextSource = Union[str, Iterable[str]]
+
+# Long documents are split into chunks of at most this many characters
+# and synthesized concurrently. How many requests run at once is decided
+# by the shared RequestScheduler; `workers` can cap it for a single job
+# (None: no cap of its own).
+DEFAULT_CHUNK_CHARS = 1500
+DEFAULT_WORKERS: Optional[int] = None
+
+# When streaming, the first chunk is kept short (about one sentence)
+# so playback can start as soon as possible.
+FIRST_CHUNK_CHARS = 200
+
+# Finished segments waiting to be played; stream_speech() stops
+# synthesizing ahead once this many are queued.
+STREAM_LOOKAHEAD_SEGMENTS = 4
+
+# Chunk boundaries are anchored to the content: once a chunk holds at least
+# MIN_CHUNK_CHARS, it ends at the next paragraph end or at a sentence whose
+# hash is divisible by CHUNK_ANCHOR_EVERY. An edit therefore only changes
+# the chunks around it, and every other chunk keeps its cached audio.
+MIN_CHUNK_CHARS = 300
+CHUNK_ANCHOR_EVERY = 8
+
+# Requests to the service go through one RequestScheduler (see below).
+# Its concurrency limit starts at SCHEDULER_INITIAL_LIMIT and adapts
+# between SCHEDULER_MIN_LIMIT and SCHEDULER_MAX_LIMIT.
+SCHEDULER_INITIAL_LIMIT = 4
+SCHEDULER_MIN_LIMIT = 1
+SCHEDULER_MAX_LIMIT = 32
+# Failed requests are retried this many times, waiting a random time of up
+# to RETRY_BASE_DELAY * 2**attempt seconds (at most RETRY_MAX_DELAY)
+MAX_RETRIES = 4
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 20.0
+# A chunk request taking longer than this is abandoned and retried
+CHUNK_TIMEOUT = 60.0
+# A request is a latency spike if it takes this many times longer than
+# usual (per character of text)
+LATENCY_SPIKE_FACTOR = 3.0
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float("inf"))
+
+# Bump when a change would make previously cached audio wrong
+# (2: word timings are cached with the audio)
+ENGINE_VERSION = "2"
+
+# Factory used to create the edge-tts communicator for each chunk.
+# None means edge_tts.Communicate; see set_communicate_factory().
+_communicate_factory = None
+
+# Cache of synthesized chunks. Created on first use; see set_synthesis_cache().
+_synthesis_cache: Optional[SynthesisCache] = None
+_cache_enabled = True
+
+
+def _clean_text_with_offsets(text: str) -> Tuple[str, array]:
+    """
+    Same result as text_normalizer.clean_text(text), plus the position in `text`
+    of every character of the result, so words found in the cleaned text
+    can be located in the original.
+    """
+    out: List[str] = []
+    offsets = array("I")
+    pos = 0
+    for match in re.finditer(r"\s+", text):
+        start, end = match.span()
+        # Text between whitespace runs is kept as is
+        out.append(text[pos:start])
+        offsets.extend(range(pos, start))
+        pos = end
+        # Leading and trailing whitespace is stripped
+        if start == 0 or end == len(text):
+            continue
+
+        run = match.group()
+        if run.count("\n") >= 2:
+            # A paragraph break: everything from the first to the last
+            # newline becomes one space
+            first, last = run.index("\n"), run.rindex("\n")
+            kept = [(c, start + i) for i, c in enumerate(run[:first])]
+            kept.append((" ", start + first))
+            kept.extend((c, start + last + 1 + i) for i, c in enumerate(run[last + 1:]))
+        else:
+            kept = [(" " if c == "\n" else c, start + i) for i, c in enumerate(run)]
+
+        # Runs of spaces become a single space
+        previous = ""
+        for c, offset in kept:
+            if c == " " and previous == " ":
+                continue
+            out.append(c)
+            offsets.append(offset)
+            previous = c
+
+    out.append(text[pos:])
+    offsets.extend(range(pos, len(text)))
+    return "".join(out), offsets
+
+
+def set_communicate_factory(factory=None) -> None:
+    """
+    Replaces edge_tts.Communicate with another factory (for example
+    fake_tts.FakeCommunicate) so synthesis can run without a network.
+    Pass None to restore the real edge-tts service.
+    """
+    global _communicate_factory
+    _communicate_factory = factory
+
+
+def _is_chunk_anchor(sentence: str) -> bool:
+    """ True for about one sentence in CHUNK_ANCHOR_EVERY, decided by its content only."""
+    return zlib.crc32(sentence.encode("utf-8")) % CHUNK_ANCHOR_EVERY == 0
+
+
+def iter_text_chunks(
+    pieces: Iterable[str], max_chars: int = DEFAULT_CHUNK_CHARS, first_chunk_chars: Optional[int] = None
+) -> Iterator[str]:
+    """
+    Yields the cleaned chunks of "".join(pieces), at most max_chars
+    characters each, while the pieces (e.g. pages) are still being read.
+    Chunks end at sentence boundaries; a single sentence longer than
+    the limit is split at the last space that fits. Paragraph ends and
+    anchor sentences end a chunk early (see MIN_CHUNK_CHARS), so the
+    chunks of unchanged text stay the same when the text is edited.
+    If first_chunk_chars is given, the first chunk uses that smaller limit.
+    """
+    emitted = 0
+    current = ""
+    for sentence, ends_paragraph in iter_sentences(pieces):
+        # The first chunk may have its own (smaller) limit
+        limit = max_chars if emitted or first_chunk_chars is None else first_chunk_chars
+
+        # Break up sentences that are too long on their own
+        while len(sentence) > limit:
+            cut = sentence.rfind(" ", 0, limit + 1)
+            if cut <= 0:
+                cut = limit
+            if current:
+                yield current
+                emitted += 1
+                current = ""
+            yield sentence[:cut].strip()
+            emitted += 1
+            sentence = sentence[cut:].strip()
+            limit = max_chars
+
+        if not sentence:
+            continue
+        if current and len(current) + 1 + len(sentence) > limit:
+            yield current
+            emitted += 1
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+
+        if len(current) >= MIN_CHUNK_CHARS and (ends_paragraph or _is_chunk_anchor(sentence)):
+            yield current
+            emitted += 1
+            current = ""
+
+    if current:
+        yield current
+
+
+def _split_into_chunks(
+    text: str, max_chars: int = DEFAULT_CHUNK_CHARS, first_chunk_chars: Optional[int] = None
+) -> List[str]:
+    """ Splits text into cleaned chunks; see iter_text_chunks()."""
+    return list(iter_text_chunks([text], max_chars, first_chunk_chars))
+
+
+def set_synthesis_cache(cache: Optional[SynthesisCache] = None, enabled: bool = True) -> None:
+    """
+    Configures the on-disk cache of synthesized chunks.
+    Pass a SynthesisCache to use a different directory or byte budget,
+    or enabled=False to always synthesize from scratch.
+    """
+    global _synthesis_cache, _cache_enabled
+    _synthesis_cache = cache
+    _cache_enabled = enabled
+
+
+def get_synthesis_cache() -> Optional[SynthesisCache]:
+    """ Returns the active synthesis cache, or None if caching is disabled."""
+    global _synthesis_cache
+    if not _cache_enabled:
+        return None
+    if _synthesis_cache is None:
+        _synthesis_cache = SynthesisCache()
+    return _synthesis_cache
+
+
+def _engine_version() -> str:
+    """
+    Version string that is part of every cache key. Audio from a replaced
+    communicator (such as the offline fake) never mixes with real audio.
+    """
+    if _communicate_factory is None:
+        import edge_tts
+        return f"{ENGINE_VERSION}/edge-tts-{edge_tts.__version__}"
+    factory = _communicate_factory
+    return f"{ENGINE_VERSION}/{factory.__module__}.{factory.__qualname__}"
+
+
+class SynthesisRun:
+    """
+    Record of one generation: the key (content hash) and word boundaries
+    of every segment, in order, plus the AudioBuffer holding the segments.
+    A new generation given the previous run as `previous` takes the audio
+    of every chunk whose key it already has from the previous buffer, so
+    after an edit only the changed chunks are synthesized again (even with
+    the disk cache disabled).
+    """
+
+    def __init__(self, buffer: AudioBuffer, previous: Optional["SynthesisRun"] = None) -> None:
+        self.buffer = buffer
+        self.previous = previous
+        self.keys: List[str] = []
+        self.boundaries: List[List[WordBoundary]] = []
+        self._index: dict = {}
+        # Number of chunks taken from the previous run
+        self.reused = 0
+
+    @property
+    def synthesized(self) -> int:
+        """ Number of chunks synthesized (or read from the disk cache) so far."""
+        return len(self.keys) - self.reused
+
+    def record(self, key: str, boundaries: List[WordBoundary]) -> None:
+        """ Records the next segment; it must be appended to self.buffer in the same order."""
+        self._index.setdefault(key, len(self.keys))
+        self.keys.append(key)
+        self.boundaries.append(boundaries)
+
+    def lookup(self, key: str) -> Optional[Tuple[bytes, List[WordBoundary]]]:
+        """ Returns (audio, word boundaries) of a recorded segment, if its audio is buffered."""
+        index = self._index.get(key)
+        if index is None or index >= self.buffer.segment_count:
+            return None
+        return self.buffer.read_segment(index), self.boundaries[index]
 
-def _clean_text_for_speech(text: str) -> str:
+
+class RequestScheduler:
     """
-    Cleans text to remove unwanted pauses from line breaks.
-    - Replaces single newlines with spaces (line breaks within sentences)
-    - Converts paragraph breaks (double+ newlines) to single spaces
-    - Normalizes multiple spaces to single spaces
-    - Removes leading/trailing whitespace
+    Runs requests to the synthesis service with an adaptive concurrency
+    limit, per-request timeouts and retries.
+
+    The limit follows AIMD (additive increase, multiplicative decrease, as
+    in TCP congestion control): every successful request while the limit
+    is in use raises it by 1/limit (about +1 per round of requests), and a
+    failure, timeout or latency spike halves it, at most once per typical
+    request duration. Failed requests are retried with exponential backoff
+    and full jitter, so throttled clients don't retry in lockstep.
+
+    One scheduler is shared by every synthesis in the process (see
+    get_scheduler()); stats() can be called from any thread.
     """
-    # Replace multiple newlines (paragraph breaks) with a single space
-    text = re.sub(r"\n\s*\n", " ", text)
-    
-    # Replace all remaining single newlines with spaces
-    text = text.replace("\n", " ")
-    
-    # Normalize multiple spaces to single spaces
-    text = re.sub(r" +", " ", text)
-    
-    # Remove leading/trailing whitespace
-    return text.strip()
 
+    def __init__(
+        self,
+        initial_limit: float = SCHEDULER_INITIAL_LIMIT,
+        min_limit: int = SCHEDULER_MIN_LIMIT,
+        max_limit: int = SCHEDULER_MAX_LIMIT,
+        max_retries: int = MAX_RETRIES,
+        timeout: float = CHUNK_TIMEOUT,
+        base_delay: float = RETRY_BASE_DELAY,
+        max_delay: float = RETRY_MAX_DELAY,
+    ) -> None:
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        # Futures of requests waiting for a free slot, in arrival order
+        self._waiters: Deque = deque()
+        self._last_decrease = 0.0
+        # Smoothed seconds per character of text, for spotting latency spikes
+        self._cost_average: Optional[float] = None
+        self._samples = 0
+
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.latency_counts = [0] * len(LATENCY_BUCKETS)
+
+    async def _acquire(self) -> None:
+        import asyncio
+        with self._lock:
+            if not self._waiters and self._in_flight < int(self.limit):
+                self._in_flight += 1
+                return
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+        try:
+            # _wake_waiters() takes the slot on our behalf before waking us
+            await waiter
+        except BaseException:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise
+            if not waiter.cancelled():
+                # Woken and cancelled at the same time: give the slot back
+                # (if the waiter itself was cancelled, _resolve_waiter does)
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        with self._lock:
+            while self._waiters and self._in_flight < int(self.limit):
+                waiter = self._waiters.popleft()
+                self._in_flight += 1
+                waiter.get_loop().call_soon_threadsafe(_resolve_waiter, waiter, self)
+
+    def _record_latency(self, seconds: float) -> None:
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.latency_counts[i] += 1
+                return
+
+    def _decrease(self) -> None:
+        """ Halves the limit, unless it was just halved (lock held)."""
+        now = time.monotonic()
+        cooldown = max(0.5, (self._cost_average or 0.0) * DEFAULT_CHUNK_CHARS)
+        if now - self._last_decrease >= cooldown:
+            self.limit = max(float(self.min_limit), self.limit / 2)
+            self._last_decrease = now
 
-async def _save_tts_async(text: str, out_path: str, voice: str = DEFAULT_VOICE) -> None:
-    communicator = edge_tts.Communicate(text, voice=voice)
-    await communicator.save(out_path)
+    def _on_success(self, seconds: float, size: int) -> None:
+        cost = seconds / max(size, FIRST_CHUNK_CHARS)
+        with self._lock:
+            self.successes += 1
+            self._record_latency(seconds)
 
+            spike = (
+                self._samples >= 5 and cost > LATENCY_SPIKE_FACTOR * self._cost_average
+            )
+            if spike:
+                self._decrease()
+            else:
+                # Only grow while the limit is actually what holds requests back
+                if self._in_flight >= int(self.limit):
+                    self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+                # Spikes are kept out of the average so they stay visible
+                self._cost_average = (
+                    cost if self._cost_average is None else 0.8 * self._cost_average + 0.2 * cost
+                )
+                self._samples += 1
 
-def text_to_speech(text: str, out_path: str, voice: str = DEFAULT_VOICE) -> None:
+    def _on_failure(self, timed_out: bool) -> None:
+        with self._lock:
+            self.failures += 1
+            if timed_out:
+                self.timeouts += 1
+            self._decrease()
+
+    async def run(self, request: Callable[[], Awaitable[Any]], size: int = 0) -> Any:
+        """
+        Awaits request() (called again for each attempt) under the
+        concurrency limit, retrying failures. `size` is the length of the
+        text, used to judge whether the request was unusually slow.
+        Raises the last error once the retries are used up.
+        """
+        import asyncio
+        attempt = 0
+        while True:
+            await self._acquire()
+            with self._lock:
+                self.requests += 1
+            start = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(request(), self.timeout)
+            except asyncio.CancelledError:
+                self._release()
+                raise
+            except Exception as e:
+                timed_out = isinstance(e, asyncio.TimeoutError)
+                self._on_failure(timed_out)
+                self._release()
+                metrics.increment("synthesis_failures", reason="timeout" if timed_out else type(e).__name__)
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+                metrics.increment("synthesis_retries")
+                await asyncio.sleep(delay)
+                continue
+
+            latency = time.perf_counter() - start
+            self._on_success(latency, size)
+            self._release()
+            metrics.observe("synthesis_request_seconds", latency)
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the current limit, requests in flight, counters, and the
+        latency histogram as {bucket upper bound: count}.
+        """
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "waiting": len(self._waiters),
+                "requests": self.requests,
+                "successes": self.successes,
+                "failures": self.failures,
+                "retries": self.retries,
+                "timeouts": self.timeouts,
+                "latency_histogram": dict(zip(LATENCY_BUCKETS, self.latency_counts)),
+            }
+
+
+def _resolve_waiter(waiter, scheduler: RequestScheduler) -> None:
+    """ Wakes a waiting request, or returns its slot if it was cancelled meanwhile."""
+    if waiter.cancelled():
+        scheduler._release()
+    else:
+        waiter.set_result(None)
+
+
+def _is_retryable(error: Exception) -> bool:
+    """ Invalid arguments (e.g. an unknown voice) fail the same way every time."""
+    return not isinstance(error, (ValueError, TypeError))
+
+
+_scheduler = RequestScheduler()
+
+
+def get_scheduler() -> RequestScheduler:
+    """ Returns the scheduler all synthesis requests go through."""
+    return _scheduler
+
+
+def set_scheduler(scheduler: Optional[RequestScheduler] = None) -> None:
+    """ Replaces the shared scheduler, e.g. with other limits; None restores the defaults."""
+    global _scheduler
+    _scheduler = scheduler or RequestScheduler()
+
+
+async def _request_chunk_async(text: str, voice: str) -> Tuple[bytes, List[WordBoundary]]:
+    """ One synthesis request to the service (or the configured fake)."""
+    if _communicate_factory is None:
+        import edge_tts
+        factory = edge_tts.Communicate
+    else:
+        factory = _communicate_factory
+    communicator = factory(text, voice=voice, boundary="WordBoundary")
+    audio = bytearray()
+    boundaries: List[WordBoundary] = []
+    async for message in communicator.stream():
+        if message["type"] == "audio":
+            audio.extend(message["data"])
+        elif message["type"] == "WordBoundary":
+            boundaries.append((message["offset"], message["duration"], message["text"]))
+    return bytes(audio), boundaries
+
+
+async def _synthesize_chunk_async(
+    text: str, voice: str = DEFAULT_VOICE
+) -> Tuple[bytes, List[WordBoundary]]:
+    """
+    Synthesizes one chunk of text and returns the MP3 bytes and the
+    word boundaries reported by the service. The request goes through
+    the shared RequestScheduler, which retries it if it fails.
+    Chunks that were synthesized before are read from the cache instead.
+    """
+    cache = get_synthesis_cache()
+    if cache is not None:
+        key = cache.make_key(text, voice, _engine_version())
+        # Audio is only reused together with its word timings
+        words = cache.timings.get(key)
+        audio = cache.get(key) if words is not None else None
+        if audio is not None:
+            metrics.increment("synthesis_cache_hits")
+            return audio, unpack_boundaries(words)
+        metrics.increment("synthesis_cache_misses")
+
+    # Includes waiting for a free slot and retries
+    with metrics.stage("synthesis"):
+        audio, boundaries = await get_scheduler().run(
+            lambda: _request_chunk_async(text, voice), size=len(text)
+        )
+    metrics.increment("synthesized_chars", len(text))
+
+    if cache is not None and audio:
+        cache.timings.put(key, pack_boundaries(boundaries))
+        cache.put(key, audio)
+    return audio, boundaries
+
+
+async def _iter_segments_async(
+    chunks: Iterable[str],
+    voice: str = DEFAULT_VOICE,
+    workers: Optional[int] = DEFAULT_WORKERS,
+    run: Optional[SynthesisRun] = None,
+) -> AsyncIterator[Tuple[bytes, List[WordBoundary]]]:
+    """
+    Synthesizes chunks concurrently and yields (MP3 segment, word
+    boundaries) in chunk order. The scheduler's limit decides how many
+    requests are in flight; `workers`, if given, caps it for this job.
+    With a `run`, chunks found in run.previous are reused and every
+    segment is recorded.
+    Only a small window of chunks is started ahead of the one being
+    yielded, so memory stays bounded no matter how long the document is.
+    The window is kept larger than the scheduler's limit, so the limit
+    is what holds requests back and it can grow while the service keeps up.
+    Closing the generator cancels the chunks still in the window.
+    """
+    import asyncio
+    scheduler = get_scheduler()
+    limit = asyncio.Semaphore(workers) if workers else None
+
+    def window_size() -> int:
+        allowed = workers if workers else math.ceil(scheduler.limit) + 1
+        return 2 * max(1, allowed)
+
+    async def synthesize(chunk: str) -> Tuple[bytes, List[WordBoundary]]:
+        if run is not None and run.previous is not None:
+            reused = run.previous.lookup(SynthesisCache.make_key(chunk, voice, version))
+            if reused is not None:
+                run.reused += 1
+                metrics.increment("chunks_reused")
+                return reused
+        if limit is None:
+            return await _synthesize_chunk_async(chunk, voice)
+        async with limit:
+            return await _synthesize_chunk_async(chunk, voice)
+
+    version = _engine_version()
+    chunk_iter = iter(chunks)
+    # (chunk, task) pairs; chunks are read only as they enter the window
+    window: Deque = deque()
+
+    def fill_window() -> None:
+        while len(window) < window_size():
+            chunk = next(chunk_iter, None)
+            if chunk is None:
+                return
+            window.append((chunk, asyncio.ensure_future(synthesize(chunk))))
+
+    # The scheduler (and semaphore) are first-come first-served, so chunks start in order
+    fill_window()
+    try:
+        while window:
+            chunk, task = window[0]
+            segment = await task
+            window.popleft()
+            fill_window()
+            if run is not None:
+                run.record(SynthesisCache.make_key(chunk, voice, version), segment[1])
+            yield segment
+    finally:
+        for _, task in window:
+            task.cancel()
+
+
+def _chunk_reader(text: TextSource) -> Callable[[], Iterator[str]]:
+    """
+    Returns a function that iterates over the chunks of text each time it
+    is called. A str is split once; pieces (see TextSource) are chunked
+    again on every call, so they are never held in memory together.
+    """
+    if isinstance(text, str):
+        chunks = _split_into_chunks(text)
+        return lambda: iter(chunks)
+    return lambda: iter_text_chunks(text)
+
+
+def _plan_conversion(
+    text: TextSource,
+    part_path: str,
+    out_path: str,
+    voice: str,
+    resume: bool,
+) -> Tuple[Callable[[], Iterator[str]], Optional[ConversionManifest], List[SegmentRecord]]:
+    """
+    Returns the chunk reader, the manifest (with resume) and the segments
+    already in part_path for a conversion. This reads all of the text
+    (which may be a file), so it is run off the event loop.
+    """
+    read_chunks = _chunk_reader(text)
+    if next(read_chunks(), None) is None:
+        raise ValueError("No text to convert to speech.")
+
+    manifest = None
+    done: List[SegmentRecord] = []
+    if resume:
+        version = _engine_version()
+        manifest = ConversionManifest(
+            manifest_path_for(out_path),
+            voice,
+            version,
+            [SynthesisCache.make_key(chunk, voice, version) for chunk in read_chunks()],
+        )
+        if os.path.exists(part_path):
+            done = manifest.load_progress(os.path.getsize(part_path))
+    return read_chunks, manifest, done
+
+
+async def _save_tts_async(
+    text: TextSource,
+    out_path: str,
+    voice: str = DEFAULT_VOICE,
+    workers: Optional[int] = DEFAULT_WORKERS,
+    aligner: Optional[WordAligner] = None,
+    resume: bool = True,
+) -> None:
+    import asyncio
+
+    # Segments are written to a .part file that only replaces out_path
+    # once complete. With resume, a manifest records each finished segment
+    # so an interrupted job can continue where it stopped.
+    part_path = out_path + ".part"
+    read_chunks, manifest, done = await asyncio.get_running_loop().run_in_executor(
+        None, _plan_conversion, text, part_path, out_path, voice, resume
+    )
+
+    try:
+        # MP3 frames can simply be appended, so the segments are written in order
+        with open(part_path, "r+b" if done else "wb") as f:
+            f.truncate(sum(size for size, _ in done))
+            for size, boundaries in done:
+                segment = f.read(size)
+                if aligner is not None:
+                    aligner.add_segment(segment, boundaries)
+
+            if manifest is not None:
+                manifest.start(done)
+            chunks = itertools.islice(read_chunks(), len(done), None)
+            remaining = _iter_segments_async(chunks, voice, workers)
+            async for segment, boundaries in remaining:
+                with metrics.stage("disk_write"):
+                    f.write(segment)
+                    if manifest is not None:
+                        f.flush()
+                        os.fsync(f.fileno())
+                        manifest.add(len(segment), boundaries)
+                if aligner is not None:
+                    aligner.add_segment(segment, boundaries)
+        os.replace(part_path, out_path)
+
+    except BaseException:
+        if manifest is None and os.path.exists(part_path):
+            os.remove(part_path)
+        raise  # with resume, the .part file and manifest are kept for the next run
+
+    finally:
+        if manifest is not None:
+            manifest.close()
+
+    if manifest is not None:
+        manifest.remove()
+
+
+def _make_aligner(text: TextSource, timing: Optional[WordTimingIndex]) -> Optional[WordAligner]:
+    """ Returns an aligner that fills `timing` with offsets into text, if given."""
+    if timing is None:
+        return None
+    if not isinstance(text, str):
+        raise TypeError("Word timings need the text as a single string.")
+    cleaned, offsets = _clean_text_with_offsets(text)
+    return WordAligner(cleaned, offsets, timing)
+
+
+class SynthesisRuntime:
+    """
+    A long-lived asyncio event loop on a background thread.
+    Every synthesis request in the process (GUI, batch jobs, ...) runs on
+    this one loop instead of creating and tearing down its own.
+    submit() is thread-safe and returns a concurrent.futures.Future;
+    cancelling that future cancels the coroutine and its requests.
+    """
+
+    def __init__(self) -> None:
+        self._loop = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        import asyncio
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._loop,), name="tts-runtime", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    @staticmethod
+    def _run(loop) -> None:
+        import asyncio
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_forever()
+        finally:
+            # Cancel whatever was still running when the loop was stopped
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.close()
+
+    def in_runtime_thread(self) -> bool:
+        """ True when called from the runtime's own thread."""
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, coro) -> Future:
+        """ Schedules a coroutine on the runtime loop; safe to call from any thread."""
+        import asyncio
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_started())
+
+    def call_soon(self, callback: Callable[[], None]) -> None:
+        """ Runs a plain callback on the runtime loop; safe to call from any thread."""
+        self._ensure_started().call_soon_threadsafe(callback)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """ Cancels running work and stops the loop thread."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+
+
+# The runtime shared by the whole process; its thread starts on first use
+_runtime = SynthesisRuntime()
+
+
+def get_runtime() -> SynthesisRuntime:
+    """ Returns the shared synthesis runtime."""
+    return _runtime
+
+
+async def text_to_speech_async(
+    text: TextSource,
+    out_path: str,
+    voice: str = DEFAULT_VOICE,
+    workers: Optional[int] = DEFAULT_WORKERS,
+    timing_path: Optional[str] = None,
+    resume: bool = True,
+) -> None:
+    """
+    Native async version of text_to_speech, for use inside an existing
+    event loop. Saves MP3 to out_path, and the word timing index to
+    timing_path if given.
+    """
+    timing = WordTimingIndex() if timing_path else None
+    aligner = _make_aligner(text, timing)
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    await _save_tts_async(text, out_path, voice, workers, aligner, resume)
+    if timing is not None:
+        timing.save(timing_path)
+
+
+async def iter_speech_async(
+    text: str,
+    voice: str = DEFAULT_VOICE,
+    workers: Optional[int] = DEFAULT_WORKERS,
+    timing: Optional[WordTimingIndex] = None,
+    run: Optional[SynthesisRun] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Async generator yielding MP3 segments in order as soon as they are
+    ready, with chunks synthesizing ahead (see _iter_segments_async). The
+    first segment is about one sentence long. Closing the generator (or
+    cancelling the task iterating it) cancels the remaining synthesis.
+    If `timing` is given, the words of each segment are added to it
+    (with offsets into `text`) before the segment is yielded.
+    If `run` is given, segments are recorded in it and chunks unchanged
+    since run.previous are reused instead of synthesized.
+    """
+    aligner = _make_aligner(text, timing)
+    chunks = _split_into_chunks(text, first_chunk_chars=FIRST_CHUNK_CHARS)
+    if not chunks:
+        raise ValueError("No text to convert to speech.")
+
+    segments = _iter_segments_async(chunks, voice, workers, run)
+    try:
+        async for segment, boundaries in segments:
+            if aligner is not None:
+                aligner.add_segment(segment, boundaries)
+            yield segment
+    finally:
+        await segments.aclose()
+
+
+def submit_speech(
+    text: TextSource,
+    out_path: str,
+    voice: str = DEFAULT_VOICE,
+    workers: Optional[int] = DEFAULT_WORKERS,
+    timing_path: Optional[str] = None,
+    resume: bool = True,
+) -> Future:
+    """
+    Starts text_to_speech on the shared runtime and returns at once.
+    The returned future completes when out_path has been written;
+    future.cancel() aborts the synthesis.
+    """
+    return get_runtime().submit(
+        text_to_speech_async(text, out_path, voice, workers, timing_path, resume)
+    )
+
+
+def text_to_speech(
+    text: TextSource,
+    out_path: str,
+    voice: str = DEFAULT_VOICE,
+    workers: Optional[int] = DEFAULT_WORKERS,
+    timing_path: Optional[str] = None,
+    resume: bool = True,
+) -> None:
     """
     Synchronous wrapper you can call from the GUI.
     Saves MP3 to out_path.
-    Cleans the text first to remove unwanted pauses from line breaks.
+    Cleans the text first to remove unwanted pauses from line breaks,
+    then synthesizes it in sentence-bounded chunks, as many at once as
+    the shared scheduler allows (at most `workers`, if given).
+    If timing_path is given, the word timing index (see word_timing.py)
+    is saved there.
+    Instead of a str, text can be pieces that join up to the text and can
+    be iterated more than once, such as pdf_processor.TextFile: they are
+    chunked while being read, so a document of any size is synthesized
+    with a fixed amount of memory (word timings then are not available).
+    out_path only appears once it is complete. With resume, an interrupted
+    job leaves out_path + ".part" and a manifest behind, and calling this
+    again with the same text and voice continues from the first unfinished
+    chunk (see manifest.py).
     """
-    # Clean the text to remove unwanted pauses
-    cleaned_text = _clean_text_for_speech(text)
-    
-    # Ensure directory exists
-    os.makedirs(os.path.dirname(out_path), exist_ok=True)
-    asyncio.run(_save_tts_async(cleaned_text, out_path, voice))
+    if get_runtime().in_runtime_thread():
+        raise RuntimeError("Use text_to_speech_async inside the synthesis runtime.")
 
+    future = submit_speech(text, out_path, voice, workers, timing_path, resume)
+    try:
+        future.result()
+    except BaseException:
+        # e.g. KeyboardInterrupt: don't leave the synthesis running
+        future.cancel()
+        raise
 
-def play_audio(path: str) -> None:
+
+def stream_speech(
+    text: str,
+    voice: str = DEFAULT_VOICE,
+    workers: Optional[int] = DEFAULT_WORKERS,
+    timing: Optional[WordTimingIndex] = None,
+    run: Optional[SynthesisRun] = None,
+) -> Iterator[bytes]:
     """
-    Play an audio file using pygame (blocks until finished).
+    Synthesizes text on the shared runtime and yields the MP3 segments in
+    order, each one as soon as it (and every segment before it) is ready.
+    The first segment is about one sentence long, so the caller can start
+    playing almost immediately regardless of the document size.
+    Closing the generator early, or stop_playback(), cancels the
+    remaining synthesis. If `timing` is given, it receives the timing of
+    every word before its segment is yielded. Pass a SynthesisRun whose
+    buffer receives the segments (e.g. via play_segments) as `run` to reuse
+    the audio of a previous run; see SynthesisRun.
     """
-    pygame.mixer.init()
-    pygame.mixer.music.load(path)
-    pygame.mixer.music.play()
+    import asyncio
+
+    # Segments arrive here as (audio, error); (None, None) marks the end
+    results: "queue.Queue" = queue.Queue()
+    # At most STREAM_LOOKAHEAD_SEGMENTS finished segments wait for the
+    # consumer; synthesis pauses when they are not being played (e.g. while
+    # paused). The semaphore is created by pump() on the runtime loop.
+    credits: List = []
+
+    async def pump() -> None:
+        credits.append(asyncio.Semaphore(STREAM_LOOKAHEAD_SEGMENTS))
+        try:
+            async for segment in iter_speech_async(text, voice, workers, timing, run):
+                await credits[0].acquire()
+                results.put((segment, None))
+        except Exception as e:
+            results.put((None, e))
+
+    future = get_runtime().submit(pump())
+    # Runs when pump finishes, fails or is cancelled (even before it started)
+    future.add_done_callback(lambda _: results.put((None, None)))
+    _active_streams.add(future)
+    try:
+        while True:
+            segment, error = results.get()
+            if error is not None:
+                raise error
+            if segment is None:
+                return
+            get_runtime().call_soon(credits[0].release)
+            yield segment
+    finally:
+        _active_streams.discard(future)
+        # Stop any synthesis still running (e.g. the user pressed Stop)
+        future.cancel()
+
 
-    # Wait until playback is finished
-    while pygame.mixer.music.get_busy():
-        time.sleep(0.1)
+def stream_to_file(segments: Iterable[bytes], out_path: str) -> Iterator[bytes]:
+    """
+    Passes segments through unchanged while also appending them to out_path,
+    so the complete MP3 is on disk once the stream has been consumed.
+    """
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    try:
+        with open(out_path, "wb") as f:
+            for segment in segments:
+                f.write(segment)
+                yield segment
+    finally:
+        close = getattr(segments, "close", None)
+        if close:
+            close()
 
-    pygame.mixer.music.stop()
-    pygame.mixer.quit()
 
-# Global variable to track if mixer is initialized
-_mixer_initialized = False
+def play_audio(path: str) -> None:
+    """
+    Play an audio file (blocks until finished).
+    """
+    controller = get_controller()
+    controller.play(path)
+    controller.wait()
+
+# Synthesis feeding stream_speech() generators, cancelled by stop_playback()
+_active_streams: Set[Future] = set()
+
 def init_mixer() -> None:
-    """Initialize pygame mixer if not already initialized."""
-    global _mixer_initialized
-    if not _mixer_initialized:
-        pygame.mixer.init()
-        _mixer_initialized = True
+    """Initialize the shared playback controller (and pygame mixer) if needed."""
+    get_controller().start()
 
 def start_playback(path: str) -> None:
     """ 
     Start playing an audio file (non-blocking).
     Returns immediately, playback continues in background.
     """
-    print(f"DEBUG: start_playback called with path: {path}") # Debug print
-    init_mixer()
-    pygame.mixer.music.load(path)
-    pygame.mixer.music.play()
+    get_controller().play(path)
+
+def play_segments(
+    segments: Iterable[bytes],
+    on_segment: Optional[Callable[[int], None]] = None,
+    buffer: Optional[AudioBuffer] = None,
+) -> bool:
+    """
+    Plays MP3 segments gaplessly from memory (blocks until finished).
+    Segments are pulled from the iterable as soon as they are ready, so this
+    can consume stream_speech() while synthesis is still running; they are
+    kept in `buffer` so seek_playback() can jump back and forth.
+    pause_playback(), unpause_playback() and stop_playback() work across
+    segment boundaries. on_segment(index) is called as each segment starts.
+    Returns True if playback reached the end, False if it was stopped.
+    """
+    return get_controller().play_segments(segments, on_segment, buffer)
+
+def seek_playback(seconds: float) -> None:
+    """ Jump to a time (in seconds) in the current segmented audio."""
+    get_controller().seek(seconds)
+
+def next_segment() -> None:
+    """ Skip to the next segment (chunk) of the current audio."""
+    get_controller().next_segment()
+
+def previous_segment() -> None:
+    """ Go back to the start of the current or previous segment."""
+    get_controller().previous_segment()
 
 def pause_playback() -> None:
     """ Pause the current playback."""
-    if _mixer_initialized:
-        pygame.mixer.music.pause()
+    get_controller().pause()
 
 def unpause_playback() -> None:
     """ Unpause the current playback."""
-    if _mixer_initialized:
-        pygame.mixer.music.unpause()
+    get_controller().resume()
 
 def stop_playback() -> None:
-    """ Stop the current playback."""
-    if _mixer_initialized:
-        pygame.mixer.music.stop()
+    """ Stop the current playback (and the synthesis feeding it)."""
+    for future in list(_active_streams):
+        future.cancel()
+    get_controller().stop()
 
 def is_playing() -> bool:
-    """ Check if playback is currently active."""
-    if _mixer_initialized:
-        return pygame.mixer.music.get_busy()
-    return False
-
+    """ Check if playback is currently active (playing or paused)."""
+    return get_controller().is_active()
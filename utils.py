@@ -3,9 +3,15 @@ Utility functions for the PDF to Speech application.
 Contains helper functions for file validation, path management, and audio file handling.
 """
 
+import atexit
 import os
+import shutil
+import tempfile
 from pathlib import Path
 
+# Temp directory for this run of the application; see get_session_temp_dir()
+_session_temp_dir = None
+
 
 def is_valid_pdf_file(file_path: str) -> bool:
     """
@@ -49,10 +55,27 @@ def get_temp_audio_path(filename: str = "pdf_tts_output.mp3") -> str:
     return os.path.join(tmp_dir, filename)
 
 
+def get_session_temp_dir() -> str:
+    """
+    Returns a private temp directory for this run of the application.
+    It is created on first use and deleted, with everything in it,
+    when the program exits.
+
+    Returns:
+        Full path to the session temp directory
+    """
+    global _session_temp_dir
+    if _session_temp_dir is None:
+        _session_temp_dir = tempfile.mkdtemp(prefix="pdf_tts_session_")
+        atexit.register(shutil.rmtree, _session_temp_dir, ignore_errors=True)
+    return _session_temp_dir
+
+
 def get_unique_audio_path(base_name: str = "pdf_tts_output") -> str:
     """
     Generates a unique temporary audio file path to avoid overwriting previous files.
-    Adds a timestamp to make the filename unique.
+    Adds a timestamp to make the filename unique. The file lives in the
+    session temp directory, so it is cleaned up when the program exits.
     
     Args:
         base_name: Base name for the file (without extension)
@@ -60,11 +83,10 @@ def get_unique_audio_path(base_name: str = "pdf_tts_output") -> str:
     Returns:
         Full path to a unique temporary audio file
     """
-    import tempfile
     from datetime import datetime
 
     # Get temp directory
-    temp_dir = tempfile.gettempdir()
+    temp_dir = get_session_temp_dir()
 
     # Create a timestamp string (format: YYYYMMDD_HHMMSS)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -75,6 +97,29 @@ def get_unique_audio_path(base_name: str = "pdf_tts_output") -> str:
     # Join temp directory with unique name
     return os.path.join(temp_dir, unique_name)
 
+def get_cache_dir(name: str = "") -> str:
+    """
+    Returns the directory used for persistent caches, creating it if needed.
+    The location can be changed with the PDF_TTS_CACHE_DIR environment variable.
+
+    Args:
+        name: Optional sub-directory for a specific cache (e.g. "audio")
+
+    Returns:
+        Full path to the cache directory
+    """
+    base_dir = os.environ.get("PDF_TTS_CACHE_DIR")
+    if not base_dir:
+        # Windows keeps caches in LOCALAPPDATA, Linux/Mac in ~/.cache
+        root = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME")
+        if not root:
+            root = os.path.join(Path.home(), ".cache")
+        base_dir = os.path.join(root, "pdf_tts")
+
+    cache_dir = os.path.join(base_dir, name) if name else base_dir
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
 def format_file_size(size_bytes: int) -> str:
     """
     Converts file size in bytes to a human-readable string.
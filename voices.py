@@ -0,0 +1,309 @@
+"""
+The catalog of available voices.
+VoiceCatalog loads instantly: from the snapshot saved on disk by the last
+refresh, or from the voices bundled below if there is none. refresh()
+fetches the current list with edge_tts.list_voices() on the synthesis
+runtime in the background, once the snapshot is older than the TTL; when
+the service cannot be reached, the catalog keeps what it has. Voices are
+indexed by locale and gender, so filtering the GUI dropdown is a lookup.
+
+Usage:
+    python main.py voices --locale en-GB --gender Female
+    python main.py voices --refresh
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import metrics
+from tts_engine import DEFAULT_VOICE, get_runtime
+from utils import get_cache_dir
+
+# A saved snapshot is refreshed from the service once it is this old
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+# Give up on a refresh that takes longer than this
+REFRESH_TIMEOUT = 15.0
+
+SNAPSHOT_VERSION = 1
+
+# Voices known to be available, used until a snapshot has been saved:
+# locale -> (name, gender) pairs; the voice id is "<locale>-<name>Neural"
+BUNDLED_VOICES = {
+    "de-DE": [("Amala", "Female"), ("Conrad", "Male"), ("Katja", "Female"), ("Killian", "Male")],
+    "en-AU": [("Natasha", "Female"), ("William", "Male")],
+    "en-CA": [("Clara", "Female"), ("Liam", "Male")],
+    "en-GB": [("Libby", "Female"), ("Maisie", "Female"), ("Ryan", "Male"), ("Sonia", "Female"), ("Thomas", "Male")],
+    "en-IE": [("Connor", "Male"), ("Emily", "Female")],
+    "en-IN": [("Neerja", "Female"), ("Prabhat", "Male")],
+    "en-US": [
+        ("Ana", "Female"), ("Andrew", "Male"), ("Aria", "Female"), ("Ava", "Female"),
+        ("Brian", "Male"), ("Christopher", "Male"), ("Emma", "Female"), ("Eric", "Male"),
+        ("Guy", "Male"), ("Jenny", "Female"), ("Michelle", "Female"), ("Roger", "Male"),
+        ("Steffan", "Male"),
+    ],
+    "es-ES": [("Alvaro", "Male"), ("Elvira", "Female")],
+    "es-MX": [("Dalia", "Female"), ("Jorge", "Male")],
+    "fr-FR": [("Denise", "Female"), ("Eloise", "Female"), ("Henri", "Male")],
+    "hi-IN": [("Madhur", "Male"), ("Swara", "Female")],
+    "it-IT": [("Diego", "Male"), ("Elsa", "Female"), ("Isabella", "Female")],
+    "ja-JP": [("Keita", "Male"), ("Nanami", "Female")],
+    "ko-KR": [("InJoon", "Male"), ("SunHi", "Female")],
+    "nl-NL": [("Colette", "Female"), ("Fenna", "Female"), ("Maarten", "Male")],
+    "pl-PL": [("Marek", "Male"), ("Zofia", "Female")],
+    "pt-BR": [("Antonio", "Male"), ("Francisca", "Female")],
+    "ru-RU": [("Dmitry", "Male"), ("Svetlana", "Female")],
+    "sv-SE": [("Mattias", "Male"), ("Sofie", "Female")],
+    "zh-CN": [("Xiaoxiao", "Female"), ("Xiaoyi", "Female"), ("Yunxi", "Male"), ("Yunyang", "Male")],
+}
+
+# None means edge_tts.list_voices; see set_voice_fetcher()
+_voice_fetcher = None
+
+# The catalog shared by the process. Created on first use; see get_voice_catalog().
+_catalog: Optional["VoiceCatalog"] = None
+_catalog_lock = threading.Lock()
+
+
+class Voice(NamedTuple):
+    """ One voice of the speech service."""
+    id: str  # e.g. "en-GB-RyanNeural"
+    locale: str
+    gender: str
+
+    @property
+    def name(self) -> str:
+        """ Display name: "Ryan" for en-GB-RyanNeural, "Andrew Multilingual" for ...-AndrewMultilingualNeural."""
+        name = self.id[len(self.locale) + 1:] if self.id.startswith(self.locale + "-") else self.id
+        if name.endswith("Neural"):
+            name = name[:-len("Neural")]
+        return name.replace("Multilingual", " Multilingual").strip()
+
+    @property
+    def label(self) -> str:
+        return f"{self.name} ({self.locale}, {self.gender})"
+
+
+def bundled_voices() -> List[Voice]:
+    return [
+        Voice(f"{locale}-{name}Neural", locale, gender)
+        for locale, voices in BUNDLED_VOICES.items()
+        for name, gender in voices
+    ]
+
+
+def parse_voices(entries: Iterable[Dict[str, Any]]) -> List[Voice]:
+    """ Voices from edge_tts.list_voices() entries; entries without an id or locale are skipped."""
+    voices = []
+    for entry in entries:
+        voice_id = entry.get("ShortName")
+        locale = entry.get("Locale")
+        if isinstance(voice_id, str) and isinstance(locale, str) and voice_id and locale:
+            voices.append(Voice(voice_id, locale, str(entry.get("Gender") or "Unknown")))
+    return voices
+
+
+def set_voice_fetcher(fetch: Optional[Callable[[], Any]] = None) -> None:
+    """
+    Replaces edge_tts.list_voices with another coroutine function returning
+    the same kind of entries (for example fake_tts.FakeVoiceList()),
+    so the catalog can be refreshed without a network. Pass None to
+    restore the real service.
+    """
+    global _voice_fetcher
+    _voice_fetcher = fetch
+
+
+async def _fetch_voices() -> List[Dict[str, Any]]:
+    if _voice_fetcher is not None:
+        return await _voice_fetcher()
+    import edge_tts
+    return await edge_tts.list_voices()
+
+
+class VoiceIndex:
+    """
+    An immutable set of voices, sorted by locale and name, with the voices
+    of every locale, gender and locale + gender looked up in advance.
+    """
+
+    def __init__(self, voices: Iterable[Voice]) -> None:
+        unique = {voice.id: voice for voice in voices}
+        self.voices: Tuple[Voice, ...] = tuple(sorted(unique.values(), key=lambda v: (v.locale, v.name)))
+        self.by_id: Dict[str, Voice] = unique
+        groups: Dict[Tuple[Optional[str], Optional[str]], List[Voice]] = {}
+        for voice in self.voices:
+            for key in ((None, None), (voice.locale, None), (None, voice.gender), (voice.locale, voice.gender)):
+                groups.setdefault(key, []).append(voice)
+        self._groups = {key: tuple(group) for key, group in groups.items()}
+        self.locales: Tuple[str, ...] = tuple(sorted({voice.locale for voice in self.voices}))
+        self.genders: Tuple[str, ...] = tuple(sorted({voice.gender for voice in self.voices}))
+
+    def filter(self, locale: Optional[str] = None, gender: Optional[str] = None) -> Tuple[Voice, ...]:
+        """ Voices of the locale and gender (None matches any)."""
+        return self._groups.get((locale, gender), ())
+
+
+class VoiceCatalog:
+    """
+    The voices that can be chosen, loaded from the snapshot at `path` (the
+    voices.json in the cache directory by default) or the bundled list.
+    `source` says which: "snapshot", "bundled", or "service" after a refresh.
+    Reading is safe from any thread; a refresh replaces the whole index at once.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: float = DEFAULT_TTL_SECONDS) -> None:
+        self.path = path or os.path.join(get_cache_dir(), "voices.json")
+        self.ttl = ttl
+        self.index = VoiceIndex(bundled_voices())
+        self.source = "bundled"
+        # Wall-clock time of the fetch the voices came from (None if bundled)
+        self.fetched_at: Optional[float] = None
+        self.last_error: Optional[Exception] = None
+        self._listeners: List[Callable[["VoiceCatalog"], None]] = []
+        self._lock = threading.Lock()
+        self._refresh: Optional[Future] = None
+        self._load_snapshot()
+
+    def _load_snapshot(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != SNAPSHOT_VERSION:
+                return
+            voices = [Voice(*fields) for fields in data["voices"]]
+            fetched_at = float(data["fetched"])
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # A damaged snapshot is replaced by the next refresh
+            self.last_error = e
+            return
+        if voices:
+            self.index = VoiceIndex(voices)
+            self.source = "snapshot"
+            self.fetched_at = fetched_at
+
+    def _save_snapshot(self, voices: Iterable[Voice], fetched_at: float) -> None:
+        data = {"version": SNAPSHOT_VERSION, "fetched": fetched_at, "voices": [list(voice) for voice in voices]}
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        # Written to a temp file first, so a reader never sees half a snapshot
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    @property
+    def voices(self) -> Tuple[Voice, ...]:
+        return self.index.voices
+
+    def get(self, voice_id: str) -> Optional[Voice]:
+        return self.index.by_id.get(voice_id)
+
+    def filter(self, locale: Optional[str] = None, gender: Optional[str] = None) -> Tuple[Voice, ...]:
+        """ Voices of the locale and gender (None matches any); see VoiceIndex."""
+        return self.index.filter(locale, gender)
+
+    def is_stale(self) -> bool:
+        """ True if the voices did not come from the service within the TTL."""
+        return self.fetched_at is None or time.time() - self.fetched_at >= self.ttl
+
+    def add_listener(self, callback: Callable[["VoiceCatalog"], None]) -> None:
+        """ Calls callback(catalog) after each successful refresh, on the runtime thread."""
+        self._listeners.append(callback)
+
+    def refresh(self, force: bool = False) -> Optional[Future]:
+        """
+        Starts fetching the voice list in the background if the catalog is
+        stale (or force is True) and returns a Future of whether it worked;
+        a refresh that is already running is shared. Returns None if the
+        catalog is fresh. Never blocks.
+        """
+        with self._lock:
+            if self._refresh is not None and not self._refresh.done():
+                return self._refresh
+            if not force and not self.is_stale():
+                return None
+            self._refresh = get_runtime().submit(self._refresh_async())
+            return self._refresh
+
+    async def _refresh_async(self) -> bool:
+        import asyncio
+        start = time.perf_counter()
+        try:
+            voices = parse_voices(await asyncio.wait_for(_fetch_voices(), REFRESH_TIMEOUT))
+            if not voices:
+                raise ValueError("The voice list is empty.")
+        except Exception as e:
+            # Offline or failing service: keep the voices we have
+            self.last_error = e
+            metrics.increment("voice_catalog_refreshes", result="failed")
+            return False
+        metrics.observe("voice_catalog_refresh_seconds", time.perf_counter() - start)
+
+        fetched_at = time.time()
+        index = VoiceIndex(voices)
+        try:
+            self._save_snapshot(index.voices, fetched_at)
+        except OSError as e:
+            # The new voices can still be used in this session
+            self.last_error = e
+        else:
+            self.last_error = None
+        self.index, self.source, self.fetched_at = index, "service", fetched_at
+        metrics.increment("voice_catalog_refreshes", result="ok")
+        for callback in list(self._listeners):
+            callback(self)
+        return True
+
+
+def get_voice_catalog() -> VoiceCatalog:
+    """ Returns the catalog shared by the process, loading it on first use."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = VoiceCatalog()
+        return _catalog
+
+
+def set_voice_catalog(catalog: Optional[VoiceCatalog] = None) -> None:
+    """ Replaces the shared catalog (e.g. with one using another path); None reloads it on next use."""
+    global _catalog
+    with _catalog_lock:
+        _catalog = catalog
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Available text-to-speech voices")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_voices = commands.add_parser("voices", help="list the available voices")
+    list_voices.add_argument("--locale", help="only voices of this locale, e.g. en-GB")
+    list_voices.add_argument("--gender", help="only Female or Male voices")
+    list_voices.add_argument("--refresh", action="store_true", help="fetch the current list from the service first")
+
+    args = parser.parse_args(argv)
+    catalog = get_voice_catalog()
+    if args.refresh:
+        if not catalog.refresh(force=True).result():
+            print(f"Could not refresh the voice list: {catalog.last_error}", file=sys.stderr)
+
+    gender = args.gender.capitalize() if args.gender else None
+    for voice in catalog.filter(args.locale, gender):
+        marker = "*" if voice.id == DEFAULT_VOICE else " "
+        print(f"{marker} {voice.id:<40} {voice.locale:<8} {voice.gender}")
+    age = f", fetched {time.strftime('%Y-%m-%d', time.localtime(catalog.fetched_at))}" if catalog.fetched_at else ""
+    print(f"\n{len(catalog.filter(args.locale, gender))} voices ({catalog.source}{age})")
+    return 0
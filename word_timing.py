@@ -0,0 +1,187 @@
+"""
+Word-level timing of synthesized speech.
+edge-tts reports a WordBoundary event (audio offset, duration, word) for
+every spoken word. WordAligner matches those words back to their position
+in the original (uncleaned) text, and WordTimingIndex stores the result as
+parallel arrays, so both directions are a binary search:
+
+    word_at(seconds)   -> the source text span being spoken
+    time_at(offset)    -> where in the audio a character is spoken
+
+The index is saved next to the audio file (see timing_path_for()).
+"""
+
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from audio_buffer import mp3_duration
+
+# (offset, duration, word) of one WordBoundary event; offsets and durations
+# are in edge-tts ticks of 100 ns, relative to the start of the segment
+WordBoundary = Tuple[int, int, str]
+
+TICKS_PER_SECOND = 10_000_000
+
+# A word is searched for this many characters past the previous one; words
+# the service reports differently from the text (e.g. expanded numbers)
+# are skipped instead of being matched far ahead
+_MAX_WORD_GAP = 200
+
+TIMING_SUFFIX = ".words"
+
+
+def timing_path_for(audio_path: str) -> str:
+    """ Path of the timing index saved next to an audio file."""
+    return str(Path(audio_path).with_suffix(TIMING_SUFFIX))
+
+
+def pack_boundaries(boundaries: Sequence[WordBoundary]) -> bytes:
+    """ Serializes the word boundaries of one segment (for the synthesis cache)."""
+    offsets = array("Q", (b[0] for b in boundaries))
+    durations = array("Q", (b[1] for b in boundaries))
+    # Words never contain a newline: the text is cleaned before synthesis
+    words = "\n".join(b[2] for b in boundaries).encode("utf-8")
+    return struct.pack("<I", len(boundaries)) + offsets.tobytes() + durations.tobytes() + words
+
+
+def unpack_boundaries(data: bytes) -> List[WordBoundary]:
+    """ Inverse of pack_boundaries()."""
+    (count,) = struct.unpack_from("<I", data)
+    pos = 4
+    offsets = array("Q")
+    offsets.frombytes(data[pos:pos + 8 * count])
+    pos += 8 * count
+    durations = array("Q")
+    durations.frombytes(data[pos:pos + 8 * count])
+    pos += 8 * count
+    words = data[pos:].decode("utf-8").split("\n") if count else []
+    return list(zip(offsets, durations, words))
+
+
+class WordTimingIndex:
+    """
+    Maps character offsets in the source text to audio timestamps.
+    Entries are stored in spoken order in four arrays (start character,
+    length in characters, start time, duration), a few bytes per word.
+    It can be read from one thread while another one appends to it.
+    """
+
+    MAGIC = b"WTI1"
+    _HEADER = struct.Struct("<4sI")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._chars = array("I")
+        self._lengths = array("I")
+        self._times = array("d")
+        self._durations = array("d")
+
+    def __len__(self) -> int:
+        return len(self._chars)
+
+    def append(self, char_offset: int, length: int, seconds: float, duration: float) -> None:
+        """ Adds one word; words must be added in spoken order."""
+        with self._lock:
+            self._chars.append(char_offset)
+            self._lengths.append(length)
+            self._times.append(seconds)
+            self._durations.append(duration)
+
+    def word_at(self, seconds: float) -> Optional[Tuple[int, int]]:
+        """
+        Returns the (start, end) character span of the word spoken at a
+        time, or None before the first word.
+        """
+        with self._lock:
+            i = bisect_right(self._times, seconds) - 1
+            if i < 0:
+                return None
+            start = self._chars[i]
+            return start, start + self._lengths[i]
+
+    def next_word_time(self, seconds: float) -> Optional[float]:
+        """ Start time of the first word after `seconds`, or None at the end."""
+        with self._lock:
+            i = bisect_right(self._times, seconds)
+            return self._times[i] if i < len(self._times) else None
+
+    def time_at(self, char_offset: int) -> Optional[float]:
+        """
+        Returns the time at which the word containing (or, between words,
+        following) a character offset starts, or None if no word has been
+        recorded there yet.
+        """
+        with self._lock:
+            i = bisect_right(self._chars, char_offset) - 1
+            if i < 0 or char_offset >= self._chars[i] + self._lengths[i]:
+                i += 1
+            if i >= len(self._chars):
+                return None
+            return self._times[i]
+
+    def save(self, path: str) -> None:
+        """ Writes the index to path (atomically, via a temp name)."""
+        part_path = path + ".part"
+        with self._lock:
+            columns = (self._chars, self._lengths, self._times, self._durations)
+            data = b"".join(
+                [self._HEADER.pack(self.MAGIC, len(self._chars))]
+                + [column.tobytes() for column in columns]
+            )
+        try:
+            with open(part_path, "wb") as f:
+                f.write(data)
+            os.replace(part_path, path)
+        except BaseException:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "WordTimingIndex":
+        """ Reads an index written by save()."""
+        index = cls()
+        with open(path, "rb") as f:
+            magic, count = cls._HEADER.unpack(f.read(cls._HEADER.size))
+            if magic != cls.MAGIC:
+                raise ValueError(f"Not a word timing file: {path}")
+            for column in (index._chars, index._lengths, index._times, index._durations):
+                column.frombytes(f.read(column.itemsize * count))
+        return index
+
+
+class WordAligner:
+    """
+    Fills a WordTimingIndex from synthesized segments, in order.
+    `cleaned` is the text that was synthesized and `source_offsets[i]` is
+    the position in the source text of cleaned[i]. Segment start times are
+    the summed durations of the segments before it, matching AudioBuffer.
+    """
+
+    def __init__(self, cleaned: str, source_offsets: Sequence[int], index: WordTimingIndex) -> None:
+        self.cleaned = cleaned
+        self.source_offsets = source_offsets
+        self.index = index
+        self._cursor = 0
+        self._elapsed = 0.0
+
+    def add_segment(self, audio: bytes, boundaries: Sequence[WordBoundary]) -> None:
+        for offset, duration, word in boundaries:
+            start = self.cleaned.find(word, self._cursor, self._cursor + _MAX_WORD_GAP + len(word))
+            if not word or start < 0:
+                continue
+            end = start + len(word)
+            self._cursor = end
+            source_start = self.source_offsets[start]
+            self.index.append(
+                source_start,
+                self.source_offsets[end - 1] + 1 - source_start,
+                self._elapsed + offset / TICKS_PER_SECOND,
+                duration / TICKS_PER_SECOND,
+            )
+        self._elapsed += mp3_duration(audio)